@@ -0,0 +1,17 @@
+"""
+URL configuration of the ASGI entry point. The todo, task and user reads are
+served by async views placed in front of the regular URL configuration
+"""
+from django.urls import re_path
+
+from app.urls import urlpatterns as sync_urlpatterns
+from todo.async_views import TodoAsyncView, TaskAsyncView
+from user.async_views import ManageUserAsyncView
+
+urlpatterns = [
+    re_path(r"^api/todo/todos/$", TodoAsyncView.as_view()),
+    re_path(r"^api/todo/todos/(?P<pk>\d+)/$", TodoAsyncView.as_view()),
+    re_path(r"^api/todo/tasks/$", TaskAsyncView.as_view()),
+    re_path(r"^api/todo/tasks/(?P<pk>\d+)/$", TaskAsyncView.as_view()),
+    re_path(r"^api/user/me/$", ManageUserAsyncView.as_view()),
+] + sync_urlpatterns
@@ -0,0 +1,10 @@
+"""
+gunicorn config of the ASGI entry point, used with
+`gunicorn --config python:app.gunicorn`
+"""
+
+
+def child_exit(server, worker):
+    from core.metrics import mark_process_dead
+
+    mark_process_dead(worker.pid)
@@ -86,7 +86,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.middleware.AsyncStreamingMiddleware",
     "corsheaders.middleware.CorsMiddleware",
+    "core.middleware.QueryTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -99,7 +101,8 @@ MIDDLEWARE = [
 
 SITE_ID = 1
 
-ROOT_URLCONF = "app.urls"
+# app.asgi switches to app.asgi_urls to serve the reads with async views
+ROOT_URLCONF = os.environ.get("ROOT_URLCONF", "app.urls")
 
 TEMPLATES = [
     {
@@ -123,14 +126,34 @@ WSGI_APPLICATION = "app.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# Connections are kept open for DB_CONN_MAX_AGE seconds and reused by the
+# following requests of their thread, after a health check when
+# DB_CONN_HEALTH_CHECKS is set. Set DB_POOL_SIZE to instead share up to that
+# many connections between the threads of a process through an in-process
+# pool, for the ASGI and threaded servers where persistent connections stay
+# with the thread that opened them. Pooled connections go back to the pool
+# after every request and are replaced after DB_POOL_MAX_AGE seconds
+
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 0))
+if DB_POOL_SIZE:
+    _db_engine, _db_conn_max_age = "core.backends.postgresql_pool", 0
+else:
+    _db_engine = "django.db.backends.postgresql"
+    _db_conn_max_age = int(os.environ.get("DB_CONN_MAX_AGE", 60))
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": _db_engine,
         "HOST": os.environ.get("DB_HOST"),
         "NAME": os.environ.get("DB_NAME"),
         "USER": os.environ.get("DB_USER"),
         "PASSWORD": os.environ.get("DB_PASS"),
         "PORT": int(os.environ.get("DB_PORT", 5432)),
+        "CONN_MAX_AGE": _db_conn_max_age,
+        "CONN_HEALTH_CHECKS": bool(int(os.environ.get("DB_CONN_HEALTH_CHECKS", 1))),
+        "POOL_SIZE": DB_POOL_SIZE,
+        "POOL_TIMEOUT": float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+        "POOL_MAX_AGE": int(os.environ.get("DB_POOL_MAX_AGE", 300)),
     }
 }
 
@@ -195,15 +218,105 @@ REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "user.authentication.ExpiringTokenAuthentication",
     ),
+    # orjson backed, falling back to the stdlib json without orjson
+    "DEFAULT_RENDERER_CLASSES": (
+        "core.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "core.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
     "PASSWORD_RESET_SERIALIZER": "user.serializers.ResetPasswordSerializer",
     "PASSWORD_RESET_CONFIRM_SERIALIZER": "user.serializers.ResetPasswordConfirmSerializer",
 }
 
+# Authenticated tokens kept in memory by every process and for how many seconds.
+# Deleting a token or saving its user drops it from the cache of every process
+# through the response cache below, with the per process dummy or locmem
+# backends the other processes keep authenticating it for up to the ttl
+AUTH_TOKEN_CACHE_SIZE = int(os.environ.get("AUTH_TOKEN_CACHE_SIZE", 10000))
+AUTH_TOKEN_CACHE_TTL = int(os.environ.get("AUTH_TOKEN_CACHE_TTL", 60))
+
+# Rendered todo and task lists kept per user until the user's data changes,
+# RESPONSE_CACHE_BACKEND is one of dummy (off), locmem, file or redis.
+# locmem is per process, only use it with a single worker
+RESPONSE_CACHE_BACKENDS = {
+    "dummy": ("django.core.cache.backends.dummy.DummyCache", ""),
+    "locmem": ("django.core.cache.backends.locmem.LocMemCache", "responses"),
+    "file": (
+        "django.core.cache.backends.filebased.FileBasedCache",
+        "/tmp/todo_api_responses",
+    ),
+    "redis": ("django.core.cache.backends.redis.RedisCache", "redis://127.0.0.1:6379"),
+}
+RESPONSE_CACHE_ALIAS = "responses"
+_response_cache_backend, _response_cache_location = RESPONSE_CACHE_BACKENDS[
+    os.environ.get("RESPONSE_CACHE_BACKEND", "dummy")
+]
+
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    RESPONSE_CACHE_ALIAS: {
+        "BACKEND": _response_cache_backend,
+        "LOCATION": os.environ.get("RESPONSE_CACHE_LOCATION", _response_cache_location),
+        "TIMEOUT": int(os.environ.get("RESPONSE_CACHE_TTL", 300)),
+    },
+}
+
 REST_AUTH_SERIALIZERS = {
     "PASSWORD_RESET_SERIALIZER": "user.serializers.ResetPasswordSerializer",
     "PASSWORD_RESET_CONFIRM_SERIALIZER": "user.serializers.ResetPasswordConfirmSerializer",
 }
 
+# Page size for the todo and task list endpoints, 0 leaves them unpaginated
+# unless the client asks for a `page_size`
+TODO_PAGE_SIZE = int(os.environ.get("TODO_PAGE_SIZE", 0)) or None
+TODO_MAX_PAGE_SIZE = int(os.environ.get("TODO_MAX_PAGE_SIZE", 1000))
+
+# Unpaginated lists longer than this are streamed, 0 streams only the lists
+# requested with `stream=true`. Rows are read and rendered a chunk at a time
+TODO_STREAM_THRESHOLD = int(os.environ.get("TODO_STREAM_THRESHOLD", 0))
+TODO_STREAM_CHUNK_SIZE = int(os.environ.get("TODO_STREAM_CHUNK_SIZE", 500))
+
+# Number of lines of an import validated and created in one transaction
+TODO_IMPORT_CHUNK_SIZE = int(os.environ.get("TODO_IMPORT_CHUNK_SIZE", 500))
+
+# Rank keys longer than this get rebalanced after a move
+RANK_REBALANCE_LENGTH = int(os.environ.get("RANK_REBALANCE_LENGTH", 24))
+
+# Bulk updates of more rows than this load them into a temporary table with
+# COPY instead of sending them in the statement, see benchmark_bulk_update
+BULK_UPDATE_COPY_THRESHOLD = int(os.environ.get("BULK_UPDATE_COPY_THRESHOLD", 2000))
+
+# Set UNIQUE_ORDERING to 1 to have migrate add the unique constraints on the
+# orderings of the todos of a user and the tasks of a todo
+UNIQUE_ORDERING = bool(int(os.environ.get("UNIQUE_ORDERING", 0)))
+
+# Seconds the sync cursor trails the current time, changes saved by
+# transactions that commit later than this after their write can be missed
+SYNC_CURSOR_LAG = int(os.environ.get("SYNC_CURSOR_LAG", 5))
+
+# Bearer token required to read /api/metrics. Without one the metrics are
+# only served when DEBUG is on
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# Set REQUEST_LOG_LEVEL to INFO to log the duration and SQL queries of every
+# request as JSON
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "core.requests": {
+            "handlers": ["console"],
+            "level": os.environ.get("REQUEST_LOG_LEVEL", "WARNING"),
+            "propagate": False,
+        },
+    },
+}
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Todo API",
     "DESCRIPTION": "An API which allows creation of todos for users",
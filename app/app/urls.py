@@ -34,6 +34,7 @@ urlpatterns = [
     re_path("api/user/", include("user.urls")),
     re_path("api/todo/", include("todo.urls")),
     re_path("api/healthcheck", core_views.health_check, name="healthcheck"),
+    re_path("api/metrics", core_views.metrics, name="metrics"),
 ]
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,96 @@
+"""
+Async read views served by the ASGI entry point. Plain JSON reads are answered
+on the event loop with the async ORM, every other request to the same URL is
+handed to the regular view
+"""
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.urls import resolve
+from django.views import View
+from rest_framework import exceptions, status
+
+from core.renderers import ORJSONRenderer
+from user.authentication import ExpiringTokenAuthentication
+
+
+class AsyncReadView(View):
+    """
+    Base for the async read views. Subclasses implement `get_data` returning
+    the data to render for the authenticated user
+    """
+
+    sync_urlconf = "app.urls"
+    authentication_class = ExpiringTokenAuthentication
+    renderer = ORJSONRenderer()
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # authentication is by token, the views handing over writes are exempt
+        view.csrf_exempt = True
+        return view
+
+    def handles(self, request, *args, **kwargs):
+        """
+        Only plain reads are served here, paginated, streamed, conditional
+        and browsable API requests go to the regular view
+        """
+        return (
+            request.method == "GET"
+            and not request.GET
+            and "If-None-Match" not in request.headers
+            and "text/html" not in request.headers.get("Accept", "")
+        )
+
+    def render(self, data, status_code=status.HTTP_200_OK, headers=None):
+        return HttpResponse(
+            self.renderer.render(data),
+            status=status_code,
+            content_type="application/json",
+            headers=headers,
+        )
+
+    async def authenticate(self, request):
+        authenticator = self.authentication_class()
+        credentials = await authenticator.aauthenticate(request)
+        if credentials is None:
+            raise exceptions.NotAuthenticated()
+        return credentials[0]
+
+    async def serves(self, request, *args, **kwargs):
+        """
+        Checks needing the authenticated user, the requests failing them are
+        handed to the regular view
+        """
+        return True
+
+    async def get_etag(self, request, *args, **kwargs):
+        return None
+
+    async def get_data(self, request, *args, **kwargs):
+        raise NotImplementedError
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            request.user = await self.authenticate(request)
+            if not await self.serves(request, *args, **kwargs):
+                return await self.hand_off(request, *args, **kwargs)
+            etag = await self.get_etag(request, *args, **kwargs)
+            data = await self.get_data(request, *args, **kwargs)
+        except exceptions.APIException as e:
+            headers = None
+            if isinstance(
+                e, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)
+            ):
+                headers = {"WWW-Authenticate": self.authentication_class.keyword}
+            return self.render({"detail": e.detail}, e.status_code, headers)
+        return self.render(data, headers={"ETag": etag} if etag else None)
+
+    async def hand_off(self, request, *args, **kwargs):
+        match = resolve(request.path_info, urlconf=self.sync_urlconf)
+        return await sync_to_async(match.func)(request, *match.args, **match.kwargs)
+
+    async def dispatch(self, request, *args, **kwargs):
+        if self.handles(request, *args, **kwargs):
+            return await self.get(request, *args, **kwargs)
+        return await self.hand_off(request, *args, **kwargs)
@@ -0,0 +1,90 @@
+"""
+PostgreSQL backend taking its connections from an in-process pool shared by
+the threads of the process. Closing a connection gives it back to the pool,
+so connections outlive the requests and threads that used them
+"""
+import threading
+
+from django.db.backends.postgresql import base, creation
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+from core.pool import ConnectionPool
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+def is_usable(connection):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+    except base.Database.Error:
+        return False
+    return True
+
+
+def get_pool(alias, settings_dict, conn_params):
+    """
+    Return the pool of the connections to the database alias made with
+    `conn_params`, created on first use from the POOL_SIZE, POOL_TIMEOUT,
+    POOL_MAX_AGE and CONN_HEALTH_CHECKS settings
+    """
+    # the same alias connects to another database to create the test database
+    key = (alias, repr(sorted(conn_params.items())))
+    with pools_lock:
+        pool = pools.get(key)
+        if pool is None:
+            pool = pools[key] = ConnectionPool(
+                max_size=settings_dict.get("POOL_SIZE", 10),
+                timeout=settings_dict.get("POOL_TIMEOUT", 10),
+                max_age=settings_dict.get("POOL_MAX_AGE") or None,
+                check=is_usable if settings_dict.get("CONN_HEALTH_CHECKS") else None,
+            )
+        return pool
+
+
+def close_idle_connections(alias):
+    """
+    Close the idle connections of every pool of the database alias
+    """
+    with pools_lock:
+        alias_pools = [pool for key, pool in pools.items() if key[0] == alias]
+    for pool in alias_pools:
+        pool.close_idle()
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # idle pooled connections would keep the test database in use
+        close_idle_connections(self.connection.alias)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def get_new_connection(self, conn_params):
+        self.pool = get_pool(self.alias, self.settings_dict, conn_params)
+        try:
+            return self.pool.acquire(
+                lambda: super(DatabaseWrapper, self).get_new_connection(conn_params)
+            )
+        except TimeoutError as e:
+            raise self.Database.OperationalError(str(e))
+
+    def _close(self):
+        """
+        Give the connection back to the pool with no transaction left open.
+        Connections closed inside an atomic block stay attached to this
+        wrapper until it rolls back so they are closed for good
+        """
+        connection = self.connection
+        reusable = not self.in_atomic_block and not connection.closed
+        if reusable:
+            try:
+                if connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                    connection.rollback()
+                connection.autocommit = True
+            except self.Database.Error:
+                reusable = False
+        self.pool.release(connection, reusable)
@@ -0,0 +1,30 @@
+"""
+Helpers shared by the benchmark commands
+"""
+import time
+
+
+def percentile(values, percent):
+    """
+    Return the value below which `percent` percent of the values fall
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def milliseconds(seconds):
+    return round(seconds * 1000, 2) if seconds is not None else None
+
+
+def measure(func, iterations):
+    """
+    Call `func` `iterations` times, returning the p50 and p95 seconds a call took
+    """
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return percentile(timings, 50), percentile(timings, 95)
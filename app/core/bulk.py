@@ -0,0 +1,241 @@
+"""
+Bulk writes for large batches of rows
+"""
+import io
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections, models, router, transaction
+from django.utils import timezone
+
+
+def _prepared_rows(model, rows, fields, connection):
+    """
+    The pk followed by the value of every field of the rows, ready for the
+    database
+    """
+    opts = model._meta
+    columns = [opts.get_field(name) for name in fields]
+    for row in rows:
+        yield [opts.pk.get_db_prep_value(row[opts.pk.attname], connection)] + [
+            field.get_db_prep_save(row[field.attname], connection) for field in columns
+        ]
+
+
+def _cast_type(field, connection):
+    """
+    The type to cast a VALUES entry to. Char fields are cast without their
+    length as Postgres cuts strings cast to a shorter varchar where assigning
+    them to the column raises
+    """
+    if isinstance(field, models.CharField):
+        return "varchar"
+    return field.cast_db_type(connection)
+
+
+def _update_from(model, rows, fields, source, source_params, scope, using):
+    """
+    Update `fields` from `source`, a relation aliased as v holding the pk and
+    the new value of every field, and return the updated instances in the
+    order of the rows
+    """
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    opts = model._meta
+    table = qn(opts.db_table)
+
+    columns = [opts.get_field(name) for name in fields]
+    # auto_now fields are set in the SET clause, ahead of the source params
+    touched = [
+        field
+        for field in opts.concrete_fields
+        if getattr(field, "auto_now", False) and field not in columns
+    ]
+    now = timezone.now()
+    params = [field.get_db_prep_save(now, connection) for field in touched]
+    params.extend(source_params)
+
+    pk_column = qn(opts.pk.column)
+    sql = (
+        f"UPDATE {table} SET "
+        + ", ".join(
+            [f"{qn(f.column)} = v.{qn(f.column)}" for f in columns]
+            + [f"{qn(f.column)} = %s" for f in touched]
+        )
+        + f" FROM {source} WHERE {table}.{pk_column} = v.{pk_column}"
+    )
+
+    if scope is not None:
+        scope_query = scope.order_by().values(opts.pk.attname).query
+        scope_sql, scope_params = scope_query.get_compiler(using).as_sql()
+        sql += f" AND {table}.{pk_column} IN ({scope_sql})"
+        params.extend(scope_params)
+
+    concrete_fields = opts.concrete_fields
+    sql += " RETURNING " + ", ".join(f"{table}.{qn(f.column)}" for f in concrete_fields)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        result = cursor.fetchall()
+
+    converters = connection.ops.get_db_converters
+    attnames = [f.attname for f in concrete_fields]
+    objs = []
+    for row in result:
+        values = []
+        for field, value in zip(concrete_fields, row):
+            for converter in converters(field) + field.get_db_converters(connection):
+                value = converter(value, field, connection)
+            values.append(value)
+        objs.append(model.from_db(using, attnames, values))
+
+    # RETURNING follows the order of the join, give the rows in the given order
+    positions = {
+        opts.pk.to_python(row[opts.pk.attname]): i for i, row in enumerate(rows)
+    }
+    objs.sort(key=lambda obj: positions[obj.pk])
+    return objs
+
+
+def values_update(model, rows, fields, scope=None, using=None, copy_threshold=None):
+    """
+    Update `fields` on many rows with a single UPDATE ... FROM (VALUES ...)
+    statement matching the rows on their primary key. `rows` are dicts holding
+    the pk and the new value of every field by attname, `scope` is an optional
+    queryset the updated rows must belong to. Fields with auto_now are set to
+    the current time like save() does. Batches of more than `copy_threshold`
+    rows, BULK_UPDATE_COPY_THRESHOLD by default, go through copy_update.
+    Returns the updated instances as they are after the update, in the order
+    of the rows
+    """
+    rows = list(rows)
+    if not rows:
+        return []
+    if copy_threshold is None:
+        copy_threshold = settings.BULK_UPDATE_COPY_THRESHOLD
+    if len(rows) > copy_threshold:
+        return copy_update(model, rows, fields, scope=scope, using=using)
+
+    using = using or router.db_for_write(model)
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    opts = model._meta
+
+    columns = [opts.pk] + [opts.get_field(name) for name in fields]
+    row_sql = "(%s)" % ", ".join(
+        f"%s::{_cast_type(field, connection)}" for field in columns
+    )
+    params = []
+    for values in _prepared_rows(model, rows, fields, connection):
+        params.extend(values)
+
+    source = (
+        f"(VALUES {', '.join([row_sql] * len(rows))})"
+        f" AS v({', '.join(qn(f.column) for f in columns)})"
+    )
+    return _update_from(model, rows, fields, source, params, scope, using)
+
+
+def _copy_text(value):
+    """
+    A value in the text format of COPY
+    """
+    if value is None:
+        return "\\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def copy_update(model, rows, fields, scope=None, using=None):
+    """
+    Update `fields` on many rows like values_update, loading the rows with
+    COPY into a temporary table the UPDATE reads from. The statement stays
+    the same size whatever the number of rows, which pays off on large
+    batches. Prepared values are sent as text so the fields must hold values
+    Postgres reads from their str()
+    """
+    rows = list(rows)
+    if not rows:
+        return []
+
+    using = using or router.db_for_write(model)
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    opts = model._meta
+
+    columns = ", ".join(
+        qn(field.column) for field in [opts.pk] + [opts.get_field(f) for f in fields]
+    )
+    temp_table = qn(f"bulk_update_{uuid.uuid4().hex}")
+    data = io.StringIO(
+        "".join(
+            "\t".join(_copy_text(value) for value in values) + "\n"
+            for values in _prepared_rows(model, rows, fields, connection)
+        )
+    )
+
+    with transaction.atomic(using=using):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TEMPORARY TABLE {temp_table} ON COMMIT DROP AS "
+                f"SELECT {columns} FROM {qn(opts.db_table)} WITH NO DATA"
+            )
+            cursor.copy_expert(f"COPY {temp_table} ({columns}) FROM STDIN", data)
+            # without statistics the planner guesses the size of the table
+            cursor.execute(f"ANALYZE {temp_table}")
+
+        objs = _update_from(model, rows, fields, f"{temp_table} AS v", [], scope, using)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE {temp_table}")
+    return objs
+
+
+def changed_columns_update(instances, rows, fields, scope=None, using=None):
+    """
+    Apply `rows`, dicts holding the pk and new values for some of `fields`, to
+    the matching `instances` writing only the columns whose value changes.
+    Rows changing the same columns are written together by one values_update,
+    rows changing nothing are skipped and rows matching no instance ignored.
+    Raises django's ValidationError for values the fields cannot hold.
+    Returns the instances that changed, updated in place
+    """
+    instances = list(instances)
+    if not instances:
+        return []
+
+    model = type(instances[0])
+    opts = model._meta
+    by_pk = {obj.pk: obj for obj in instances}
+
+    groups = defaultdict(list)
+    for row in rows:
+        obj = by_pk.get(opts.pk.to_python(row.get(opts.pk.attname)))
+        if obj is None:
+            continue
+
+        changes = {}
+        for name in fields:
+            if name in row:
+                field = opts.get_field(name)
+                value = field.to_python(row[name])
+                field.run_validators(value)
+                if value != getattr(obj, field.attname):
+                    changes[field.attname] = value
+        if changes:
+            groups[tuple(sorted(changes))].append({opts.pk.attname: obj.pk, **changes})
+
+    changed = []
+    for columns, group in groups.items():
+        for updated in values_update(model, group, columns, scope=scope, using=using):
+            obj = by_pk[updated.pk]
+            for field in opts.concrete_fields:
+                setattr(obj, field.attname, getattr(updated, field.attname))
+            changed.append(obj)
+    return changed
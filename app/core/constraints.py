@@ -0,0 +1,71 @@
+"""
+Optional unique constraints on the orderings of the todos of a user and the
+tasks of a todo. They are deferred to the end of the transaction so that
+orderings can be swapped by a single statement
+"""
+
+# constraint name to the table and the parent column it applies to
+ORDERING_CONSTRAINTS = {
+    "todo_user_ordering_uniq": ("core_todo", "user_id"),
+    "task_todo_ordering_uniq": ("core_task", "todo_id"),
+}
+
+
+def find_duplicate_orderings(connection):
+    """
+    Return the number of orderings used more than once by parent, by
+    constraint name
+    """
+    qn = connection.ops.quote_name
+    duplicates = {}
+    with connection.cursor() as cursor:
+        for name, (table, parent) in ORDERING_CONSTRAINTS.items():
+            cursor.execute(
+                f"SELECT count(*) FROM (SELECT 1 FROM {qn(table)}"
+                f" WHERE ordering IS NOT NULL GROUP BY {qn(parent)}, ordering"
+                " HAVING count(*) > 1) AS duplicates"
+            )
+            duplicates[name] = cursor.fetchone()[0]
+    return duplicates
+
+
+def existing_ordering_constraints(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT conname FROM pg_constraint WHERE conname = ANY(%s)",
+            [list(ORDERING_CONSTRAINTS)],
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def add_ordering_constraints(connection):
+    """
+    Add the constraints missing from the database. Raises ValueError when
+    orderings are already duplicated
+    """
+    duplicates = {
+        name: count
+        for name, count in find_duplicate_orderings(connection).items()
+        if count
+    }
+    if duplicates:
+        raise ValueError(f"Duplicate orderings found: {duplicates}")
+
+    qn = connection.ops.quote_name
+    existing = existing_ordering_constraints(connection)
+    with connection.cursor() as cursor:
+        for name, (table, parent) in ORDERING_CONSTRAINTS.items():
+            if name not in existing:
+                cursor.execute(
+                    f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(name)}"
+                    f" UNIQUE ({qn(parent)}, ordering) DEFERRABLE INITIALLY DEFERRED"
+                )
+
+
+def drop_ordering_constraints(connection):
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        for name, (table, _) in ORDERING_CONSTRAINTS.items():
+            cursor.execute(
+                f"ALTER TABLE {qn(table)} DROP CONSTRAINT IF EXISTS {qn(name)}"
+            )
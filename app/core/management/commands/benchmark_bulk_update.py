@@ -0,0 +1,99 @@
+"""
+Django command to compare Django's bulk_update with the VALUES and COPY
+bulk updates on batches of growing size.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.benchmark import measure, milliseconds
+from core.bulk import copy_update, values_update
+from core.models import Todo
+from core.seed import seed_users
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the bulk updates."""
+
+    help = (
+        "Update the title, completed and ordering of batches of todos of the "
+        "given sizes with bulk_update, values_update and copy_update, "
+        "printing the p50/p95 time of each and the fastest. The seeded data "
+        "is rolled back afterwards"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="10,100,500,1000,2000,5000,10000",
+            help="Comma separated numbers of todos updated at once",
+        )
+        parser.add_argument("--iterations", type=int, default=10)
+
+    def get_cases(self, todos):
+        fields = ["title", "completed", "ordering"]
+        state = {"round": 0}
+
+        def next_round():
+            # every call writes new values so no update is a no-op
+            state["round"] += 1
+            return state["round"]
+
+        def rows():
+            round = next_round()
+            return [
+                {
+                    "id": todo.id,
+                    "title": f"Todo {round}",
+                    "completed": round % 2 == 0,
+                    "ordering": round,
+                }
+                for todo in todos
+            ]
+
+        def bulk_update():
+            round = next_round()
+            for todo in todos:
+                todo.title = f"Todo {round}"
+                todo.completed = round % 2 == 0
+                todo.ordering = round
+            Todo.objects.bulk_update(todos, fields)
+
+        return {
+            "bulk_update": bulk_update,
+            "values": lambda: values_update(
+                Todo, rows(), fields, copy_threshold=len(todos)
+            ),
+            "copy": lambda: copy_update(Todo, rows(), fields),
+        }
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        try:
+            sizes = [int(size) for size in options["sizes"].split(",")]
+        except ValueError:
+            raise CommandError("--sizes must be a comma separated list of numbers")
+        if min(sizes) < 1:
+            raise CommandError("--sizes must be positive")
+        if options["iterations"] < 1:
+            raise CommandError("--iterations must be positive")
+
+        with transaction.atomic():
+            (user,) = seed_users(1, max(sizes), 0, "", prefix="bulk-update")
+            all_todos = list(Todo.objects.filter(user=user).order_by("id"))
+
+            for size in sizes:
+                timings = {
+                    name: measure(case, options["iterations"])
+                    for name, case in self.get_cases(all_todos[:size]).items()
+                }
+                fastest = min(timings, key=lambda name: timings[name][0])
+                self.stdout.write(
+                    f"{size} rows: "
+                    + ", ".join(
+                        f"{name} p50 {milliseconds(p50)}ms p95 {milliseconds(p95)}ms"
+                        for name, (p50, p95) in timings.items()
+                    )
+                    + f", fastest {fastest}"
+                )
+            # the benchmark leaves no data behind
+            transaction.set_rollback(True)
@@ -0,0 +1,120 @@
+"""
+Django command to compare how many concurrent slow clients the WSGI and the
+ASGI deployments sustain.
+"""
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark import percentile, milliseconds
+
+
+class Command(BaseCommand):
+    """Django command to benchmark concurrent reads against running servers."""
+
+    help = (
+        "Send concurrent slow reading clients to every --url and report the "
+        "throughput and latency of each. Start the servers speaking HTTP first, "
+        "e.g. `uwsgi --http :8000 --workers 4 --module app.wsgi` and "
+        "`gunicorn app.asgi:application --bind :8001 --workers 4 "
+        "--worker-class uvicorn.workers.UvicornWorker`"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", action="append", required=True)
+        parser.add_argument("--token", required=True, help="Token of the user")
+        parser.add_argument("--path", action="append", help="Defaults to the reads")
+        parser.add_argument("--concurrency", type=int, default=100)
+        parser.add_argument("--requests", type=int, default=1000)
+        parser.add_argument(
+            "--read-delay",
+            type=float,
+            default=0.05,
+            help="Seconds a client waits between reads of 4KB of the response",
+        )
+        parser.add_argument("--output", help="Write the results as JSON")
+
+    async def fetch(self, host, port, path, token, read_delay):
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            writer.write(
+                (
+                    f"GET {path} HTTP/1.1\r\nHost: {host}\r\n"
+                    f"Authorization: Token {token}\r\n"
+                    "Accept: application/json\r\nConnection: close\r\n\r\n"
+                ).encode("ascii")
+            )
+            await writer.drain()
+            status_line = await reader.readline()
+            while chunk := await reader.read(4096):
+                await asyncio.sleep(read_delay)
+            return int(status_line.split()[1])
+        finally:
+            writer.close()
+
+    async def run(self, url, paths, options):
+        parts = urlsplit(url)
+        host, port = parts.hostname, parts.port or 80
+        semaphore = asyncio.Semaphore(options["concurrency"])
+        latencies, errors = [], 0
+
+        async def client(i):
+            nonlocal errors
+            path = paths[i % len(paths)]
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    status = await self.fetch(
+                        host, port, path, options["token"], options["read_delay"]
+                    )
+                except (OSError, IndexError, ValueError):
+                    status = None
+                if status == 200:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*[client(i) for i in range(options["requests"])])
+        duration = time.perf_counter() - start
+
+        return {
+            "url": url,
+            "requests": options["requests"],
+            "concurrency": options["concurrency"],
+            "errors": errors,
+            "duration": round(duration, 3),
+            "requests_per_second": round(len(latencies) / duration, 1),
+            "p50_ms": milliseconds(percentile(latencies, 50)),
+            "p95_ms": milliseconds(percentile(latencies, 95)),
+            "p99_ms": milliseconds(percentile(latencies, 99)),
+        }
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        paths = options["path"] or [
+            "/api/todo/todos/",
+            "/api/todo/tasks/",
+            "/api/user/me/",
+        ]
+        if options["concurrency"] < 1 or options["requests"] < 1:
+            raise CommandError("--concurrency and --requests must be positive")
+
+        results = []
+        for url in options["url"]:
+            result = asyncio.run(self.run(url, paths, options))
+            results.append(result)
+            self.stdout.write(
+                f"{url}: {result['requests_per_second']} req/s, "
+                f"p50 {result['p50_ms']}ms, p95 {result['p95_ms']}ms, "
+                f"p99 {result['p99_ms']}ms, {result['errors']} errors"
+            )
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(results, f, indent=2)
+
+        self.stdout.write(self.style.SUCCESS("Benchmark complete!"))
@@ -0,0 +1,97 @@
+"""
+Django command to compare the time requests spend on the database when every
+request opens its own connection, when connections persist and when they
+come from the in-process pool.
+"""
+import copy
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.utils import load_backend
+
+from core.backends.postgresql_pool.base import close_idle_connections
+from core.benchmark import percentile, milliseconds
+
+MODES = {
+    "new connection": ("django.db.backends.postgresql", 0),
+    "persistent": ("django.db.backends.postgresql", None),
+    "pooled": ("core.backends.postgresql_pool", 0),
+}
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the database connection modes."""
+
+    help = (
+        "Run requests of one query from --threads threads with a new "
+        "connection per request, persistent connections and pooled "
+        "connections, printing the p50/p95 time of a request in each mode "
+        "and the time saved per request by skipping the connection setup"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500, help="Per thread")
+        parser.add_argument("--threads", type=int, default=4)
+        parser.add_argument("--pool-size", type=int, default=4)
+
+    def get_wrapper(self, mode, pool_size):
+        engine, conn_max_age = MODES[mode]
+        settings_dict = copy.deepcopy(connections["default"].settings_dict)
+        settings_dict.update(
+            ENGINE=engine,
+            CONN_MAX_AGE=conn_max_age,
+            CONN_HEALTH_CHECKS=True,
+            POOL_SIZE=pool_size,
+        )
+        alias = f"benchmark {mode}"
+        return load_backend(engine).DatabaseWrapper(settings_dict, alias)
+
+    def run_requests(self, mode, options):
+        """
+        Time every request of every thread, each thread using its own
+        connection wrapper like the threads of a server do
+        """
+        timings = []
+        lock = threading.Lock()
+
+        def worker(_):
+            wrapper = self.get_wrapper(mode, options["pool_size"])
+            thread_timings = []
+            try:
+                for _ in range(options["requests"]):
+                    start = time.perf_counter()
+                    # what the request_started and request_finished signals do
+                    wrapper.close_if_unusable_or_obsolete()
+                    with wrapper.cursor() as cursor:
+                        cursor.execute("SELECT 1")
+                    wrapper.close_if_unusable_or_obsolete()
+                    thread_timings.append(time.perf_counter() - start)
+            finally:
+                wrapper.close()
+            with lock:
+                timings.extend(thread_timings)
+
+        with ThreadPoolExecutor(max_workers=options["threads"]) as executor:
+            list(executor.map(worker, range(options["threads"])))
+        close_idle_connections(f"benchmark {mode}")
+        return timings
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        if min(options["requests"], options["threads"], options["pool_size"]) < 1:
+            raise CommandError("Counts must be positive")
+
+        p50s = {}
+        for mode in MODES:
+            timings = self.run_requests(mode, options)
+            p50s[mode] = percentile(timings, 50)
+            self.stdout.write(
+                f"{mode}: p50 {milliseconds(p50s[mode])}ms "
+                f"p95 {milliseconds(percentile(timings, 95))}ms"
+            )
+        for mode in ["persistent", "pooled"]:
+            saved = p50s["new connection"] - p50s[mode]
+            self.stdout.write(f"{mode} saves {milliseconds(saved)}ms per request")
@@ -0,0 +1,533 @@
+"""
+Django command to benchmark the latency, SQL queries and memory of every
+todo and user route.
+"""
+import json
+import time
+import tracemalloc
+from collections import namedtuple
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.urls import get_resolver, reverse
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from rest_framework.authtoken.models import Token
+
+from core.benchmark import percentile, milliseconds
+from core.middleware import QueryStats
+from core.models import Todo, Task
+from core.seed import seed_users
+
+PASSWORD = "Benchmarkuser123"
+
+# `prepare` is called with the batch size and returns the path and the
+# keyword arguments of the request
+Case = namedtuple("Case", ["method", "route", "batched", "prepare"])
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the API routes."""
+
+    help = (
+        "Drive every route of the todo and user APIs through the test client "
+        "and write the p50/p95/p99 latency, query count and peak memory of each "
+        "to a JSON file. Every request runs in a transaction rolled back "
+        "afterwards. Pass --compare with two result files to diff them"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", default="benchmark_results.json")
+        parser.add_argument(
+            "--batch-sizes",
+            default="10,100,1000,10000",
+            help="Comma separated sizes the batch routes are run with",
+        )
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument(
+            "--batch-iterations",
+            type=int,
+            default=5,
+            help="Iterations of the batch routes at every size",
+        )
+        parser.add_argument("--todos", type=int, default=100)
+        parser.add_argument("--tasks", type=int, default=5, help="Per todo")
+        parser.add_argument(
+            "--route", action="append", help="Only run the routes with this name"
+        )
+        parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"))
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=10.0,
+            help="Percent p95 increase reported as a regression by --compare",
+        )
+
+    # data of the requests
+
+    def create_todos(self, count):
+        first = get_user_model().objects.reserve_orderings(self.user.id, count)
+        todos = Todo.objects.bulk_create(
+            [
+                Todo(user=self.user, title=f"Todo {i}", ordering=first + i)
+                for i in range(count)
+            ]
+        )
+        return [todo.id for todo in todos]
+
+    def create_tasks(self, count):
+        first = Todo.objects.reserve_orderings(self.todo_ids[0], count)
+        tasks = Task.objects.bulk_create(
+            [
+                Task(todo_id=self.todo_ids[0], task=f"Task {i}", ordering=first + i)
+                for i in range(count)
+            ]
+        )
+        return [task.id for task in tasks]
+
+    def todo_rows(self, count):
+        return [
+            {
+                "title": f"Todo {i}",
+                "completed": False,
+                "tasks": [{"task": "Task", "completed": False}],
+            }
+            for i in range(count)
+        ]
+
+    def json_body(self, data):
+        return {"data": json.dumps(data), "content_type": "application/json"}
+
+    def get_cases(self):
+        todo_id, task_id = self.todo_ids[0], self.task_ids[0]
+        todo_url = reverse("todo:todo-detail", args=[todo_id])
+        task_url = reverse("todo:task-detail", args=[task_id])
+        json_body = self.json_body
+
+        def path(route, *args):
+            return lambda size: (reverse(route, args=args), {})
+
+        def body(route, data, *args):
+            return lambda size: (reverse(route, args=args), json_body(data(size)))
+
+        def reset_confirm(size):
+            return reverse("user:password_reset_confirm"), json_body(
+                {
+                    "uid": urlsafe_base64_encode(force_bytes(self.user.pk)),
+                    "token": default_token_generator.make_token(self.user),
+                    "new_password1": PASSWORD,
+                    "new_password2": PASSWORD,
+                }
+            )
+
+        def todo_import(size):
+            lines = "\n".join(json.dumps(row) for row in self.todo_rows(size))
+            return reverse("todo:todo-import"), {
+                "data": lines,
+                "content_type": "application/x-ndjson",
+            }
+
+        return [
+            Case("get", "todo:api-root", False, path("todo:api-root")),
+            Case("get", "todo:todo-list", False, path("todo:todo-list")),
+            Case(
+                "post",
+                "todo:todo-list",
+                False,
+                body("todo:todo-list", lambda size: self.todo_rows(1)[0]),
+            ),
+            Case("get", "todo:todo-detail", False, path("todo:todo-detail", todo_id)),
+            Case(
+                "patch",
+                "todo:todo-detail",
+                False,
+                lambda size: (todo_url, json_body({"title": "Updated"})),
+            ),
+            Case(
+                "put",
+                "todo:todo-detail",
+                False,
+                lambda size: (todo_url, json_body({"title": "Put", "completed": True})),
+            ),
+            Case(
+                "delete", "todo:todo-detail", False, path("todo:todo-detail", todo_id)
+            ),
+            Case(
+                "patch",
+                "todo:todo-move",
+                False,
+                body(
+                    "todo:todo-move",
+                    lambda size: {
+                        "after": self.todo_ids[1],
+                        "before": self.todo_ids[2],
+                    },
+                    todo_id,
+                ),
+            ),
+            Case(
+                "post",
+                "todo:todo-batch_create",
+                True,
+                body(
+                    "todo:todo-batch_create",
+                    lambda size: {"create_list": self.todo_rows(size)},
+                ),
+            ),
+            Case(
+                "patch",
+                "todo:todo-batch_update",
+                True,
+                body(
+                    "todo:todo-batch_update",
+                    lambda size: {
+                        "update_list": [
+                            {"id": id, "title": "Updated", "completed": True}
+                            for id in self.create_todos(size)
+                        ]
+                    },
+                ),
+            ),
+            Case(
+                "patch",
+                "todo:todo-batch_update_ordering",
+                True,
+                body(
+                    "todo:todo-batch_update_ordering",
+                    lambda size: {
+                        "ordering_list": [
+                            {"id": id, "ordering": size - i}
+                            for i, id in enumerate(self.create_todos(size))
+                        ]
+                    },
+                ),
+            ),
+            Case(
+                "delete",
+                "todo:todo-batch_delete",
+                True,
+                body(
+                    "todo:todo-batch_delete",
+                    lambda size: {"delete_list": self.create_todos(size)},
+                ),
+            ),
+            Case("post", "todo:todo-import", True, todo_import),
+            Case("get", "todo:task-list", False, path("todo:task-list")),
+            Case(
+                "post",
+                "todo:task-list",
+                False,
+                body(
+                    "todo:task-list",
+                    lambda size: {
+                        "task": "Task",
+                        "completed": False,
+                        "todo_id": todo_id,
+                    },
+                ),
+            ),
+            Case("get", "todo:task-detail", False, path("todo:task-detail", task_id)),
+            Case(
+                "patch",
+                "todo:task-detail",
+                False,
+                lambda size: (task_url, json_body({"completed": True})),
+            ),
+            Case(
+                "delete", "todo:task-detail", False, path("todo:task-detail", task_id)
+            ),
+            Case(
+                "patch",
+                "todo:task-move",
+                False,
+                body(
+                    "todo:task-move",
+                    lambda size: {
+                        "after": self.task_ids[1],
+                        "before": self.task_ids[2],
+                    },
+                    task_id,
+                ),
+            ),
+            Case(
+                "post",
+                "todo:task-batch_create",
+                True,
+                body(
+                    "todo:task-batch_create",
+                    lambda size: {
+                        "create_list": [
+                            {
+                                "task": f"Task {i}",
+                                "completed": False,
+                                "todo_id": self.todo_ids[i % len(self.todo_ids)],
+                                "todo_last_added": timezone.now().isoformat(),
+                            }
+                            for i in range(size)
+                        ]
+                    },
+                ),
+            ),
+            Case(
+                "patch",
+                "todo:task-batch_update",
+                True,
+                body(
+                    "todo:task-batch_update",
+                    lambda size: {
+                        "update_list": [
+                            {"id": id, "task": "Updated", "completed": True}
+                            for id in self.create_tasks(size)
+                        ]
+                    },
+                ),
+            ),
+            Case(
+                "patch",
+                "todo:task-batch_update_ordering",
+                True,
+                body(
+                    "todo:task-batch_update_ordering",
+                    lambda size: {
+                        "ordering_list": [
+                            {"id": id, "ordering": size - i}
+                            for i, id in enumerate(self.create_tasks(size))
+                        ]
+                    },
+                ),
+            ),
+            Case(
+                "delete",
+                "todo:task-batch_delete",
+                True,
+                body(
+                    "todo:task-batch_delete",
+                    lambda size: {"delete_list": self.create_tasks(size)},
+                ),
+            ),
+            Case("get", "todo:sync", False, path("todo:sync")),
+            Case("get", "todo:export", False, path("todo:export")),
+            Case(
+                "post",
+                "user:create",
+                False,
+                body(
+                    "user:create",
+                    lambda size: {
+                        "email": "benchmark-new@example.com",
+                        "password": PASSWORD,
+                        "password2": PASSWORD,
+                        "first_name": "New",
+                        "last_name": "User",
+                    },
+                ),
+            ),
+            Case(
+                "post",
+                "user:token",
+                False,
+                body(
+                    "user:token",
+                    lambda size: {
+                        "email": self.user.email,
+                        "password": PASSWORD,
+                    },
+                ),
+            ),
+            Case("get", "user:me", False, path("user:me")),
+            Case(
+                "put",
+                "user:change_password",
+                False,
+                body(
+                    "user:change_password",
+                    lambda size: {
+                        "old_password": PASSWORD,
+                        "password": f"{PASSWORD}new",
+                        "password2": f"{PASSWORD}new",
+                    },
+                ),
+            ),
+            Case(
+                "put",
+                "user:update_info",
+                False,
+                body(
+                    "user:update_info",
+                    lambda size: {
+                        "email": self.user.email,
+                        "first_name": "Updated",
+                        "last_name": "User",
+                    },
+                ),
+            ),
+            Case(
+                "post",
+                "user:password_reset",
+                False,
+                body("user:password_reset", lambda size: {"email": self.user.email}),
+            ),
+            Case("post", "user:password_reset_confirm", False, reset_confirm),
+        ]
+
+    # measuring
+
+    def request(self, case, size):
+        """
+        Run the request of the case in a transaction rolled back afterwards,
+        returning the response, its duration and the query stats
+        """
+        with transaction.atomic():
+            path, kwargs = case.prepare(size)
+            stats = QueryStats()
+            with connection.execute_wrapper(stats):
+                start = time.perf_counter()
+                response = getattr(self.client, case.method)(path, **kwargs)
+                if response.streaming:
+                    for _ in response.streaming_content:
+                        pass
+                duration = time.perf_counter() - start
+            transaction.set_rollback(True)
+        return response, duration, stats
+
+    def measure(self, case, size, iterations):
+        latencies, statuses = [], set()
+        for _ in range(iterations):
+            response, duration, stats = self.request(case, size)
+            latencies.append(duration)
+            statuses.add(response.status_code)
+
+        tracemalloc.start()
+        try:
+            self.request(case, size)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        return {
+            "method": case.method.upper(),
+            "route": case.route,
+            "size": size,
+            "statuses": sorted(statuses),
+            "p50_ms": milliseconds(percentile(latencies, 50)),
+            "p95_ms": milliseconds(percentile(latencies, 95)),
+            "p99_ms": milliseconds(percentile(latencies, 99)),
+            "queries": stats.count,
+            "query_ms": milliseconds(stats.total),
+            "peak_memory_kb": round(peak / 1024, 1),
+        }
+
+    def uncovered_routes(self, cases):
+        resolver = get_resolver()
+        routes = set()
+        for namespace in ["todo", "user"]:
+            sub_resolver = resolver.namespace_dict[namespace][1]
+            routes.update(
+                f"{namespace}:{name}"
+                for name in sub_resolver.reverse_dict
+                if isinstance(name, str)
+            )
+        return sorted(routes - {case.route for case in cases})
+
+    def run(self, options):
+        sizes = [int(size) for size in options["batch_sizes"].split(",") if size]
+
+        self.user = seed_users(
+            1, options["todos"], options["tasks"], PASSWORD, prefix="benchmark"
+        )[0]
+        self.todo_ids = list(
+            Todo.objects.filter(user=self.user)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        self.task_ids = list(
+            Task.objects.filter(todo_id=self.todo_ids[0])
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        if len(self.todo_ids) < 3 or len(self.task_ids) < 3:
+            raise CommandError("--todos and --tasks must be at least 3")
+        token = Token.objects.create(user=self.user)
+        # failing routes are reported with their status instead of stopping
+        self.client = Client(
+            raise_request_exception=False, HTTP_AUTHORIZATION=f"Token {token.key}"
+        )
+
+        cases = self.get_cases()
+        for route in self.uncovered_routes(cases):
+            self.stderr.write(f"No benchmark for {route}")
+        if options["route"]:
+            cases = [case for case in cases if case.route in options["route"]]
+
+        results = {}
+        for case in cases:
+            if case.batched:
+                runs = [(size, options["batch_iterations"]) for size in sizes]
+            else:
+                runs = [(None, options["iterations"])]
+            for size, iterations in runs:
+                result = self.measure(case, size, iterations)
+                key = f"{result['method']} {case.route}"
+                if size is not None:
+                    key += f" [{size}]"
+                results[key] = result
+                self.stdout.write(
+                    f"{key}: p50 {result['p50_ms']}ms, p95 {result['p95_ms']}ms, "
+                    f"p99 {result['p99_ms']}ms, {result['queries']} queries, "
+                    f"{result['peak_memory_kb']}KB, status {result['statuses']}"
+                )
+        return results
+
+    def compare(self, base_file, new_file, threshold):
+        with open(base_file) as f:
+            base = json.load(f)["results"]
+        with open(new_file) as f:
+            new = json.load(f)["results"]
+
+        regressions = []
+        for key in sorted(base.keys() & new.keys()):
+            old, current = base[key], new[key]
+            change = (current["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100
+            line = (
+                f"{key}: p95 {old['p95_ms']}ms -> {current['p95_ms']}ms "
+                f"({change:+.1f}%), queries {old['queries']} -> {current['queries']}"
+            )
+            if change > threshold or current["queries"] > old["queries"]:
+                regressions.append(key)
+                line = self.style.ERROR(line)
+            self.stdout.write(line)
+
+        for key in sorted(base.keys() - new.keys()):
+            self.stdout.write(f"{key}: missing from {new_file}")
+        for key in sorted(new.keys() - base.keys()):
+            self.stdout.write(f"{key}: new in {new_file}")
+
+        if regressions:
+            raise CommandError(f"{len(regressions)} regressions found")
+        self.stdout.write(self.style.SUCCESS("No regressions!"))
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        if options["compare"]:
+            return self.compare(*options["compare"], options["threshold"])
+
+        with override_settings(
+            ALLOWED_HOSTS=["testserver"],
+            EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+        ):
+            with transaction.atomic():
+                results = self.run(options)
+                # the benchmark leaves no data behind
+                transaction.set_rollback(True)
+
+        with open(options["output"], "w") as f:
+            json.dump(
+                {"created": timezone.now().isoformat(), "results": results},
+                f,
+                indent=2,
+            )
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
@@ -0,0 +1,117 @@
+"""
+Django command to compare the stdlib JSON renderer and parser with the
+orjson ones on list responses and batch request bodies.
+"""
+import io
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.serializers import DateTimeField
+
+from core.benchmark import measure, milliseconds
+from core.parsers import ORJSONParser
+from core.renderers import ORJSONRenderer
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the JSON renderers and parsers."""
+
+    help = (
+        "Render todo lists and parse batch create bodies of the given sizes "
+        "with the stdlib and the orjson renderer and parser, printing the "
+        "p50/p95 time of both"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="100,1000,10000",
+            help="Comma separated numbers of todos in the payloads",
+        )
+        parser.add_argument("--tasks", type=int, default=5, help="Per todo")
+        parser.add_argument("--iterations", type=int, default=20)
+
+    def todo_list(self, size, tasks):
+        """
+        A list response as given by the todo serializer
+        """
+        last_added = DateTimeField().to_representation(timezone.now())
+        return [
+            {
+                "id": i,
+                "title": f"Todo {i}",
+                "tasks": [
+                    {
+                        "id": i * tasks + j,
+                        "task": f"Task {j}",
+                        "completed": j % 2 == 0,
+                        "ordering": j,
+                        "rank": None,
+                    }
+                    for j in range(tasks)
+                ],
+                "last_added": last_added,
+                "completed": False,
+                "ordering": i,
+                "rank": "i",
+            }
+            for i in range(size)
+        ]
+
+    def batch_body(self, size, tasks):
+        """
+        A batch create request body
+        """
+        data = {
+            "create_list": [
+                {
+                    "title": f"Todo {i}",
+                    "completed": False,
+                    "tasks": [
+                        {"task": f"Task {j}", "completed": False} for j in range(tasks)
+                    ],
+                }
+                for i in range(size)
+            ]
+        }
+        return JSONRenderer().render(data)
+
+    def report(self, name, stdlib, fast, iterations):
+        stdlib_timings = measure(stdlib, iterations)
+        fast_timings = measure(fast, iterations)
+        speedup = stdlib_timings[0] / fast_timings[0]
+        self.stdout.write(
+            f"{name}: stdlib p50 {milliseconds(stdlib_timings[0])}ms "
+            f"p95 {milliseconds(stdlib_timings[1])}ms, orjson p50 "
+            f"{milliseconds(fast_timings[0])}ms "
+            f"p95 {milliseconds(fast_timings[1])}ms, {speedup:.1f}x"
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        try:
+            sizes = [int(size) for size in options["sizes"].split(",")]
+        except ValueError:
+            raise CommandError("--sizes must be a comma separated list of numbers")
+        if options["iterations"] < 1:
+            raise CommandError("--iterations must be positive")
+
+        iterations = options["iterations"]
+        for size in sizes:
+            data = self.todo_list(size, options["tasks"])
+            self.report(
+                f"render list {size}",
+                lambda: JSONRenderer().render(data),
+                lambda: ORJSONRenderer().render(data),
+                iterations,
+            )
+
+            body = self.batch_body(size, options["tasks"])
+            self.report(
+                f"parse batch {size}",
+                lambda: JSONParser().parse(io.BytesIO(body)),
+                lambda: ORJSONParser().parse(io.BytesIO(body)),
+                iterations,
+            )
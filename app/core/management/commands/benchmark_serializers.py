@@ -0,0 +1,81 @@
+"""
+Django command to compare the model serializers of todos and tasks with the
+values serializers used by the list and retrieve routes.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Prefetch
+
+from core.benchmark import measure, milliseconds
+from core.models import Todo, Task
+from core.seed import seed_users
+from todo.serializers import (
+    TodoSerializer,
+    TaskSerializer,
+    TodoValuesSerializer,
+    TaskValuesSerializer,
+)
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the read serializers."""
+
+    help = (
+        "Read and serialize the todos and tasks of a seeded user with the model "
+        "serializers and with the values serializers, printing the p50/p95 "
+        "time of both. The seeded data is rolled back afterwards"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--todos", type=int, default=1000)
+        parser.add_argument("--tasks", type=int, default=5, help="Per todo")
+        parser.add_argument("--iterations", type=int, default=20)
+
+    def get_cases(self, user):
+        todos = Todo.objects.filter(user=user).order_by("-id")
+        tasks = Task.objects.filter(todo__user=user).order_by("id")
+        return {
+            "todos": (
+                lambda: TodoSerializer(
+                    todos.prefetch_related(
+                        Prefetch(
+                            "tasks", queryset=Task.objects.order_by("ordering", "id")
+                        )
+                    ),
+                    many=True,
+                ).data,
+                lambda: TodoValuesSerializer(
+                    TodoValuesSerializer.get_values_queryset(todos), many=True
+                ).data,
+            ),
+            "tasks": (
+                lambda: TaskSerializer(tasks.select_related("todo"), many=True).data,
+                lambda: TaskValuesSerializer(
+                    TaskValuesSerializer.get_values_queryset(tasks), many=True
+                ).data,
+            ),
+        }
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        if min(options["todos"], options["tasks"]) < 0:
+            raise CommandError("Counts cannot be negative")
+        if options["iterations"] < 1:
+            raise CommandError("--iterations must be positive")
+
+        with transaction.atomic():
+            (user,) = seed_users(
+                1, options["todos"], options["tasks"], "", prefix="serializers"
+            )
+            for name, (model, values) in self.get_cases(user).items():
+                model_timings = measure(model, options["iterations"])
+                values_timings = measure(values, options["iterations"])
+                speedup = model_timings[0] / values_timings[0]
+                self.stdout.write(
+                    f"{name}: model p50 {milliseconds(model_timings[0])}ms "
+                    f"p95 {milliseconds(model_timings[1])}ms, values p50 "
+                    f"{milliseconds(values_timings[0])}ms "
+                    f"p95 {milliseconds(values_timings[1])}ms, {speedup:.1f}x"
+                )
+            # the benchmark leaves no data behind
+            transaction.set_rollback(True)
@@ -0,0 +1,42 @@
+"""
+Django command to rebalance the rank keys that grew too long.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models.functions import Length
+
+from core.models import Todo, Task
+from core.ranks import rebalance_ranks
+
+
+class Command(BaseCommand):
+    """Django command to rebalance long rank keys."""
+
+    help = "Rebalance the ranks of todos and tasks whose rank keys grew too long"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--length",
+            type=int,
+            default=settings.RANK_REBALANCE_LENGTH,
+            help="Rebalance the siblings of any item with a longer rank",
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        for model, parent_field in [(Todo, "user_id"), (Task, "todo_id")]:
+            parent_ids = (
+                model.objects.annotate(rank_length=Length("rank"))
+                .filter(rank_length__gt=options["length"])
+                .values_list(parent_field, flat=True)
+                .distinct()
+            )
+            count = 0
+            for parent_id in parent_ids:
+                rebalance_ranks(model, parent_field, parent_id)
+                count += 1
+            self.stdout.write(
+                f"Rebalanced {model._meta.verbose_name} ranks of {count} parents"
+            )
+
+        self.stdout.write(self.style.SUCCESS("Ranks rebalanced!"))
@@ -0,0 +1,47 @@
+"""
+Django command to seed the database with synthetic users, todos and tasks.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.seed import seed_users
+
+
+class Command(BaseCommand):
+    """Django command to seed synthetic data."""
+
+    help = "Create users with todos and tasks using bulk inserts"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10)
+        parser.add_argument("--todos", type=int, default=100, help="Per user")
+        parser.add_argument("--tasks", type=int, default=5, help="Per todo")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--password", default="Seeduser123")
+        parser.add_argument(
+            "--prefix", default="seed", help="Users get <prefix>-<n>@example.com"
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        if min(options["users"], options["todos"], options["tasks"]) < 0:
+            raise CommandError("Counts cannot be negative")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive")
+
+        with transaction.atomic():
+            users = seed_users(
+                options["users"],
+                options["todos"],
+                options["tasks"],
+                options["password"],
+                prefix=options["prefix"],
+                batch_size=options["batch_size"],
+            )
+
+        todos = len(users) * options["todos"]
+        self.stdout.write(
+            f"Created {len(users)} users, {todos} todos and "
+            f"{todos * options['tasks']} tasks"
+        )
+        self.stdout.write(self.style.SUCCESS("Data seeded!"))
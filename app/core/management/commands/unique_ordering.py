@@ -0,0 +1,42 @@
+"""
+Django command to add or drop the unique constraints on the orderings.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.constraints import (
+    add_ordering_constraints,
+    drop_ordering_constraints,
+    find_duplicate_orderings,
+)
+
+
+class Command(BaseCommand):
+    """Django command to manage the unique ordering constraints."""
+
+    help = (
+        "Add the deferred unique constraints on the orderings of the todos of a "
+        "user and the tasks of a todo, or drop them with --drop. Fails listing "
+        "the duplicates when orderings are already used twice"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--drop", action="store_true")
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        if options["drop"]:
+            drop_ordering_constraints(connection)
+            self.stdout.write(
+                self.style.SUCCESS("Unique ordering constraints dropped!")
+            )
+            return
+
+        with transaction.atomic():
+            try:
+                add_ordering_constraints(connection)
+            except ValueError:
+                for name, count in find_duplicate_orderings(connection).items():
+                    self.stdout.write(f"{name}: {count} duplicated orderings")
+                raise CommandError("Fix the duplicated orderings first")
+        self.stdout.write(self.style.SUCCESS("Unique ordering constraints added!"))
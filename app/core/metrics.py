@@ -0,0 +1,94 @@
+"""
+Prometheus metrics of the API. When PROMETHEUS_MULTIPROC_DIR is set every
+worker process writes its values to memory mapped files in that directory
+and the metrics endpoint aggregates the files of all the workers
+"""
+import os
+
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+)
+
+REQUESTS = Counter(
+    "api_requests_total",
+    "Requests handled by route, method and status",
+    ["route", "method", "status"],
+)
+REQUEST_LATENCY = Histogram(
+    "api_request_duration_seconds",
+    "Request duration by route and method",
+    ["route", "method"],
+)
+REQUEST_QUERIES = Histogram(
+    "api_request_db_queries",
+    "SQL statements run by a request by route and method",
+    ["route", "method"],
+    buckets=[0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100, 250, 1000],
+)
+REQUEST_QUERY_DURATION = Histogram(
+    "api_request_db_duration_seconds",
+    "Time a request spent running SQL statements by route and method",
+    ["route", "method"],
+)
+IN_FLIGHT = Gauge(
+    "api_requests_in_flight",
+    "Requests being handled",
+    multiprocess_mode="livesum",
+)
+AUTH_CACHE = Counter(
+    "api_auth_token_cache_total",
+    "Token cache lookups by result, hit or miss",
+    ["result"],
+)
+
+DB_POOL_WAIT = Histogram(
+    "api_db_pool_wait_seconds",
+    "Time spent waiting for a connection from the database pool",
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10],
+)
+DB_POOL_TIMEOUTS = Counter(
+    "api_db_pool_timeouts_total",
+    "Waits for a connection from the database pool that timed out",
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "api_db_pool_connections",
+    "Connections of the database pool by state, idle or in_use",
+    ["state"],
+    multiprocess_mode="livesum",
+)
+
+
+def observe_request(route, method, status, duration, stats):
+    route = route or "unmatched"
+    REQUESTS.labels(route, method, status).inc()
+    REQUEST_LATENCY.labels(route, method).observe(duration)
+    REQUEST_QUERIES.labels(route, method).observe(stats.count)
+    REQUEST_QUERY_DURATION.labels(route, method).observe(stats.total)
+
+
+def mark_process_dead(pid):
+    """
+    Drop the live gauge values of a worker process that exited, called by
+    the servers' worker exit hooks
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(pid)
+
+
+def render_metrics():
+    """
+    Return the metrics in the Prometheus text format, aggregated across
+    the worker processes when running with several of them
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry)
@@ -0,0 +1,199 @@
+"""
+Middleware for the API
+"""
+import json
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.db import connections
+
+from core.metrics import IN_FLIGHT, observe_request
+
+logger = logging.getLogger("core.requests")
+
+
+async def pull_chunks(content):
+    """
+    Iterate a sync iterator from async code, running it a chunk at a time on
+    the thread the request's sync code runs on
+    """
+    content = iter(content)
+    next_chunk = sync_to_async(next)
+    while (chunk := await next_chunk(content, None)) is not None:
+        yield chunk
+
+
+class AsyncStreamingMiddleware:
+    """
+    Middleware giving streamed responses served under ASGI an async iterator
+    over their content. Django reads the whole of a sync iterator into a list
+    before sending it to an ASGI server, keeping the body in memory
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if response.streaming and not response.is_async:
+            response.streaming_content = pull_chunks(response.streaming_content)
+        return response
+
+
+class QueryStats:
+    """
+    Execute wrapper counting and timing the SQL statements of a request
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.count += 1
+            self.total += duration
+            self.slowest = max(self.slowest, duration)
+
+
+class QueryTimingMiddleware:
+    """
+    Middleware reporting the number of SQL statements a request ran with
+    their total and slowest durations in a `Server-Timing` header and a log
+    record tagged with the route and the viewset action. The request and its
+    queries are recorded in the Prometheus metrics.
+    Under ASGI the queries run on the thread the request's sync code and async
+    ORM calls share, so the execute wrapper is installed on that thread
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def track_queries(self, stats):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(stats))
+        return stack
+
+    def get_tags(self, request):
+        match = request.resolver_match
+        if match is None:
+            return None, None
+        actions = getattr(match.func, "actions", None) or {}
+        return match.view_name, actions.get(request.method.lower())
+
+    def log(self, request, response, stats, duration):
+        route, action = self.get_tags(request)
+        observe_request(route, request.method, response.status_code, duration, stats)
+
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        logger.info(
+            json.dumps(
+                {
+                    "method": request.method,
+                    "path": request.path,
+                    "route": route,
+                    "action": action,
+                    "status": response.status_code,
+                    "duration_ms": round(duration * 1000, 2),
+                    "queries": stats.count,
+                    "query_ms": round(stats.total * 1000, 2),
+                    "slowest_query_ms": round(stats.slowest * 1000, 2),
+                }
+            )
+        )
+
+    def stream(self, request, response, content, stats, start):
+        """
+        Keep tracking the queries run while a streamed response is consumed
+        and log the request once it is complete
+        """
+        content = iter(content)
+        while True:
+            with self.track_queries(stats):
+                chunk = next(content, None)
+            if chunk is None:
+                break
+            yield chunk
+        self.log(request, response, stats, time.perf_counter() - start)
+
+    async def astream(self, request, response, content, stats, start):
+        """
+        Same as `stream` for the async content of responses served under ASGI
+        """
+        queries = await sync_to_async(self.track_queries)(stats)
+        try:
+            async for chunk in content:
+                yield chunk
+        finally:
+            await sync_to_async(queries.close)()
+        self.log(request, response, stats, time.perf_counter() - start)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        stats = QueryStats()
+        request.query_stats = stats
+        start = time.perf_counter()
+
+        with IN_FLIGHT.track_inprogress(), self.track_queries(stats):
+            response = self.get_response(request)
+        return self.finish(request, response, stats, start)
+
+    async def __acall__(self, request):
+        stats = QueryStats()
+        request.query_stats = stats
+        start = time.perf_counter()
+
+        with IN_FLIGHT.track_inprogress():
+            queries = await sync_to_async(self.track_queries)(stats)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(queries.close)()
+        return self.finish(request, response, stats, start)
+
+    def finish(self, request, response, stats, start):
+        duration = time.perf_counter() - start
+
+        response["Server-Timing"] = (
+            f'db;dur={stats.total * 1000:.2f};desc="{stats.count} queries", '
+            f"db-slowest;dur={stats.slowest * 1000:.2f}, "
+            f"total;dur={duration * 1000:.2f}"
+        )
+
+        if response.streaming and response.is_async:
+            response.streaming_content = self.astream(
+                request, response, response.streaming_content, stats, start
+            )
+        elif response.streaming:
+            response.streaming_content = self.stream(
+                request, response, response.streaming_content, stats, start
+            )
+        else:
+            self.log(request, response, stats, duration)
+        return response
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.5 on 2026-10-17 04:36
+
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def highest_ordering(model, parent_field):
+    """
+    Return a subquery of the highest ordering among the children of a parent
+    """
+    return Subquery(
+        model.objects.filter(**{parent_field: OuterRef("pk")})
+        .values(parent_field)
+        .annotate(highest=Max("ordering"))
+        .values("highest")
+    )
+
+
+def backfill_next_ordering(apps, schema_editor):
+    """
+    Start every counter right after the highest ordering already in use
+    """
+    User = apps.get_model("core", "User")
+    Todo = apps.get_model("core", "Todo")
+    Task = apps.get_model("core", "Task")
+
+    User.objects.update(
+        next_ordering=Coalesce(highest_ordering(Todo, "user"), Value(0)) + 1
+    )
+    Todo.objects.update(
+        next_ordering=Coalesce(highest_ordering(Task, "todo"), Value(0)) + 1
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0013_alter_todo_last_added_alter_todo_title"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="todo",
+            name="next_ordering",
+            field=models.IntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="next_ordering",
+            field=models.IntegerField(default=1),
+        ),
+        migrations.RunPython(backfill_next_ordering, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.5 on 2026-10-17 04:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0014_ordering_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="task",
+            name="rank",
+            field=models.CharField(
+                blank=True, db_collation="C", max_length=255, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="todo",
+            name="rank",
+            field=models.CharField(
+                blank=True, db_collation="C", max_length=255, null=True
+            ),
+        ),
+    ]
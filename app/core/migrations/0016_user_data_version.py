@@ -0,0 +1,17 @@
+# Generated by Django 4.2.5 on 2026-10-17 04:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0015_todo_rank_task_rank"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="data_version",
+            field=models.IntegerField(default=0),
+        ),
+    ]
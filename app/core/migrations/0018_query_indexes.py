@@ -0,0 +1,52 @@
+# Generated by Django 4.2.5 on 2026-10-17 05:22
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0017_sync_updated_at_tombstone"),
+    ]
+
+    operations = [
+        # the composite indexes replace the foreign key indexes
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["todo", "ordering", "id"], name="task_todo_ordering_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="todo",
+            index=models.Index(
+                fields=["user", "id"], include=("last_added",), name="todo_user_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="todo",
+            index=models.Index(
+                fields=["user", "ordering", "id"], name="todo_user_ordering_idx"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="task",
+            name="todo",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="tasks",
+                to="core.todo",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="todo",
+            name="user",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+    ]
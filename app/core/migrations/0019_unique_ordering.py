@@ -0,0 +1,28 @@
+# Generated by Django 4.2.5 on 2026-10-17 05:30
+
+from django.conf import settings
+from django.db import migrations
+
+from core.constraints import add_ordering_constraints, drop_ordering_constraints
+
+
+def add_constraints(apps, schema_editor):
+    """
+    Add the unique ordering constraints when the UNIQUE_ORDERING setting is on
+    """
+    if settings.UNIQUE_ORDERING:
+        add_ordering_constraints(schema_editor.connection)
+
+
+def drop_constraints(apps, schema_editor):
+    drop_ordering_constraints(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0018_query_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_constraints, drop_constraints),
+    ]
@@ -3,8 +3,8 @@ Database Models
 """
 import json
 from datetime import datetime
-from django.db import models
-from django.db.models import Max
+from django.db import models, connections
+from django.db.models import F
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
@@ -17,11 +17,116 @@ from datetime import datetime
 
 
 # Create your models here.
-class UserManager(BaseUserManager):
+class OrderingCounterManagerMixin:
+    """
+    Mixin for managers of models holding a `next_ordering` counter for their
+    children, allocating orderings with one statement that locks the parent row
+    """
+
+    def reserve_orderings(self, pk, count=1):
+        """
+        Reserve `count` consecutive orderings for the children of the object
+        with the given pk and return the first one
+        """
+        connection = connections[self.db]
+        table = connection.ops.quote_name(self.model._meta.db_table)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET next_ordering = next_ordering + %s "
+                "WHERE id = %s RETURNING next_ordering - %s",
+                [count, pk, count],
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    def reserve_orderings_in_bulk(self, counts):
+        """
+        Reserve orderings for the children of many objects with one statement,
+        takes a mapping of pk to the number of orderings to reserve and
+        returns a mapping of pk to the first one. Unknown pks are left out
+        """
+        if not counts:
+            return {}
+
+        connection = connections[self.db]
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        values = ", ".join(["(%s::bigint, %s::integer)"] * len(counts))
+        params = [value for item in counts.items() for value in item]
+
+        with connection.cursor() as cursor:
+            # lock the rows in id order so concurrent batches cannot deadlock
+            cursor.execute(
+                f"WITH v(id, count) AS (VALUES {values}), "
+                f"locked AS (SELECT {table}.id FROM {table} JOIN v ON {table}.id = v.id "
+                f"ORDER BY {table}.id FOR UPDATE OF {table}) "
+                f"UPDATE {table} SET next_ordering = {table}.next_ordering + v.count "
+                f"FROM v JOIN locked ON locked.id = v.id WHERE {table}.id = v.id "
+                f"RETURNING {table}.id, {table}.next_ordering - v.count",
+                params,
+            )
+            return dict(cursor.fetchall())
+
+    def raise_orderings(self, highest_orderings):
+        """
+        Move the counters past explicitly assigned orderings, takes a mapping
+        of pk to the highest ordering assigned to the object's children
+        """
+        if not highest_orderings:
+            return
+
+        connection = connections[self.db]
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        values = ", ".join(["(%s::bigint, %s::integer)"] * len(highest_orderings))
+        params = [value for item in highest_orderings.items() for value in item]
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET next_ordering = GREATEST(next_ordering, v.ordering + 1) "
+                f"FROM (VALUES {values}) AS v(id, ordering) WHERE {table}.id = v.id",
+                params,
+            )
+
+
+class DatabaseCountersMixin:
+    """
+    Mixin for models holding counters that are only ever moved in the database
+    with F() expressions. Saving an existing row leaves them out, the instance
+    may hold values loaded before other requests moved them
+    """
+
+    database_counters = ["next_ordering"]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname not in deferred
+                and field.name not in self.database_counters
+            ]
+        super().save(*args, **kwargs)
+
+
+class UserManager(OrderingCounterManagerMixin, BaseUserManager):
     """
     Manager for users
     """
 
+    def bump_data_version(self, **filters):
+        """
+        Mark the todos and tasks of the matching users as changed
+        """
+        return self.filter(**filters).update(data_version=F("data_version") + 1)
+
+    def get_data_version(self, pk):
+        return self.filter(pk=pk).values_list("data_version", flat=True).first()
+
+    async def aget_data_version(self, pk):
+        return await self.filter(pk=pk).values_list("data_version", flat=True).afirst()
+
     def create_user(self, email, password=None, **extra_fields):
         """
         Create and return a new User without privileges
@@ -45,7 +150,7 @@ class UserManager(BaseUserManager):
         return user
 
 
-class User(AbstractBaseUser, PermissionsMixin):
+class User(DatabaseCountersMixin, AbstractBaseUser, PermissionsMixin):
     """
     User Model
     """
@@ -55,6 +160,10 @@ class User(AbstractBaseUser, PermissionsMixin):
     last_name = models.CharField(max_length=100)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    next_ordering = models.IntegerField(default=1)  # ordering of the next todo
+    data_version = models.IntegerField(default=0)  # bumped on todo/task writes
+
+    database_counters = ["next_ordering", "data_version"]
 
     objects = UserManager()
 
@@ -65,18 +174,44 @@ class User(AbstractBaseUser, PermissionsMixin):
         return f"{self.first_name} {self.last_name}"
 
 
-class Todo(models.Model):
+class TodoManager(OrderingCounterManagerMixin, models.Manager):
+    """
+    Manager for todos
+    """
+
+
+class Todo(DatabaseCountersMixin, models.Model):
     """
     Todo Object
     """
 
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    # indexed by the composite indexes starting with the user
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, db_index=False
+    )
     title = models.CharField(default="", max_length=255, null=True, blank=True)
     last_added = models.DateTimeField(
         default=timezone.now, null=True, blank=True
     )  # auto_now=True
     completed = models.BooleanField(default=False)
     ordering = models.IntegerField(null=True, blank=True)
+    rank = models.CharField(max_length=255, null=True, blank=True, db_collation="C")
+    next_ordering = models.IntegerField(default=1)  # ordering of the next task
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = TodoManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "updated_at"]),
+            # the todo list by id, covering the todos joined to the task list
+            models.Index(
+                fields=["user", "id"], include=["last_added"], name="todo_user_id_idx"
+            ),
+            models.Index(
+                fields=["user", "ordering", "id"], name="todo_user_ordering_idx"
+            ),
+        ]
 
     @property
     def update_last_added(self):
@@ -84,16 +219,7 @@ class Todo(models.Model):
 
     @property
     def increment_ordering(self):
-        user_todos = Todo.objects.filter(user=self.user)
-        user_todos_count = user_todos.count()
-
-        if user_todos_count == 0:
-            self.ordering = 1
-            # self.save()
-        elif user_todos_count > 0:
-            highest_ordering = user_todos.aggregate(Max("ordering"))
-            self.ordering = highest_ordering["ordering__max"] + 1
-            # self.save()
+        self.ordering = User.objects.reserve_orderings(self.user_id)
 
     def save(self, *args, **kwargs):
         # if not self.last_added:
@@ -111,26 +237,65 @@ class Task(models.Model):
     Task Object
     """
 
-    todo = models.ForeignKey(Todo, on_delete=models.CASCADE, related_name="tasks")
+    # indexed by the composite indexes starting with the todo
+    todo = models.ForeignKey(
+        Todo, on_delete=models.CASCADE, related_name="tasks", db_index=False
+    )
     task = models.CharField(max_length=1000, null=True, blank=True)
     completed = models.BooleanField(default=False)
     ordering = models.IntegerField(null=True, blank=True)
+    rank = models.CharField(max_length=255, null=True, blank=True, db_collation="C")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["todo", "updated_at"]),
+            models.Index(
+                fields=["todo", "ordering", "id"], name="task_todo_ordering_idx"
+            ),
+        ]
 
     @property
     def increment_ordering(self):
-        todo_tasks = Task.objects.filter(todo=self.todo)
-        todo_tasks_count = todo_tasks.count()
-        if todo_tasks_count == 0:
-            self.ordering = 1
-            # self.save()
-        elif todo_tasks_count > 0:
-            highest_ordering = todo_tasks.aggregate(Max("ordering"))
-            self.ordering = highest_ordering["ordering__max"] + 1
-            # self.save()
+        self.ordering = Todo.objects.reserve_orderings(self.todo_id)
 
     def save(self, *args, **kwargs):
-        self.increment_ordering
+        if self.ordering is None:
+            self.increment_ordering
         super(Task, self).save(*args, **kwargs)
 
     def __str__(self):
         return self.task
+
+
+class TombstoneManager(models.Manager):
+    """
+    Manager for tombstones
+    """
+
+    def record(self, user, model_name, ids):
+        """
+        Record the deletion of the user's todos or tasks with the given ids
+        """
+        return self.bulk_create(
+            [self.model(user=user, model_name=model_name, object_id=id) for id in ids]
+        )
+
+
+class Tombstone(models.Model):
+    """
+    Record of a deleted todo or task, tasks of a deleted todo are not recorded
+    """
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    model_name = models.CharField(max_length=10)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    objects = TombstoneManager()
+
+    class Meta:
+        indexes = [models.Index(fields=["user", "deleted_at"])]
+
+    def __str__(self):
+        return f"{self.model_name} {self.object_id}"
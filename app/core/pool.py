@@ -0,0 +1,124 @@
+"""
+In-process pool of database connections shared by the threads of a process,
+used by the pooled PostgreSQL backend in the ASGI and threaded deployments
+"""
+import threading
+import time
+
+from core.metrics import DB_POOL_CONNECTIONS, DB_POOL_TIMEOUTS, DB_POOL_WAIT
+
+# idle connections given back more recently than this are not health checked
+HEALTH_CHECK_AFTER = 1.0
+
+
+class ConnectionPool:
+    """
+    Pool of at most `max_size` connections. Threads wait up to `timeout`
+    seconds for a connection when all of them are in use. Idle connections
+    older than `max_age` seconds or failing `check` are replaced by new ones
+    """
+
+    def __init__(self, max_size, timeout, max_age=None, check=None):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_age = max_age
+        self.check = check
+        # (connection, created at, released at) with the most recent last
+        self.idle = []
+        self.created_at = {}
+        self.size = 0
+        self.condition = threading.Condition()
+
+    def acquire(self, connect):
+        """
+        Return an idle connection, or a new one made by `connect` while the
+        pool has room. Raises TimeoutError when none frees up in time
+        """
+        start = time.monotonic()
+        with self.condition:
+            while not self.idle and self.size >= self.max_size:
+                remaining = start + self.timeout - time.monotonic()
+                if remaining <= 0:
+                    DB_POOL_WAIT.observe(time.monotonic() - start)
+                    DB_POOL_TIMEOUTS.inc()
+                    raise TimeoutError(
+                        f"No database connection freed up in {self.timeout}s"
+                    )
+                self.condition.wait(remaining)
+
+            if self.idle:
+                connection, created_at, released_at = self.idle.pop()
+            else:
+                connection = None
+                self.size += 1
+            self.update_gauges()
+        DB_POOL_WAIT.observe(time.monotonic() - start)
+
+        if connection is not None and self.is_usable(
+            connection, created_at, released_at
+        ):
+            self.created_at[id(connection)] = created_at
+            return connection
+        if connection is not None:
+            self.close(connection)
+
+        # the slot of the pool is taken, fill it with a new connection
+        try:
+            connection = connect()
+        except BaseException:
+            with self.condition:
+                self.size -= 1
+                self.update_gauges()
+                self.condition.notify()
+            raise
+        self.created_at[id(connection)] = time.monotonic()
+        return connection
+
+    def release(self, connection, reusable=True):
+        """
+        Give back a connection taken from the pool, the connections that
+        cannot be reused are closed
+        """
+        created_at = self.created_at.pop(id(connection))
+        if self.max_age is not None and time.monotonic() - created_at > self.max_age:
+            reusable = False
+
+        with self.condition:
+            if reusable:
+                self.idle.append((connection, created_at, time.monotonic()))
+            else:
+                self.size -= 1
+            self.update_gauges()
+            self.condition.notify()
+        if not reusable:
+            self.close(connection)
+
+    def is_usable(self, connection, created_at, released_at):
+        now = time.monotonic()
+        if self.max_age is not None and now - created_at > self.max_age:
+            return False
+        if self.check is not None and now - released_at > HEALTH_CHECK_AFTER:
+            return self.check(connection)
+        return True
+
+    def close(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def close_idle(self):
+        """
+        Close the idle connections, the ones in use are closed on release
+        """
+        with self.condition:
+            idle, self.idle = self.idle, []
+            self.size -= len(idle)
+            self.update_gauges()
+            self.condition.notify_all()
+        for connection, _, _ in idle:
+            self.close(connection)
+
+    def update_gauges(self):
+        DB_POOL_CONNECTIONS.labels("idle").set(len(self.idle))
+        DB_POOL_CONNECTIONS.labels("in_use").set(self.size - len(self.idle))
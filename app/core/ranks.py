@@ -0,0 +1,117 @@
+"""
+Fractional rank keys used to order todos and tasks. A rank is a string of
+base 36 digits read as the fraction 0.<digits>, so a key between any two
+keys always exists and moving an item only rewrites that item's rank.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import F
+
+from core.bulk import values_update
+from core.response_cache import invalidate_responses
+
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+
+# lookup from the user to the parent of ranked items
+USER_LOOKUPS = {"user_id": "pk", "todo_id": "todo"}
+
+_rebalancer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rank-rebalance")
+
+
+def rank_between(lower=None, upper=None):
+    """
+    Return a rank sorting strictly between `lower` and `upper`, where a
+    missing bound stands for the start or the end of the list
+    """
+    lower = lower or ""
+    if upper is not None and (lower >= upper or upper.endswith(DIGITS[0])):
+        raise ValueError("No rank exists between the given ranks")
+
+    rank = ""
+    for i in range(max(len(lower), len(upper or "")) + 1):
+        low = DIGITS.index(lower[i]) if i < len(lower) else 0
+        high = DIGITS.index(upper[i]) if upper is not None and i < len(upper) else BASE
+
+        if low == high:
+            rank += DIGITS[low]
+            continue
+
+        middle = (low + high) // 2
+        if middle > low:
+            return rank + DIGITS[middle]
+
+        # no digit fits between the two, keep the lower digit and look for
+        # room in the following digits where the upper bound no longer applies
+        rank += DIGITS[low]
+        upper = None
+
+    return rank
+
+
+def spread_ranks(count):
+    """
+    Return `count` evenly spaced ranks using as few digits as possible
+    """
+    width = 1
+    while BASE**width <= count:
+        width += 1
+
+    ranks = []
+    for i in range(1, count + 1):
+        value = i * BASE**width // (count + 1)
+        digits = ""
+        for _ in range(width):
+            value, digit = divmod(value, BASE)
+            digits = DIGITS[digit] + digits
+        ranks.append(digits.rstrip("0"))
+    return ranks
+
+
+def rank_ordering():
+    """
+    The ordering of items by rank, items never ranked go last by their ordering
+    """
+    return [F("rank").asc(nulls_last=True), "ordering", "id"]
+
+
+def rebalance_ranks(model, parent_field, parent_id):
+    """
+    Give every child of the parent a short rank, keeping their current order
+    """
+    ids = list(
+        model.objects.filter(**{parent_field: parent_id})
+        .order_by(*rank_ordering())
+        .values_list("id", flat=True)
+    )
+    rows = [{"id": id, "rank": rank} for id, rank in zip(ids, spread_ranks(len(ids)))]
+    objs = values_update(model, rows, ["rank"])
+    lookup = {USER_LOOKUPS[parent_field]: parent_id}
+    get_user_model().objects.bump_data_version(**lookup)
+    for user_id in (
+        get_user_model().objects.filter(**lookup).values_list("pk", flat=True)
+    ):
+        invalidate_responses(user_id)
+    return objs
+
+
+def needs_rebalance(rank):
+    return len(rank) > settings.RANK_REBALANCE_LENGTH
+
+
+def schedule_rebalance(model, parent_field, parent_id):
+    """
+    Rebalance the ranks of the parent's children once the current
+    transaction commits, outside of the request
+    """
+
+    def rebalance():
+        try:
+            rebalance_ranks(model, parent_field, parent_id)
+        finally:
+            connection.close()
+
+    transaction.on_commit(lambda: _rebalancer.submit(rebalance))
@@ -0,0 +1,50 @@
+"""
+Renderers shared by the APIs
+"""
+from rest_framework import renderers
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    """
+    JSON renderer encoding with orjson, which handles datetimes natively.
+    Output orjson cannot give, indented with other than two spaces or ascii
+    only, and installs without orjson fall back to the stdlib renderer
+    """
+
+    encoder = JSONEncoder()
+
+    def can_render(self, indent):
+        return (
+            orjson is not None
+            and indent in [None, 2]
+            and api_settings.UNICODE_JSON
+            and api_settings.COMPACT_JSON
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        if not self.can_render(indent):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        option = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        ret = orjson.dumps(data, default=self.encoder.default, option=option)
+
+        # escape the line separators like the stdlib renderer so the output
+        # stays valid javascript
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028")
+            ret = ret.replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
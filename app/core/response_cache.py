@@ -0,0 +1,55 @@
+"""
+Cache of the rendered todo and task list responses of every user. Entries
+are keyed by a per user generation that is replaced whenever the user's
+todos or tasks change, dropping all of the user's entries at once
+"""
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def generation_key(user_id):
+    return f"responses:{user_id}:generation"
+
+
+def get_generation(user_id):
+    cache = get_cache()
+    generation = cache.get(generation_key(user_id))
+    if generation is None:
+        generation = uuid.uuid4().hex
+        # keep an existing generation set by a concurrent request
+        if not cache.add(generation_key(user_id), generation, timeout=None):
+            generation = cache.get(generation_key(user_id), generation)
+    return generation
+
+
+def response_key(user_id, variant):
+    """
+    Key of the response of the user for the variant, the path and the
+    media type of the request
+    """
+    digest = hashlib.md5(variant.encode(), usedforsecurity=False).hexdigest()
+    return f"responses:{user_id}:{get_generation(user_id)}:{digest}"
+
+
+def drop_responses(user_id):
+    """
+    Drop the cached responses of the user now
+    """
+    get_cache().set(generation_key(user_id), uuid.uuid4().hex, timeout=None)
+
+
+def invalidate_responses(user_id):
+    """
+    Drop the cached responses of the user, again once the current transaction
+    commits so that no response read before the commit outlives it
+    """
+    drop_responses(user_id)
+    transaction.on_commit(lambda: drop_responses(user_id))
@@ -0,0 +1,85 @@
+"""
+Synthetic users, todos and tasks created with bulk inserts, used to seed
+databases for load tests and benchmarks
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+
+from core.models import Todo, Task
+
+
+def create_todos(todos, tasks_per_todo, batch_size):
+    """
+    Insert the todos followed by their tasks, `batch_size` tasks per insert
+    """
+    Todo.objects.bulk_create(todos)
+
+    tasks = []
+    for todo in todos:
+        for ordering in range(1, tasks_per_todo + 1):
+            tasks.append(
+                Task(
+                    todo=todo,
+                    task=f"Task {ordering}",
+                    completed=ordering % 2 == 0,
+                    ordering=ordering,
+                )
+            )
+            if len(tasks) >= batch_size:
+                Task.objects.bulk_create(tasks)
+                tasks = []
+    if tasks:
+        Task.objects.bulk_create(tasks)
+
+
+def seed_todos(users, todos_per_user, tasks_per_todo, batch_size=1000):
+    """
+    Create the todos and tasks of the users, `batch_size` todos per insert
+    """
+    todos = []
+    for user in users:
+        for ordering in range(1, todos_per_user + 1):
+            todos.append(
+                Todo(
+                    user=user,
+                    title=f"Todo {ordering}",
+                    completed=ordering % 3 == 0,
+                    ordering=ordering,
+                    next_ordering=tasks_per_todo + 1,
+                )
+            )
+            if len(todos) >= batch_size:
+                create_todos(todos, tasks_per_todo, batch_size)
+                todos = []
+    if todos:
+        create_todos(todos, tasks_per_todo, batch_size)
+
+
+def seed_users(
+    users, todos_per_user, tasks_per_todo, password, prefix="seed", batch_size=1000
+):
+    """
+    Create users sharing the same password with their todos and tasks and
+    return them
+    """
+    model = get_user_model()
+    # hashing is slow, every user gets the same hash
+    hashed_password = make_password(password)
+    start = model.objects.filter(email__startswith=f"{prefix}-").count()
+
+    created = []
+    for offset in range(start, start + users, batch_size):
+        batch = [
+            model(
+                email=f"{prefix}-{i}@example.com",
+                first_name="Seed",
+                last_name=f"User {i}",
+                password=hashed_password,
+                next_ordering=todos_per_user + 1,
+            )
+            for i in range(offset, min(start + users, offset + batch_size))
+        ]
+        model.objects.bulk_create(batch)
+        seed_todos(batch, todos_per_user, tasks_per_todo, batch_size)
+        created.extend(batch)
+    return created
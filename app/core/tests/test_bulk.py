@@ -0,0 +1,298 @@
+"""
+Tests for the bulk writes
+"""
+from django.core.exceptions import ValidationError
+from django.db import DataError, connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from core.models import Todo
+from core.bulk import changed_columns_update, copy_update, values_update
+
+
+def create_user(email="user@example.com", password="Awesomeuser123"):
+    """
+    Create and return a user
+    """
+    return get_user_model().objects.create_user(
+        email=email, password=password, first_name="Test", last_name="User"
+    )
+
+
+class ValuesUpdateTests(TestCase):
+    """
+    Test updating many rows with a single statement
+    """
+
+    def setUp(self):
+        self.user = create_user()
+        self.todos = [
+            Todo.objects.create(user=self.user, title="Todo") for _ in range(3)
+        ]
+
+    def test_rows_matched_by_primary_key(self):
+        """
+        Test every row gets the values given for its own id
+        """
+        rows = [
+            {"id": self.todos[2].id, "ordering": 7, "title": "Third"},
+            {"id": self.todos[0].id, "ordering": 9, "title": "First"},
+        ]
+
+        with self.assertNumQueries(1):
+            objs = values_update(Todo, rows, ["ordering", "title"])
+
+        self.assertEqual(
+            {obj.id: (obj.ordering, obj.title) for obj in objs},
+            {self.todos[2].id: (7, "Third"), self.todos[0].id: (9, "First")},
+        )
+        self.todos[1].refresh_from_db()
+        self.assertEqual(self.todos[1].ordering, 2)
+        self.assertEqual(Todo.objects.get(id=self.todos[0].id).title, "First")
+
+    def test_too_long_values_rejected(self):
+        """
+        Test strings too long for their column raise instead of being cut
+        """
+        rows = [{"id": self.todos[0].id, "title": "a" * 256}]
+
+        with self.assertRaises(DataError):
+            values_update(Todo, rows, ["title"])
+
+    def test_returned_objects_hold_every_field(self):
+        """
+        Test the returned objects carry the stored values of the other fields
+        """
+        objs = values_update(
+            Todo, [{"id": self.todos[1].id, "ordering": 5}], ["ordering"]
+        )
+
+        self.assertEqual(objs[0].user_id, self.user.id)
+        self.assertEqual(
+            objs[0].last_added, Todo.objects.get(id=self.todos[1].id).last_added
+        )
+
+    def test_rows_outside_scope_not_updated(self):
+        """
+        Test rows outside of the scope queryset are left alone
+        """
+        other_todo = Todo.objects.create(user=create_user("other@example.com"))
+
+        objs = values_update(
+            Todo,
+            [
+                {"id": other_todo.id, "ordering": 5},
+                {"id": self.todos[0].id, "ordering": 6},
+            ],
+            ["ordering"],
+            scope=Todo.objects.filter(user=self.user),
+        )
+
+        self.assertEqual([obj.id for obj in objs], [self.todos[0].id])
+        other_todo.refresh_from_db()
+        self.assertEqual(other_todo.ordering, 1)
+
+    def test_auto_now_fields_touched(self):
+        """
+        Test fields with auto_now are set like save() sets them
+        """
+        before = Todo.objects.get(id=self.todos[0].id).updated_at
+
+        objs = values_update(
+            Todo, [{"id": self.todos[0].id, "ordering": 5}], ["ordering"]
+        )
+
+        self.assertGreater(objs[0].updated_at, before)
+        self.assertEqual(
+            Todo.objects.get(id=self.todos[0].id).updated_at, objs[0].updated_at
+        )
+
+
+class CopyUpdateTests(TestCase):
+    """
+    Test updating many rows loaded with COPY into a temporary table
+    """
+
+    def setUp(self):
+        self.user = create_user()
+        self.todos = [
+            Todo.objects.create(user=self.user, title="Todo") for _ in range(3)
+        ]
+
+    def test_rows_matched_by_primary_key(self):
+        """
+        Test every row gets the values given for its own id, returned in the
+        order of the rows
+        """
+        rows = [
+            {"id": self.todos[2].id, "ordering": 7, "title": "Third"},
+            {"id": self.todos[0].id, "ordering": None, "title": "First"},
+        ]
+
+        objs = copy_update(Todo, rows, ["ordering", "title"])
+
+        self.assertEqual(
+            [(obj.id, obj.ordering, obj.title) for obj in objs],
+            [(self.todos[2].id, 7, "Third"), (self.todos[0].id, None, "First")],
+        )
+        self.assertEqual(
+            list(Todo.objects.order_by("id").values_list("ordering", "title")),
+            [(None, "First"), (2, "Todo"), (7, "Third")],
+        )
+
+    def test_special_characters_loaded_unchanged(self):
+        """
+        Test tabs, new lines and backslashes survive the text format of COPY
+        """
+        title = "Tab\there\nNew line\r\\N back\\slash"
+
+        copy_update(Todo, [{"id": self.todos[0].id, "title": title}], ["title"])
+
+        self.assertEqual(Todo.objects.get(id=self.todos[0].id).title, title)
+
+    def test_rows_outside_scope_not_updated(self):
+        """
+        Test rows outside of the scope queryset are left alone
+        """
+        other_todo = Todo.objects.create(user=create_user("other@example.com"))
+
+        objs = copy_update(
+            Todo,
+            [
+                {"id": other_todo.id, "completed": True},
+                {"id": self.todos[0].id, "completed": True},
+            ],
+            ["completed"],
+            scope=Todo.objects.filter(user=self.user),
+        )
+
+        self.assertEqual([obj.id for obj in objs], [self.todos[0].id])
+        self.assertFalse(Todo.objects.get(id=other_todo.id).completed)
+
+    def test_auto_now_fields_touched(self):
+        """
+        Test fields with auto_now are set like save() sets them
+        """
+        before = Todo.objects.get(id=self.todos[0].id).updated_at
+
+        objs = copy_update(
+            Todo, [{"id": self.todos[0].id, "ordering": 5}], ["ordering"]
+        )
+
+        self.assertGreater(objs[0].updated_at, before)
+
+    def test_values_update_copies_above_threshold(self):
+        """
+        Test values_update loads batches above the threshold with COPY
+        """
+        rows = [{"id": todo.id, "ordering": 10} for todo in self.todos]
+
+        with CaptureQueriesContext(connection) as queries:
+            values_update(Todo, rows, ["ordering"], copy_threshold=2)
+        self.assertTrue(
+            any("TEMPORARY TABLE" in query["sql"] for query in queries.captured_queries)
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            values_update(Todo, rows, ["ordering"], copy_threshold=3)
+        self.assertEqual(len(queries), 1)
+        self.assertIn("VALUES", queries.captured_queries[0]["sql"])
+
+
+class ChangedColumnsUpdateTests(TestCase):
+    """
+    Test updating only the columns rows change
+    """
+
+    def setUp(self):
+        self.user = create_user()
+        self.todos = [
+            Todo.objects.create(user=self.user, title=f"Todo {i}") for i in range(4)
+        ]
+
+    def test_rows_grouped_by_changed_columns(self):
+        """
+        Test rows changing the same columns are written by one statement
+        """
+        rows = [
+            {"id": self.todos[0].id, "title": "First"},
+            {"id": self.todos[1].id, "title": "Second", "completed": True},
+            {"id": self.todos[2].id, "title": "Third"},
+            {"id": self.todos[3].id, "completed": True, "title": "Second"},
+        ]
+
+        with self.assertNumQueries(2):
+            changed = changed_columns_update(self.todos, rows, ["title", "completed"])
+
+        self.assertEqual(len(changed), 4)
+        self.assertEqual(
+            list(Todo.objects.order_by("id").values_list("title", "completed")),
+            [
+                ("First", False),
+                ("Second", True),
+                ("Third", False),
+                ("Second", True),
+            ],
+        )
+        self.assertEqual(
+            [(todo.title, todo.completed) for todo in self.todos],
+            [
+                ("First", False),
+                ("Second", True),
+                ("Third", False),
+                ("Second", True),
+            ],
+        )
+
+    def test_unchanged_rows_skipped(self):
+        """
+        Test rows holding the current values are not written
+        """
+        before = Todo.objects.get(id=self.todos[0].id).updated_at
+        rows = [
+            {"id": self.todos[0].id, "title": "Todo 0", "completed": False},
+            {"id": self.todos[1].id, "title": "Changed", "completed": False},
+        ]
+
+        with self.assertNumQueries(1):
+            changed = changed_columns_update(self.todos, rows, ["title", "completed"])
+
+        self.assertEqual([todo.id for todo in changed], [self.todos[1].id])
+        self.assertEqual(Todo.objects.get(id=self.todos[0].id).updated_at, before)
+
+        with self.assertNumQueries(0):
+            changed_columns_update(self.todos, rows, ["title", "completed"])
+
+    def test_only_given_fields_written(self):
+        """
+        Test values of fields that are not allowed and unknown rows are ignored
+        """
+        rows = [
+            {"id": self.todos[0].id, "ordering": 50, "title": "First"},
+            {"id": 0, "title": "Missing"},
+        ]
+
+        changed_columns_update(self.todos, rows, ["title"])
+
+        todo = Todo.objects.get(id=self.todos[0].id)
+        self.assertEqual((todo.title, todo.ordering), ("First", 1))
+
+    def test_values_converted_before_comparing(self):
+        """
+        Test values are compared once converted to the field type
+        """
+        rows = [{"id": str(self.todos[0].id), "completed": "False"}]
+
+        with self.assertNumQueries(0):
+            changed = changed_columns_update(self.todos, rows, ["completed"])
+
+        self.assertEqual(changed, [])
+
+    def test_values_validated(self):
+        """
+        Test values the fields do not accept are rejected before writing
+        """
+        rows = [{"id": self.todos[0].id, "title": "a" * 256}]
+
+        with self.assertNumQueries(0), self.assertRaises(ValidationError):
+            changed_columns_update(self.todos, rows, ["title"])
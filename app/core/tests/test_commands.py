@@ -0,0 +1,203 @@
+"""
+Tests for the seed and benchmark commands
+"""
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from core.models import Todo, Task
+
+
+class SeedDataCommandTests(TestCase):
+    """
+    Test seeding synthetic data
+    """
+
+    def test_seed_data(self):
+        """
+        Test the users are created with ordered todos and tasks
+        """
+        call_command(
+            "seed_data", users=3, todos=4, tasks=2, batch_size=5, stdout=StringIO()
+        )
+
+        users = get_user_model().objects.filter(email__startswith="seed-")
+        self.assertEqual(users.count(), 3)
+        self.assertEqual(Todo.objects.filter(user__in=users).count(), 12)
+        self.assertEqual(Task.objects.count(), 24)
+
+        user = users.first()
+        self.assertTrue(user.check_password("Seeduser123"))
+        self.assertEqual(user.next_ordering, 5)
+        orderings = Todo.objects.filter(user=user).values_list("ordering", flat=True)
+        self.assertEqual(sorted(orderings), [1, 2, 3, 4])
+
+    def test_seed_data_twice_creates_new_users(self):
+        """
+        Test seeding again adds users instead of failing on their emails
+        """
+        call_command("seed_data", users=2, todos=1, tasks=0, stdout=StringIO())
+        call_command("seed_data", users=2, todos=1, tasks=0, stdout=StringIO())
+
+        self.assertEqual(get_user_model().objects.count(), 4)
+
+
+class BenchmarkEndpointsCommandTests(TestCase):
+    """
+    Test benchmarking the routes
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def benchmark(self, name, **options):
+        output = os.path.join(self.directory.name, name)
+        call_command(
+            "benchmark_endpoints",
+            output=output,
+            iterations=2,
+            batch_iterations=1,
+            batch_sizes="2,3",
+            todos=3,
+            tasks=3,
+            stdout=StringIO(),
+            stderr=StringIO(),
+            **options,
+        )
+        return output
+
+    def test_benchmark_writes_results(self):
+        """
+        Test the results hold every batch size and leave no data behind
+        """
+        output = self.benchmark(
+            "results.json", route=["todo:todo-list", "todo:todo-batch_create"]
+        )
+
+        with open(output) as f:
+            results = json.load(f)["results"]
+        self.assertEqual(
+            sorted(results),
+            [
+                "GET todo:todo-list",
+                "POST todo:todo-batch_create [2]",
+                "POST todo:todo-batch_create [3]",
+                "POST todo:todo-list",
+            ],
+        )
+        self.assertEqual(results["GET todo:todo-list"]["statuses"], [200])
+        self.assertEqual(results["GET todo:todo-list"]["queries"], 3)
+        self.assertEqual(Todo.objects.count(), 0)
+
+    def test_compare_reports_regressions(self):
+        """
+        Test comparing result files fails when a route got slower
+        """
+        base = self.benchmark("base.json", route=["user:me"])
+        with open(base) as f:
+            data = json.load(f)
+        data["results"]["GET user:me"]["p95_ms"] *= 2
+        new = os.path.join(self.directory.name, "new.json")
+        with open(new, "w") as f:
+            json.dump(data, f)
+
+        call_command("benchmark_endpoints", compare=[base, base], stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command("benchmark_endpoints", compare=[base, new], stdout=StringIO())
+
+
+class BenchmarkSerializersCommandTests(TestCase):
+    """
+    Test benchmarking the read serializers
+    """
+
+    def test_benchmark_serializers(self):
+        """
+        Test both serializers are timed and the seeded data rolled back
+        """
+        out = StringIO()
+        call_command(
+            "benchmark_serializers", todos=3, tasks=2, iterations=2, stdout=out
+        )
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual([line.split(":")[0] for line in lines], ["todos", "tasks"])
+        self.assertIn("values p50", lines[0])
+        self.assertFalse(Todo.objects.exists())
+
+
+class BenchmarkJSONCommandTests(TestCase):
+    """
+    Test benchmarking the JSON renderers and parsers
+    """
+
+    def test_benchmark_json(self):
+        """
+        Test the renderers and parsers are timed at every size
+        """
+        out = StringIO()
+        call_command("benchmark_json", sizes="2,3", tasks=1, iterations=2, stdout=out)
+
+        lines = [line.split(":")[0] for line in out.getvalue().splitlines()]
+        self.assertEqual(
+            lines,
+            ["render list 2", "parse batch 2", "render list 3", "parse batch 3"],
+        )
+
+    def test_benchmark_json_invalid_sizes(self):
+        """
+        Test sizes that are not numbers are rejected
+        """
+        with self.assertRaises(CommandError):
+            call_command("benchmark_json", sizes="ten", stdout=StringIO())
+
+
+class BenchmarkBulkUpdateCommandTests(TestCase):
+    """
+    Test benchmarking the bulk updates
+    """
+
+    def test_benchmark_bulk_update(self):
+        """
+        Test every bulk update is timed at every size and the data rolled back
+        """
+        out = StringIO()
+        call_command("benchmark_bulk_update", sizes="2,3", iterations=2, stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual([line.split(":")[0] for line in lines], ["2 rows", "3 rows"])
+        for name in ["bulk_update", "values", "copy"]:
+            self.assertIn(f"{name} p50", lines[0])
+        self.assertFalse(Todo.objects.exists())
+
+    def test_benchmark_bulk_update_invalid_sizes(self):
+        """
+        Test sizes below one are rejected
+        """
+        with self.assertRaises(CommandError):
+            call_command("benchmark_bulk_update", sizes="0", stdout=StringIO())
+
+
+class BenchmarkConnectionsCommandTests(TestCase):
+    """
+    Test benchmarking the database connection modes
+    """
+
+    def test_benchmark_connections(self):
+        """
+        Test every connection mode is timed
+        """
+        out = StringIO()
+        call_command(
+            "benchmark_connections", requests=3, threads=2, pool_size=1, stdout=out
+        )
+
+        lines = [line.split(":")[0] for line in out.getvalue().splitlines()]
+        self.assertEqual(lines[:3], ["new connection", "persistent", "pooled"])
+        self.assertIn("pooled saves", out.getvalue())
@@ -0,0 +1,163 @@
+"""
+Tests for the indexes and constraints matching the hot queries
+"""
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from core.bulk import values_update
+from core.constraints import (
+    add_ordering_constraints,
+    existing_ordering_constraints,
+    find_duplicate_orderings,
+)
+from core.models import Todo, Task
+from todo.serializers import TaskValuesSerializer
+
+
+class QueryIndexTests(TestCase):
+    """
+    Test the hot queries are planned with the composite indexes
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="Awesomeuser123"
+        )
+        for i in range(3):
+            todo = Todo.objects.create(user=self.user, title=f"Todo {i}")
+            Task.objects.create(todo=todo, task=f"Task {i}")
+
+    def explain(self, queryset):
+        """
+        Return the plan of the queryset, with sequential scans discouraged as
+        the tables of the tests are tiny
+        """
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+            return queryset.explain()
+
+    def test_todo_list_uses_user_id_index(self):
+        """
+        Test the todo list by id reads the (user, id) index without sorting
+        """
+        plan = self.explain(Todo.objects.filter(user=self.user).order_by("-id"))
+
+        self.assertIn("Index Scan Backward using todo_user_id_idx", plan)
+        self.assertNotIn("Sort", plan)
+
+    def test_todo_list_by_ordering_uses_user_ordering_index(self):
+        """
+        Test a page of todos by ordering reads the (user, ordering, id) index
+        """
+        queryset = Todo.objects.filter(user=self.user).order_by("ordering", "id")
+
+        plan = self.explain(queryset[:10])
+
+        self.assertIn("todo_user_ordering_idx", plan)
+        self.assertNotIn("Sort", plan)
+
+    def test_task_prefetch_uses_todo_ordering_index(self):
+        """
+        Test the tasks of a list of todos are read from the (todo, ordering) index
+        """
+        ids = list(Todo.objects.values_list("id", flat=True))
+        queryset = Task.objects.filter(todo_id__in=ids).order_by("ordering", "id")
+
+        self.assertIn("task_todo_ordering_idx", self.explain(queryset))
+
+    def test_task_list_join_covered_by_user_id_index(self):
+        """
+        Test the todos joined to the task list are read from the index alone
+        """
+        queryset = TaskValuesSerializer.get_values_queryset(
+            Task.objects.filter(todo__user=self.user).order_by("id")
+        )
+
+        self.assertIn("Index Only Scan using todo_user_id_idx", self.explain(queryset))
+
+
+class UniqueOrderingTests(TestCase):
+    """
+    Test the optional unique constraints on the orderings
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="Awesomeuser123"
+        )
+        self.todo1 = Todo.objects.create(user=self.user, title="Todo 1")
+        self.todo2 = Todo.objects.create(user=self.user, title="Todo 2")
+
+    def check_constraints(self):
+        """
+        Check the deferred constraints now, the test transaction never commits
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+            cursor.execute("SET CONSTRAINTS ALL DEFERRED")
+
+    def add_constraints(self):
+        # flush the foreign key checks deferred by creating the todos
+        self.check_constraints()
+        add_ordering_constraints(connection)
+
+    def test_orderings_can_be_swapped(self):
+        """
+        Test a single statement can swap the orderings of two todos
+        """
+        self.add_constraints()
+        rows = [
+            {"id": self.todo1.id, "ordering": self.todo2.ordering},
+            {"id": self.todo2.id, "ordering": self.todo1.ordering},
+        ]
+
+        values_update(Todo, rows, ["ordering"])
+        self.check_constraints()
+
+    def test_duplicate_ordering_rejected(self):
+        """
+        Test giving two todos of a user the same ordering fails
+        """
+        self.add_constraints()
+
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                Todo.objects.filter(id=self.todo2.id).update(
+                    ordering=self.todo1.ordering
+                )
+                self.check_constraints()
+
+    def test_constraints_not_added_over_duplicates(self):
+        """
+        Test the command refuses to add the constraints over duplicates
+        """
+        Todo.objects.filter(id=self.todo2.id).update(ordering=self.todo1.ordering)
+        out = StringIO()
+
+        with self.assertRaises(CommandError):
+            call_command("unique_ordering", stdout=out)
+
+        self.assertEqual(
+            find_duplicate_orderings(connection)["todo_user_ordering_uniq"], 1
+        )
+        self.assertIn("todo_user_ordering_uniq: 1", out.getvalue())
+        self.assertEqual(existing_ordering_constraints(connection), set())
+
+    def test_command_adds_and_drops_constraints(self):
+        """
+        Test the command adds the constraints and drops them with --drop
+        """
+        self.check_constraints()
+        call_command("unique_ordering", stdout=StringIO())
+        self.assertEqual(
+            existing_ordering_constraints(connection),
+            {"todo_user_ordering_uniq", "task_todo_ordering_uniq"},
+        )
+
+        call_command("unique_ordering", drop=True, stdout=StringIO())
+        self.assertEqual(existing_ordering_constraints(connection), set())
@@ -0,0 +1,172 @@
+"""
+Tests for the orjson renderer and parser
+"""
+import io
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework.utils.serializer_helpers import ReturnDict
+
+from core import parsers, renderers
+from core.models import Todo
+from core.parsers import ORJSONParser
+from core.renderers import ORJSONRenderer
+
+TODO_URL = reverse("todo:todo-list")
+TODO_BATCH_CREATE_URL = reverse("todo:todo-batch_create")
+
+PAYLOAD = {
+    "results": [
+        {
+            "id": 1,
+            "title": "Todo ✓  ",
+            "completed": False,
+            "ordering": None,
+            "tasks": [{"id": 2, "task": "Task", "completed": True}],
+        }
+    ],
+    "next": None,
+}
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    """
+    Test the orjson renderer renders like the stdlib renderer
+    """
+
+    def test_render_matches_stdlib_renderer(self):
+        """
+        Test nested data, line separators and lazy strings render the same
+        """
+        data = ReturnDict(PAYLOAD, serializer=None)
+        data["detail"] = gettext_lazy("Not found.")
+        data["price"] = Decimal("1.5")
+
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_render_datetimes_natively(self):
+        """
+        Test datetimes render in the format of the serializers' DateTimeField
+        """
+        value = datetime(2023, 5, 1, 8, 30, 15, 123456, tzinfo=dt_timezone.utc)
+
+        res = ORJSONRenderer().render({"last_added": value})
+
+        self.assertEqual(res, b'{"last_added":"2023-05-01T08:30:15.123456Z"}')
+
+    def test_render_indent(self):
+        """
+        Test an indent of 2 is rendered by orjson and others by the stdlib
+        """
+        renderer = ORJSONRenderer()
+        context = {"indent": 2}
+        self.assertEqual(
+            renderer.render(PAYLOAD, "application/json", context),
+            JSONRenderer().render(PAYLOAD, "application/json", context),
+        )
+
+        res = renderer.render(PAYLOAD, "application/json; indent=4")
+        self.assertEqual(
+            res, JSONRenderer().render(PAYLOAD, "application/json; indent=4")
+        )
+
+    def test_render_without_orjson(self):
+        """
+        Test the stdlib renderer is used when orjson is not installed
+        """
+        with mock.patch.object(renderers, "orjson", None):
+            res = ORJSONRenderer().render(PAYLOAD)
+
+        self.assertEqual(res, JSONRenderer().render(PAYLOAD))
+
+
+class ORJSONParserTests(SimpleTestCase):
+    """
+    Test the orjson parser parses like the stdlib parser
+    """
+
+    def parse(self, body, **context):
+        return ORJSONParser().parse(io.BytesIO(body), parser_context=context)
+
+    def test_parse_matches_stdlib_parser(self):
+        """
+        Test the parsed data equals the data parsed by the stdlib parser
+        """
+        body = JSONRenderer().render(PAYLOAD)
+
+        self.assertEqual(self.parse(body), JSONParser().parse(io.BytesIO(body)))
+
+    def test_parse_other_encoding(self):
+        """
+        Test bodies in another charset are decoded first
+        """
+        body = '{"title": "café"}'.encode("latin-1")
+
+        self.assertEqual(self.parse(body, encoding="latin-1"), {"title": "café"})
+
+    def test_parse_invalid_json(self):
+        """
+        Test invalid JSON and NaN raise a parse error
+        """
+        for body in [b"{", b'{"ordering": NaN}']:
+            with self.assertRaises(ParseError):
+                self.parse(body)
+
+    def test_parse_without_orjson(self):
+        """
+        Test the stdlib parser is used when orjson is not installed
+        """
+        with mock.patch.object(parsers, "orjson", None):
+            self.assertEqual(self.parse(b'{"id": 1}'), {"id": 1})
+            self.assertEqual(parsers.loads(b'{"id": 1}'), {"id": 1})
+
+
+class JSONApiTests(TestCase):
+    """
+    Test the API reads and writes JSON through orjson
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com",
+            password="Awesomeuser123",
+            first_name="Test",
+            last_name="User",
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_batch_create_with_raw_json(self):
+        """
+        Test a raw JSON body is parsed and the created todos rendered
+        """
+        body = b'{"create_list": [{"title": "One"}, {"title": "Two \\u2713"}]}'
+
+        res = self.client.post(
+            TODO_BATCH_CREATE_URL, body, content_type="application/json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            sorted(Todo.objects.values_list("title", flat=True)), ["One", "Two ✓"]
+        )
+        self.assertEqual(res["Content-Type"], "application/json")
+
+    def test_invalid_json_body(self):
+        """
+        Test an invalid JSON body is answered with a 400
+        """
+        res = self.client.post(TODO_URL, b"{", content_type="application/json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("JSON parse error", res.json()["detail"])
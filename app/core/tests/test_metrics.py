@@ -0,0 +1,131 @@
+"""
+Tests for the metrics endpoint
+"""
+import os
+import subprocess
+import sys
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from app.gunicorn import child_exit
+from core.metrics import render_metrics
+
+METRICS_URL = reverse("metrics")
+TODO_URL = reverse("todo:todo-list")
+
+
+def create_user(email="user@example.com", password="Awesomeuser123"):
+    """
+    Create and return a user
+    """
+    return get_user_model().objects.create_user(
+        email=email, password=password, first_name="Test", last_name="User"
+    )
+
+
+class MetricsApiTests(TestCase):
+    """
+    Test the Prometheus metrics endpoint
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(create_user())
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_requests_recorded(self):
+        """
+        Test the requests are counted and timed by route
+        """
+        self.client.get(TODO_URL)
+
+        res = self.client.get(METRICS_URL, HTTP_AUTHORIZATION="Bearer secret")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res["Content-Type"].startswith("text/plain"))
+        content = res.content.decode()
+        self.assertIn(
+            'api_requests_total{method="GET",route="todo:todo-list",status="200"}',
+            content,
+        )
+        self.assertIn("api_request_duration_seconds_bucket", content)
+        self.assertIn("api_request_db_queries_bucket", content)
+        self.assertIn("api_requests_in_flight", content)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_token_required_when_set(self):
+        """
+        Test the metrics are only returned with the configured token
+        """
+        res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        res = self.client.get(METRICS_URL, HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(METRICS_TOKEN="")
+    def test_denied_without_token_unless_debug(self):
+        """
+        Test the metrics are not public when no token is set
+        """
+        res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        with override_settings(DEBUG=True):
+            res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_metrics_aggregated_across_processes(self):
+        """
+        Test the values written by several worker processes are summed
+        """
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": directory.name}
+        script = (
+            "from core.metrics import REQUESTS; "
+            "REQUESTS.labels('todo:todo-list', 'GET', 200).inc()"
+        )
+        for _ in range(2):
+            subprocess.run(
+                [sys.executable, "-c", script],
+                env=env,
+                cwd=settings.BASE_DIR,
+                check=True,
+            )
+
+        with mock.patch.dict(os.environ, {"PROMETHEUS_MULTIPROC_DIR": directory.name}):
+            content = render_metrics().decode()
+
+        self.assertIn(
+            'api_requests_total{method="GET",route="todo:todo-list",status="200"} 2.0',
+            content,
+        )
+
+    def test_exited_workers_dropped_from_live_gauges(self):
+        """
+        Test the in flight requests of a worker are dropped from the total
+        once the server's exit hook marks it dead
+        """
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": directory.name}
+        script = "from core.metrics import IN_FLIGHT; IN_FLIGHT.inc()"
+        worker = subprocess.Popen(
+            [sys.executable, "-c", script], env=env, cwd=settings.BASE_DIR
+        )
+        self.assertEqual(worker.wait(), 0)
+
+        with mock.patch.dict(os.environ, {"PROMETHEUS_MULTIPROC_DIR": directory.name}):
+            self.assertIn("api_requests_in_flight 1.0", render_metrics().decode())
+            child_exit(None, mock.Mock(pid=worker.pid))
+            content = render_metrics().decode()
+
+        self.assertNotIn("api_requests_in_flight 1.0", content)
@@ -0,0 +1,151 @@
+"""
+Tests for the middleware
+"""
+import json
+
+from asgiref.sync import iscoroutinefunction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import TestCase, AsyncClient, AsyncRequestFactory
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from core.middleware import AsyncStreamingMiddleware, QueryTimingMiddleware
+from core.models import Todo
+
+TODO_URL = reverse("todo:todo-list")
+TODO_BATCH_UPDATE_ORDERING_URL = reverse("todo:todo-batch_update_ordering")
+
+
+def in_flight():
+    return REGISTRY.get_sample_value("api_requests_in_flight")
+
+
+def create_user(email="user@example.com", password="Awesomeuser123"):
+    """
+    Create and return a user
+    """
+    return get_user_model().objects.create_user(
+        email=email, password=password, first_name="Test", last_name="User"
+    )
+
+
+class QueryTimingMiddlewareTests(TestCase):
+    """
+    Test the SQL query instrumentation of requests
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.todo = Todo.objects.create(user=self.user, title="Todo")
+
+    def read_log(self, logs):
+        return json.loads(logs.records[-1].getMessage())
+
+    def test_server_timing_header(self):
+        """
+        Test the response reports the queries of the request
+        """
+        with self.assertNumQueries(3):
+            res = self.client.get(TODO_URL)
+
+        self.assertIn('desc="3 queries"', res["Server-Timing"])
+        self.assertIn("db-slowest;dur=", res["Server-Timing"])
+
+    def test_request_logged_with_route_and_action(self):
+        """
+        Test the log record is tagged with the route and the action
+        """
+        with self.assertLogs("core.requests", "INFO") as logs:
+            self.client.patch(
+                TODO_BATCH_UPDATE_ORDERING_URL,
+                {"ordering_list": [{"id": self.todo.id, "ordering": 5}]},
+                format="json",
+            )
+
+        record = self.read_log(logs)
+        self.assertEqual(record["route"], "todo:todo-batch_update_ordering")
+        self.assertEqual(record["action"], "batch_update_ordering")
+        self.assertEqual(record["status"], 200)
+        self.assertGreater(record["queries"], 0)
+
+    def test_streamed_response_logged_once_consumed(self):
+        """
+        Test the queries run while streaming are counted
+        """
+        with self.assertLogs("core.requests", "INFO") as logs:
+            res = self.client.get(TODO_URL, {"stream": "true"})
+            self.assertEqual(logs.records, [])
+            b"".join(res.streaming_content)
+
+        record = self.read_log(logs)
+        self.assertEqual(record["action"], "list")
+        self.assertGreaterEqual(record["queries"], 3)
+
+    async def test_async_requests_tracked(self):
+        """
+        Test requests handled under ASGI are counted in flight and their
+        queries reported
+        """
+        seen_in_flight = []
+
+        async def get_response(request):
+            seen_in_flight.append(in_flight())
+            await Todo.objects.acount()
+            return HttpResponse()
+
+        middleware = QueryTimingMiddleware(get_response)
+        before = in_flight()
+        res = await middleware(AsyncRequestFactory().get(TODO_URL))
+
+        self.assertTrue(iscoroutinefunction(middleware))
+        self.assertEqual(seen_in_flight, [before + 1])
+        self.assertEqual(in_flight(), before)
+        self.assertIn('desc="1 queries"', res["Server-Timing"])
+
+    async def test_async_client_server_timing_header(self):
+        """
+        Test a request through the async handler reports the queries of the
+        regular view it is handed to
+        """
+        token = await Token.objects.acreate(user=self.user)
+
+        res = await AsyncClient().get(
+            TODO_URL, headers={"Authorization": f"Token {token.key}"}
+        )
+
+        self.assertEqual(res.status_code, 200)
+        self.assertRegex(res["Server-Timing"], r'desc="[1-9]\d* queries"')
+
+
+class AsyncStreamingMiddlewareTests(TestCase):
+    """
+    Test streamed responses served under ASGI
+    """
+
+    async def test_sync_content_pulled_a_chunk_at_a_time(self):
+        """
+        Test the content is read as it is sent rather than all at once
+        """
+        pulled = []
+
+        def content():
+            for chunk in [b"a", b"b", b"c"]:
+                pulled.append(chunk)
+                yield chunk
+
+        async def get_response(request):
+            return StreamingHttpResponse(content())
+
+        middleware = AsyncStreamingMiddleware(get_response)
+        res = await middleware(AsyncRequestFactory().get(TODO_URL))
+
+        self.assertTrue(res.is_async)
+        received = []
+        async for chunk in res.streaming_content:
+            received.append(chunk)
+            self.assertEqual(pulled, received)
+        self.assertEqual(received, [b"a", b"b", b"c"])
@@ -0,0 +1,134 @@
+"""
+Tests for the models
+"""
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from core.models import Todo, Task
+
+
+def create_user(email="user@example.com", password="Awesomeuser123"):
+    """
+    Create and return a user
+    """
+    return get_user_model().objects.create_user(
+        email=email, password=password, first_name="Test", last_name="User"
+    )
+
+
+class OrderingCounterTests(TestCase):
+    """
+    Test the ordering counters used to order new todos and tasks
+    """
+
+    def setUp(self):
+        self.user = create_user()
+
+    def test_new_todos_get_consecutive_orderings(self):
+        """
+        Test every new todo is ordered after the previous one
+        """
+        todos = [Todo.objects.create(user=self.user, title="Todo") for _ in range(3)]
+
+        self.assertEqual([todo.ordering for todo in todos], [1, 2, 3])
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.next_ordering, 4)
+
+    def test_todo_ordering_not_reused_after_delete(self):
+        """
+        Test deleting a todo does not hand its ordering out again
+        """
+        Todo.objects.create(user=self.user, title="Todo 1")
+        todo2 = Todo.objects.create(user=self.user, title="Todo 2")
+        Todo.objects.filter(ordering=1).delete()
+
+        todo3 = Todo.objects.create(user=self.user, title="Todo 3")
+
+        self.assertEqual(todo3.ordering, todo2.ordering + 1)
+
+    def test_ordering_allocated_in_single_statement(self):
+        """
+        Test allocating an ordering runs a single query
+        """
+        Todo.objects.create(user=self.user, title="Todo")
+        todo = Todo(user=self.user, title="Todo")
+
+        with self.assertNumQueries(1):
+            todo.increment_ordering
+
+        self.assertEqual(todo.ordering, 2)
+
+    def test_task_orderings_counted_per_todo(self):
+        """
+        Test task orderings are allocated separately for every todo
+        """
+        todo1 = Todo.objects.create(user=self.user, title="Todo 1")
+        todo2 = Todo.objects.create(user=self.user, title="Todo 2")
+
+        Task.objects.create(todo=todo1, task="Task 1")
+        task2 = Task.objects.create(todo=todo1, task="Task 2")
+        task3 = Task.objects.create(todo=todo2, task="Task 3")
+
+        self.assertEqual(task2.ordering, 2)
+        self.assertEqual(task3.ordering, 1)
+
+    def test_saving_task_keeps_its_ordering(self):
+        """
+        Test updating a task does not move it to the end of its todo
+        """
+        todo = Todo.objects.create(user=self.user, title="Todo")
+        task = Task.objects.create(todo=todo, task="Task 1")
+        Task.objects.create(todo=todo, task="Task 2")
+
+        task.completed = True
+        task.save()
+
+        task.refresh_from_db()
+        self.assertEqual(task.ordering, 1)
+
+    def test_raise_orderings_moves_counter_past_assigned_orderings(self):
+        """
+        Test raising the counters skips orderings that were assigned explicitly
+        and never lowers a counter
+        """
+        other_user = create_user("other@example.com")
+        Todo.objects.create(user=other_user, title="Todo")
+        Todo.objects.create(user=other_user, title="Todo")
+
+        get_user_model().objects.raise_orderings({self.user.id: 10, other_user.id: 1})
+
+        self.user.refresh_from_db()
+        other_user.refresh_from_db()
+        self.assertEqual(self.user.next_ordering, 11)
+        self.assertEqual(other_user.next_ordering, 3)
+
+    def test_saving_stale_user_keeps_counter(self):
+        """
+        Test saving a user loaded before todos were created does not write its
+        old counter back
+        """
+        stale_user = get_user_model().objects.get(id=self.user.id)
+        Todo.objects.create(user=self.user, title="Todo")
+
+        stale_user.first_name = "Changed"
+        stale_user.save()
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, "Changed")
+        self.assertEqual(self.user.next_ordering, 2)
+        self.assertEqual(Todo.objects.create(user=self.user).ordering, 2)
+
+    def test_saving_stale_todo_keeps_counter(self):
+        """
+        Test saving a todo loaded before tasks were created does not write its
+        old counter back
+        """
+        todo = Todo.objects.create(user=self.user, title="Todo")
+        stale_todo = Todo.objects.get(id=todo.id)
+        Task.objects.create(todo=todo, task="Task")
+
+        stale_todo.title = "Changed"
+        stale_todo.save()
+
+        todo.refresh_from_db()
+        self.assertEqual(todo.title, "Changed")
+        self.assertEqual(todo.next_ordering, 2)
@@ -0,0 +1,190 @@
+"""
+Tests for the database connection pool and the pooled PostgreSQL backend
+"""
+import copy
+import threading
+import time
+
+from django.db import connection
+from django.test import SimpleTestCase
+from prometheus_client import REGISTRY
+
+from core.backends.postgresql_pool.base import (
+    DatabaseWrapper,
+    close_idle_connections,
+)
+from core.pool import ConnectionPool
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def wait_count():
+    return REGISTRY.get_sample_value("api_db_pool_wait_seconds_count") or 0
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """
+    Test sharing connections through the pool
+    """
+
+    def test_released_connections_reused(self):
+        """
+        Test a released connection is handed out again instead of a new one
+        """
+        pool = ConnectionPool(max_size=2, timeout=1)
+        first = pool.acquire(FakeConnection)
+        pool.release(first)
+
+        self.assertIs(pool.acquire(FakeConnection), first)
+        self.assertEqual(pool.size, 1)
+
+    def test_full_pool_waits_for_release(self):
+        """
+        Test a thread waits for a connection when all are in use and the
+        wait is recorded
+        """
+        pool = ConnectionPool(max_size=1, timeout=5)
+        first = pool.acquire(FakeConnection)
+        waits = wait_count()
+        acquired = []
+
+        thread = threading.Thread(
+            target=lambda: acquired.append(pool.acquire(FakeConnection))
+        )
+        thread.start()
+        time.sleep(0.05)
+        self.assertEqual(acquired, [])
+        pool.release(first)
+        thread.join(timeout=5)
+
+        self.assertEqual(acquired, [first])
+        self.assertEqual(wait_count(), waits + 1)
+
+    def test_full_pool_times_out(self):
+        """
+        Test waiting for a connection gives up after the timeout
+        """
+        pool = ConnectionPool(max_size=1, timeout=0.05)
+        pool.acquire(FakeConnection)
+
+        with self.assertRaises(TimeoutError):
+            pool.acquire(FakeConnection)
+
+    def test_unusable_connections_replaced(self):
+        """
+        Test connections that cannot be reused are closed and their place
+        given to new ones
+        """
+        pool = ConnectionPool(max_size=1, timeout=1)
+        first = pool.acquire(FakeConnection)
+        pool.release(first, reusable=False)
+
+        second = pool.acquire(FakeConnection)
+
+        self.assertTrue(first.closed)
+        self.assertIsNot(second, first)
+        self.assertEqual(pool.size, 1)
+
+    def test_failed_health_check_replaced(self):
+        """
+        Test idle connections failing the health check are replaced
+        """
+        pool = ConnectionPool(max_size=1, timeout=1, check=lambda conn: False)
+        first = pool.acquire(FakeConnection)
+        pool.release(first)
+        pool.idle[0] = (first, pool.idle[0][1], time.monotonic() - 10)
+
+        second = pool.acquire(FakeConnection)
+
+        self.assertTrue(first.closed)
+        self.assertIsNot(second, first)
+
+    def test_old_connections_replaced(self):
+        """
+        Test connections older than the max age are not reused
+        """
+        pool = ConnectionPool(max_size=1, timeout=1, max_age=0)
+        first = pool.acquire(FakeConnection)
+        time.sleep(0.01)
+        pool.release(first)
+
+        self.assertTrue(first.closed)
+        self.assertIsNot(pool.acquire(FakeConnection), first)
+
+    def test_failed_connect_frees_place(self):
+        """
+        Test a connection that could not be made leaves room in the pool
+        """
+        pool = ConnectionPool(max_size=1, timeout=0.05)
+
+        def fail():
+            raise OSError("Connection refused")
+
+        with self.assertRaises(OSError):
+            pool.acquire(fail)
+        self.assertIsInstance(pool.acquire(FakeConnection), FakeConnection)
+
+
+class PooledBackendTests(SimpleTestCase):
+    """
+    Test the backend giving its connections back to the pool
+    """
+
+    def setUp(self):
+        settings_dict = copy.deepcopy(connection.settings_dict)
+        settings_dict.update(
+            ENGINE="core.backends.postgresql_pool", POOL_SIZE=2, CONN_MAX_AGE=0
+        )
+        self.wrapper = DatabaseWrapper(settings_dict, alias="pool-tests")
+        self.addCleanup(close_idle_connections, "pool-tests")
+        self.addCleanup(self.wrapper.close)
+
+    def test_connections_reused_after_close(self):
+        """
+        Test closing the connection gives it back to the pool
+        """
+        self.wrapper.ensure_connection()
+        raw = self.wrapper.connection
+        self.wrapper.close()
+
+        self.assertFalse(raw.closed)
+        self.wrapper.ensure_connection()
+        self.assertIs(self.wrapper.connection, raw)
+
+    def test_open_transaction_rolled_back_on_close(self):
+        """
+        Test a connection is given back with its transaction rolled back
+        """
+        self.wrapper.ensure_connection()
+        raw = self.wrapper.connection
+        self.wrapper.set_autocommit(False)
+        with self.wrapper.cursor() as cursor:
+            cursor.execute("CREATE TEMPORARY TABLE pooled (id integer)")
+        self.wrapper.close()
+
+        self.wrapper.ensure_connection()
+        self.assertIs(self.wrapper.connection, raw)
+        self.assertTrue(self.wrapper.get_autocommit())
+        with self.wrapper.cursor() as cursor:
+            cursor.execute("SELECT to_regclass('pooled')")
+            self.assertIsNone(cursor.fetchone()[0])
+
+    def test_connection_closed_in_atomic_block_not_reused(self):
+        """
+        Test a connection closed inside an atomic block is closed for good
+        """
+        self.wrapper.ensure_connection()
+        raw = self.wrapper.connection
+        # what atomic() does on entering the block
+        self.wrapper.set_autocommit(False)
+        self.wrapper.in_atomic_block = True
+        self.wrapper.close()
+        self.wrapper.in_atomic_block = False
+
+        self.assertTrue(raw.closed)
@@ -0,0 +1,80 @@
+"""
+Tests for the rank keys
+"""
+import random
+
+from django.test import SimpleTestCase, TestCase
+from django.contrib.auth import get_user_model
+from core.models import Todo
+from core.ranks import rank_between, spread_ranks, rebalance_ranks, rank_ordering
+
+
+class RankBetweenTests(SimpleTestCase):
+    """
+    Test generating ranks
+    """
+
+    def test_rank_between_sorts_between_bounds(self):
+        """
+        Test repeatedly inserting at random positions keeps ranks sorted and unique
+        """
+        ranks = spread_ranks(5)
+        rng = random.Random(0)
+        for _ in range(500):
+            i = rng.randint(0, len(ranks))
+            lower = ranks[i - 1] if i > 0 else None
+            upper = ranks[i] if i < len(ranks) else None
+            ranks.insert(i, rank_between(lower, upper))
+
+        self.assertEqual(ranks, sorted(ranks))
+        self.assertEqual(len(ranks), len(set(ranks)))
+
+    def test_rank_between_adjacent_digits(self):
+        """
+        Test a rank is found between ranks that differ in their last digit by one
+        """
+        rank = rank_between("a", "b")
+
+        self.assertTrue("a" < rank < "b")
+
+    def test_rank_between_invalid_bounds(self):
+        """
+        Test bounds in the wrong order are rejected
+        """
+        with self.assertRaises(ValueError):
+            rank_between("b", "a")
+
+    def test_spread_ranks_are_short_and_sorted(self):
+        """
+        Test spreading ranks uses the fewest digits possible
+        """
+        ranks = spread_ranks(100)
+
+        self.assertEqual(ranks, sorted(ranks))
+        self.assertTrue(all(len(rank) <= 2 for rank in ranks))
+
+
+class RebalanceRanksTests(TestCase):
+    """
+    Test rebalancing the ranks of siblings
+    """
+
+    def test_rebalance_keeps_order_and_shortens_ranks(self):
+        """
+        Test rebalancing keeps ranked items first in their order followed by unranked items
+        """
+        user = get_user_model().objects.create_user(
+            email="user@example.com", password="Awesomeuser123"
+        )
+        todos = [Todo.objects.create(user=user, title="Todo") for _ in range(4)]
+        Todo.objects.filter(id=todos[2].id).update(rank="i" * 30)
+        Todo.objects.filter(id=todos[3].id).update(rank="i")
+
+        rebalance_ranks(Todo, "user_id", user.id)
+
+        ordered = Todo.objects.filter(user=user).order_by(*rank_ordering())
+        self.assertEqual(
+            [todo.id for todo in ordered],
+            [todos[3].id, todos[2].id, todos[0].id, todos[1].id],
+        )
+        self.assertTrue(all(len(todo.rank) == 1 for todo in ordered))
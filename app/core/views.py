@@ -1,6 +1,11 @@
+from django.conf import settings
+from django.http import HttpResponse
+from prometheus_client import CONTENT_TYPE_LATEST
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
+from core.metrics import render_metrics
+
 
 # Create your views here.
 @api_view(["GET"])
@@ -9,3 +14,17 @@ def health_check(request):
     Ping the Api to know if its up
     """
     return Response({"healthy": True})
+
+
+def metrics(request):
+    """
+    Expose the metrics of all the workers in the Prometheus text format,
+    requires the METRICS_TOKEN as a bearer token unless DEBUG is on and no
+    token is set
+    """
+    token = settings.METRICS_TOKEN
+    if not token and not settings.DEBUG:
+        return HttpResponse(status=401)
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        return HttpResponse(status=401)
+    return HttpResponse(render_metrics(), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,78 @@
+"""
+Async views for reading todos and tasks
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
+from rest_framework.exceptions import NotFound
+
+from core.async_views import AsyncReadView
+from core.models import Todo, Task
+from .mixins import data_version_etag
+from .serializers import TodoSerializer, TaskSerializer
+
+
+class TodoReadAsyncView(AsyncReadView):
+    """
+    Base for the todo and task views. Lists the regular view would paginate or
+    stream are handed to it, and the responses are tagged with the ETag of
+    the user's data version as the regular views do
+    """
+
+    serializer_class = None
+    list_ordering = None
+
+    def get_queryset(self, request):
+        raise NotImplementedError
+
+    def handles(self, request, pk=None):
+        return super().handles(request) and (
+            pk is not None or not settings.TODO_PAGE_SIZE
+        )
+
+    async def serves(self, request, pk=None):
+        threshold = settings.TODO_STREAM_THRESHOLD
+        if pk is not None or not threshold:
+            return True
+        return await self.get_queryset(request).acount() <= threshold
+
+    async def get_etag(self, request, pk=None):
+        version = await get_user_model().objects.aget_data_version(request.user.pk)
+        return data_version_etag(request, version, self.renderer.media_type)
+
+    async def get_data(self, request, pk=None):
+        queryset = self.get_queryset(request)
+        if pk is None:
+            items = [item async for item in queryset.order_by(*self.list_ordering)]
+            return self.serializer_class(items, many=True).data
+
+        item = await queryset.filter(pk=pk).afirst()
+        if item is None:
+            raise NotFound()
+        return self.serializer_class(item).data
+
+
+class TodoAsyncView(TodoReadAsyncView):
+    """
+    Lists the todos of the user or retrieves one of them
+    """
+
+    serializer_class = TodoSerializer
+    list_ordering = ["-id"]
+
+    def get_queryset(self, request):
+        return Todo.objects.filter(user=request.user).prefetch_related(
+            Prefetch("tasks", queryset=Task.objects.order_by("ordering", "id"))
+        )
+
+
+class TaskAsyncView(TodoReadAsyncView):
+    """
+    Lists the tasks of the user or retrieves one of them
+    """
+
+    serializer_class = TaskSerializer
+    list_ordering = ["id"]
+
+    def get_queryset(self, request):
+        return Task.objects.filter(todo__user=request.user).select_related("todo")
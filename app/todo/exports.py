@@ -0,0 +1,101 @@
+"""
+Export of the todos and tasks of a user as a gzip compressed archive. Every
+step is a generator so the rows are read, encoded and compressed a chunk at a
+time and the archive is never held in memory
+"""
+import csv
+import io
+import zlib
+from itertools import islice
+
+from django.db.models import Prefetch
+
+from core.models import Todo, Task
+from core.renderers import ORJSONRenderer
+
+CSV_HEADER = [
+    "todo_id",
+    "title",
+    "todo_completed",
+    "last_added",
+    "todo_ordering",
+    "task_id",
+    "task",
+    "task_completed",
+    "task_ordering",
+]
+
+
+def iter_todo_chunks(user, after=None, chunk_size=500):
+    """
+    Yield the user's todos with their tasks in lists of `chunk_size`, in id
+    order starting after the todo with the id `after`
+    """
+    queryset = (
+        Todo.objects.filter(user=user)
+        .prefetch_related(
+            Prefetch("tasks", queryset=Task.objects.order_by("ordering", "id"))
+        )
+        .order_by("id")
+    )
+    if after is not None:
+        queryset = queryset.filter(id__gt=after)
+
+    rows = queryset.iterator(chunk_size=chunk_size)
+    while chunk := list(islice(rows, chunk_size)):
+        yield chunk
+
+
+def encode_json(chunks, serializer_class):
+    """
+    Encode the chunks as a single JSON list
+    """
+    renderer = ORJSONRenderer()
+    yield b"["
+    separator = b""
+    for chunk in chunks:
+        data = serializer_class(chunk, many=True).data
+        yield separator + renderer.render(data)[1:-1]
+        separator = b","
+    yield b"]"
+
+
+def encode_csv(chunks):
+    """
+    Encode the chunks as CSV with a row per task, todos without tasks get a
+    row with empty task columns
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    for chunk in chunks:
+        for todo in chunk:
+            todo_row = [
+                todo.id,
+                todo.title,
+                todo.completed,
+                todo.last_added.isoformat() if todo.last_added else "",
+                todo.ordering,
+            ]
+            tasks = todo.tasks.all()
+            for task in tasks:
+                writer.writerow(
+                    todo_row + [task.id, task.task, task.completed, task.ordering]
+                )
+            if not tasks:
+                writer.writerow(todo_row + ["", "", "", ""])
+
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def gzip_stream(chunks):
+    """
+    Compress the byte chunks into a gzip stream
+    """
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        if compressed := compressor.compress(chunk):
+            yield compressed
+    yield compressor.flush()
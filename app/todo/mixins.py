@@ -1,8 +1,33 @@
+import hashlib
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
 from rest_framework.decorators import action
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import ValidationError, ParseError
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiExample
+from core.models import Tombstone
+from core.renderers import ORJSONRenderer
+from core.response_cache import (
+    drop_responses,
+    get_cache,
+    invalidate_responses,
+    response_key,
+)
+from .parsers import NDJSONParser
+from core.ranks import (
+    rank_between,
+    rebalance_ranks,
+    needs_rebalance,
+    schedule_rebalance,
+)
 
 
 class BatchSerializerMixin:
@@ -19,6 +44,12 @@ class BatchSerializerMixin:
             return data
         raise ValidationError("Could not validate request data")
 
+    def invalidate_responses(self):
+        """
+        Drop the cached list responses of the user making the batch write
+        """
+        invalidate_responses(self.context["request"].user.pk)
+
 
 class BatchUpdateOrderingSerializerMixin(BatchSerializerMixin):
     """
@@ -155,6 +186,223 @@ class BatchRouteMixin:
         return [data]
 
 
+class QueryPlanMixin:
+    """
+    Mixin that applies the select_related and prefetch_related plan declared
+    for the current action in `query_plans`, so that serializing the result
+    runs a fixed number of queries however many rows are returned
+    """
+
+    query_plans = {}
+
+    def apply_query_plan(self, queryset):
+        plan = self.query_plans.get(self.action)
+        if plan is None:
+            return queryset
+
+        if select_related := plan.get("select_related"):
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related := plan.get("prefetch_related"):
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return queryset
+
+    def apply_query_plan_to_objects(self, objs):
+        """
+        Load the relations of the current action's plan onto objects that
+        were not fetched through get_queryset
+        """
+        plan = self.query_plans.get(self.action)
+        if plan is not None:
+            prefetch_related_objects(
+                objs,
+                *plan.get("select_related", []),
+                *plan.get("prefetch_related", []),
+            )
+        return objs
+
+
+class ValuesReadMixin:
+    """
+    Mixin that serves list and retrieve from rows read with values() through
+    the view's `values_serializer_class`, skipping model instances and the
+    fields of the model serializer
+    """
+
+    values_serializer_class = None
+    values_actions = ["list", "retrieve"]
+
+    def use_values(self):
+        # the schema is still built from the model serializer
+        return self.action in self.values_actions and not getattr(
+            self, "swagger_fake_view", False
+        )
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.use_values():
+            return self.values_serializer_class.get_values_queryset(queryset)
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        if self.use_values():
+            return self.values_serializer_class(*args, **kwargs)
+        return super().get_serializer(*args, **kwargs)
+
+
+class ResponseCacheMixin:
+    """
+    Mixin that caches the rendered list responses of every user, answering
+    repeated reads without touching the ORM or the serializers. The entries
+    are dropped by the signals and the batch serializers when the user's
+    todos or tasks change
+    """
+
+    def list(self, request, *args, **kwargs):
+        variant = f"{request.get_full_path()} {request.accepted_media_type}"
+        # the key is taken before reading so that a write made meanwhile
+        # leaves this response under a dropped generation
+        self.response_cache_key = response_key(request.user.pk, variant)
+
+        cached = get_cache().get(self.response_cache_key)
+        if cached is None:
+            return super().list(request, *args, **kwargs)
+
+        etag, content, content_type = cached
+        if_none_match = request.headers.get("If-None-Match", "")
+        if etag and etag.removeprefix("W/") in [
+            tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+        ]:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        response = HttpResponse(content, content_type=content_type)
+        if etag:
+            response["ETag"] = etag
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = getattr(self, "response_cache_key", None)
+        if (
+            key is not None
+            and isinstance(response, Response)
+            and response.status_code == status.HTTP_200_OK
+        ):
+            response.render()
+            get_cache().set(
+                key, (response.get("ETag"), response.content, response["Content-Type"])
+            )
+        return response
+
+
+def data_version_etag(request, version, media_type):
+    """
+    Return the ETag of a read of the user's todos or tasks at a data version
+    """
+    variant = f"{request.get_full_path()} {media_type}"
+    digest = hashlib.md5(variant.encode(), usedforsecurity=False).hexdigest()
+    return f'W/"{request.user.pk}-{version}-{digest[:12]}"'
+
+
+class DataVersionMixin:
+    """
+    Mixin that tags list and retrieve responses with an ETag built from the
+    user's data version, answering `If-None-Match` with a 304 without loading
+    any todo or task. Every write made through the viewset bumps the version
+    """
+
+    def get_etag(self, request):
+        version = get_user_model().objects.get_data_version(request.user.pk)
+        return data_version_etag(request, version, request.accepted_media_type)
+
+    def conditional_response(self, request, handler, *args, **kwargs):
+        etag = self.get_etag(request)
+        if_none_match = request.headers.get("If-None-Match", "")
+        if etag.removeprefix("W/") in [
+            tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+        ]:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        response = handler(request, *args, **kwargs)
+        if status.is_success(response.status_code):
+            response["ETag"] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().retrieve, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if request.method not in SAFE_METHODS and request.user.is_authenticated:
+            get_user_model().objects.bump_data_version(pk=request.user.pk)
+            # a read made between the write and the bump cached the new rows
+            # under the old version's ETag, the bump is committed already
+            drop_responses(request.user.pk)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class StreamingListMixin:
+    """
+    Mixin that streams unpaginated list responses as JSON, reading the rows
+    through a server side cursor and rendering them a chunk at a time so
+    memory stays flat however long the list is. Lists are streamed when the
+    client passes `stream=true` or they hold more than TODO_STREAM_THRESHOLD rows
+    """
+
+    stream_query_param = "stream"
+
+    def should_stream(self, request, queryset):
+        if request.accepted_renderer.format != "json":
+            return False
+        if self.paginator is not None and self.paginator.is_paginated(request):
+            return False
+
+        if request.query_params.get(self.stream_query_param) in ["1", "true"]:
+            return True
+        threshold = settings.TODO_STREAM_THRESHOLD
+        return bool(threshold) and queryset.count() > threshold
+
+    def stream_list(self, queryset):
+        renderer = ORJSONRenderer()
+        chunk_size = settings.TODO_STREAM_CHUNK_SIZE
+        rows = queryset.iterator(chunk_size=chunk_size)
+
+        yield b"["
+        separator = b""
+        while chunk := list(islice(rows, chunk_size)):
+            data = self.get_serializer(chunk, many=True).data
+            # strip the brackets so the chunks join into a single list
+            yield separator + renderer.render(data)[1:-1]
+            separator = b","
+        yield b"]"
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if not self.should_stream(request, queryset):
+            return super().list(request, *args, **kwargs)
+
+        return StreamingHttpResponse(
+            self.stream_list(queryset), content_type="application/json"
+        )
+
+
+class TombstoneMixin:
+    """
+    Mixin that records the ids of deleted items so that clients syncing
+    their changes learn about the deletions
+    """
+
+    def record_deletions(self, ids):
+        Tombstone.objects.record(self.request.user, self.view_name(), ids)
+        invalidate_responses(self.request.user.pk)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            self.record_deletions([instance.id])
+            instance.delete()
+
+
 class BatchUpdateOrderingRouteMixin:  # (BatchRouteMixin):
     """
     Mixin that adds a  `batch_update_ordering` API route to a viewset. To be used with BatchUpdateOrderingSerializerMixin
@@ -248,10 +496,134 @@ class BatchDeleteRouteMixin:
             print("the deel ids", ids)
 
             queryset = self.filter_queryset(self.get_queryset(ids=ids))
-            queryset.delete()
+            with transaction.atomic():
+                self.record_deletions(queryset.values_list("id", flat=True))
+                queryset.delete()
             return Response(
                 self.serializer_class(queryset, many=True).data,
                 status=status.HTTP_204_NO_CONTENT,
             )
         except Exception as e:
             raise ValidationError(e)
+
+
+class ImportRouteMixin:
+    """
+    Mixin that adds an `import` API route to a viewset. Reads newline delimited
+    JSON from the request as it arrives and creates the items a chunk of lines
+    at a time, every chunk in its own transaction. A chunk holding an invalid
+    item is not created, the other chunks are
+    """
+
+    def import_chunk(self, serializer, lines):
+        rows, errors = [], []
+        for number, data in lines:
+            try:
+                rows.append(serializer.child.run_validation(data))
+            except ValidationError as e:
+                errors.append({"line": number, "errors": e.detail})
+
+        result = {"first_line": lines[0][0], "last_line": lines[-1][0], "created": 0}
+        if errors:
+            result["errors"] = errors
+            return result
+
+        try:
+            with transaction.atomic():
+                serializer.create([{**row, "user": self.request.user} for row in rows])
+        except ValidationError as e:
+            result["errors"] = e.detail
+            return result
+        result["created"] = len(rows)
+        return result
+
+    @action(
+        detail=False,
+        methods=["POST"],
+        url_path="import",
+        url_name="import",
+        parser_classes=[NDJSONParser],
+    )
+    def batch_import(self, request, *args, **kwargs):
+        serializer = self.get_serializer(
+            many=True, type="batch_create", view_name=self.view_name()
+        )
+        chunk_size = settings.TODO_IMPORT_CHUNK_SIZE
+        lines = iter(request.data)
+        chunks = []
+
+        while True:
+            try:
+                chunk = list(islice(lines, chunk_size))
+            except ParseError as e:
+                chunks.append({"created": 0, "errors": [e.detail]})
+                break
+            if not chunk:
+                break
+            chunks.append(self.import_chunk(serializer, chunk))
+
+        return Response(
+            {"created": sum(chunk["created"] for chunk in chunks), "chunks": chunks},
+            status=status.HTTP_200_OK,
+        )
+
+
+class MoveRouteMixin:
+    """
+    Mixin that adds a `move` API route to a viewset. Places an item between two
+    of its siblings by rewriting only the rank of the moved item
+    """
+
+    rank_parent_field = None
+
+    def validate_neighbour_ids(self, data):
+        try:
+            return {
+                field: int(data[field]) if data.get(field) is not None else None
+                for field in ["after", "before"]
+            }
+        except (TypeError, ValueError):
+            raise ValidationError("Int is required as field value")
+
+    @action(detail=True, methods=["PATCH"], url_name="move")
+    def move(self, request, *args, **kwargs):
+        instance = self.get_object()
+        model = type(instance)
+        parent_id = getattr(instance, self.rank_parent_field)
+
+        neighbours = self.validate_neighbour_ids(request.data)
+        neighbour_ids = [i for i in neighbours.values() if i is not None]
+        if not neighbour_ids:
+            raise ValidationError("The item to place after or before is required")
+        if instance.id in neighbour_ids:
+            raise ValidationError("Cannot move an item next to itself")
+
+        siblings = model.objects.filter(**{self.rank_parent_field: parent_id})
+        ranks = dict(siblings.filter(id__in=neighbour_ids).values_list("id", "rank"))
+        if len(ranks) != len(neighbour_ids):
+            raise ValidationError("Items can only be moved between their siblings")
+
+        if None in ranks.values():
+            # first move among these siblings, rank all of them once
+            objs = rebalance_ranks(model, self.rank_parent_field, parent_id)
+            ranks = {obj.id: obj.rank for obj in objs}
+
+        try:
+            rank = rank_between(
+                ranks.get(neighbours["after"]), ranks.get(neighbours["before"])
+            )
+        except ValueError:
+            raise ValidationError(
+                "The item to place after must come before the item to place before"
+            )
+
+        model.objects.filter(pk=instance.pk).update(
+            rank=rank, updated_at=timezone.now()
+        )
+        instance.rank = rank
+        # the rank is written by a single statement committed already
+        drop_responses(request.user.pk)
+        if needs_rebalance(rank):
+            schedule_rebalance(model, self.rank_parent_field, parent_id)
+
+        return Response(self.get_serializer(instance).data, status=status.HTTP_200_OK)
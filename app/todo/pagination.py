@@ -0,0 +1,241 @@
+"""
+Pagination for Todo API
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opaque cursor pagination seeking on (ordering field, id) so that the cost
+    of a page does not depend on how deep the client has paged.
+    Pagination only applies when a page size is configured through the
+    TODO_PAGE_SIZE setting or requested with the `page_size` query param,
+    otherwise the full list is returned as before.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    ordering_query_param = "ordering"
+    ordering_fields = ["id", "ordering"]
+    invalid_cursor_message = "Invalid cursor"
+
+    def __init__(self):
+        self.page_size = getattr(settings, "TODO_PAGE_SIZE", None)
+        self.max_page_size = getattr(settings, "TODO_MAX_PAGE_SIZE", 1000)
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def get_ordering(self, request, view):
+        """
+        Return the requested ordering if it is allowed, falling back to the
+        view's default ordering
+        """
+        ordering = request.query_params.get(self.ordering_query_param)
+        if ordering and ordering.lstrip("-") in self.ordering_fields:
+            return ordering
+        return getattr(view, "pagination_ordering", "-id")
+
+    def get_keys(self, ordering):
+        """
+        Return the (field, descending) pairs to seek on. The id is always
+        used as the tie breaker so every position in the list is unique
+        """
+        field = ordering.lstrip("-")
+        descending = ordering.startswith("-")
+        if field == "id":
+            return [("id", descending)]
+        return [(field, descending), ("id", descending)]
+
+    def encode_cursor(self, position, reverse):
+        data = {"o": self.ordering, "p": position, "r": int(reverse)}
+        encoded = urlsafe_b64encode(json.dumps(data).encode("ascii"))
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded.decode("ascii")
+        )
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+
+        try:
+            data = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            position, reverse = data["p"], bool(data["r"])
+            if data["o"] != self.ordering or len(position) != len(self.keys):
+                raise ValueError
+            for field, value in zip(self.key_names, position):
+                if value is None and field in self.nullable_keys:
+                    continue
+                if not isinstance(value, int) or isinstance(value, bool):
+                    raise ValueError
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def get_order_by(self, reverse):
+        """
+        Order by every key with NULL above every value, as PostgreSQL does by
+        default, so the seek below matches the order of the rows
+        """
+        return [
+            F(field).desc(nulls_first=True)
+            if descending != reverse
+            else F(field).asc(nulls_last=True)
+            for field, descending in self.keys
+        ]
+
+    def seek_key(self, field, value, descending):
+        """
+        Return the rows past `value` on a single key, None when there are none
+        """
+        if value is None:
+            return Q(**{f"{field}__isnull": False}) if descending else None
+        condition = Q(**{f"{field}__{'lt' if descending else 'gt'}": value})
+        if not descending and field in self.nullable_keys:
+            condition |= Q(**{f"{field}__isnull": True})
+        return condition
+
+    def seek_filter(self, position, reverse):
+        """
+        Build the row comparison `(k1, k2) > (v1, v2)` as nested lookups
+        honouring the direction of every key
+        """
+        seek = Q()
+        for i, (field, descending) in enumerate(self.keys):
+            condition = self.seek_key(field, position[i], descending != reverse)
+            if condition is None:
+                continue
+            for j in range(i):
+                # an exact lookup on None is turned into isnull
+                condition &= Q(**{self.key_names[j]: position[j]})
+            seek |= condition
+        return seek
+
+    def get_position(self, instance):
+        if isinstance(instance, dict):
+            return [instance[field] for field in self.key_names]
+        return [getattr(instance, field) for field in self.key_names]
+
+    def is_paginated(self, request):
+        return bool(
+            self.get_page_size(request)
+            or self.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_paginated(request):
+            return None
+
+        self.page_size = self.get_page_size(request)
+
+        self.page_size = self.page_size or self.max_page_size
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, view)
+        self.keys = self.get_keys(self.ordering)
+        self.key_names = [field for field, _ in self.keys]
+        self.nullable_keys = {
+            field
+            for field in self.key_names
+            if queryset.model._meta.get_field(field).null
+        }
+
+        position, reverse = self.decode_cursor(request)
+
+        queryset = queryset.order_by(*self.get_order_by(reverse))
+        if position is not None:
+            queryset = queryset.filter(self.seek_filter(position, reverse))
+
+        results = list(queryset[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[: self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.get_position(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.get_position(self.page[0]), reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+            {
+                "name": self.ordering_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Which field to use when ordering the results.",
+                "schema": {
+                    "type": "string",
+                    "enum": [
+                        prefix + field
+                        for field in self.ordering_fields
+                        for prefix in ("", "-")
+                    ],
+                },
+            },
+        ]
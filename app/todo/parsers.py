@@ -0,0 +1,32 @@
+"""
+Parsers for Todo API
+"""
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from core.parsers import loads
+
+
+class NDJSONParser(BaseParser):
+    """
+    Parser for newline delimited JSON. The body is read lazily, the parsed
+    data is a generator of (line number, value) pairs for the non empty lines
+    """
+
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        return self.iter_lines(stream, encoding)
+
+    def iter_lines(self, stream, encoding):
+        for number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield number, loads(line.decode(encoding))
+            except ValueError:
+                raise ParseError(f"Invalid JSON on line {number}")
@@ -1,18 +1,22 @@
 """
 Serializers for Todo API
 """
+import copy
 
 from rest_framework import serializers, exceptions
-from core.models import Todo, Task
+from django.contrib.auth import get_user_model
+from core.models import Todo, Task, Tombstone
+from core.bulk import changed_columns_update, values_update
 from .mixins import (
     BatchUpdateOrderingSerializerMixin,
     BatchUpdateSerializerMixin,
     BatchDeleteSerializerMixin,
     BatchCreateSerializerMixin,
 )
-from django.db import IntegrityError
-from django.db.models import Max
-from collections import defaultdict
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import DataError, IntegrityError, transaction
+from django.db.models import F, Max
+from collections import Counter, defaultdict
 from django.utils import timezone
 
 
@@ -23,25 +27,44 @@ class BatchOrderingUpdateSerializer(
     Serializer for Todo for updating batch or multiple Todo Ordering
     """
 
-    def update(self, instance, validated_data):
+    def raise_parent_orderings(self, obj):
         """
-        Update Model Orderings
+        Keep the ordering counters of the parents ahead of the new orderings
         """
+        if self.child.Meta.model is Todo:
+            parent_model, parent_field = get_user_model(), "user_id"
+        else:
+            parent_model, parent_field = Todo, "todo_id"
 
-        ordering_list = [obj.pop("ordering", None) for obj in validated_data]
-
-        obj_result = []
+        highest_orderings = defaultdict(int)
+        for object in obj:
+            if object.ordering is not None:
+                parent_id = getattr(object, parent_field)
+                highest_orderings[parent_id] = max(
+                    highest_orderings[parent_id], object.ordering
+                )
+        parent_model.objects.raise_orderings(highest_orderings)
 
-        for i, instance_obj in enumerate(instance):
-            instance_obj.ordering = ordering_list[i]
-            obj_result.append(instance_obj)
+    def update(self, instance, validated_data):
+        """
+        Update Model Orderings
+        """
+        rows = [
+            {"id": int(obj["id"]), "ordering": obj.get("ordering")}
+            for obj in validated_data
+        ]
 
         try:
-            self.child.Meta.model.objects.bulk_update(obj_result, ["ordering"])
+            with transaction.atomic():
+                obj_result = values_update(
+                    self.child.Meta.model, rows, ["ordering"], scope=instance
+                )
+                self.raise_parent_orderings(obj_result)
         except IntegrityError as e:
             raise serializers.ValidationError(detail=e)
+        self.invalidate_responses()
 
-        return obj_result
+        return self.context["view"].apply_query_plan_to_objects(obj_result)
 
     class Meta:
         fields = ["id", "ordering"]
@@ -53,60 +76,78 @@ class BatchUpdateSerializer(BatchUpdateSerializerMixin, serializers.ListSerializ
     Serializer for Todo for updating batch or multiple Todo Ordering
     """
 
-    def update_obj_instance(self, instance, validated_data):
-        todo_result = []
-        fields = []
+    # the columns each view lets a batch update change
+    update_fields = {"todo": ["title", "completed"], "task": ["task", "completed"]}
 
-        update_obj = list(zip(instance, validated_data))
-        for objs in update_obj:
-            ins, obj = list(objs)
-            for attrs in list(obj.keys()):
-                ins.attrs = obj[attrs]
-            todo_result.append(ins)
-            fields.extend(list(obj.keys()))
-        return todo_result, fields
+    def update_changed(self, instance, validated_data):
+        """
+        Write the columns the rows change, returning the instances of the rows
+        in the order they were given
+        """
+        fields = self.update_fields[self.context["view"].view_name()]
+        scope, instance = instance, list(instance)
+        try:
+            changed_columns_update(instance, validated_data, fields, scope=scope)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(detail=e.messages)
+
+        by_id = {obj.id: obj for obj in instance}
+        result = {}
+        for obj in validated_data:
+            id = int(obj["id"])
+            if id in by_id:
+                result[id] = by_id[id]
+        return list(result.values())
 
     def todo_view_update(self, instance, validated_data):
-        todo_result, fields = self.update_obj_instance(instance, validated_data)
-
-        try:
-            self.child.Meta.model.objects.bulk_update(todo_result, list(set(fields)))
-        except IntegrityError as e:
-            raise serializers.ValidationError(detail=e)
-        return todo_result
+        return self.update_changed(instance, validated_data)
 
     def task_view_update(self, instance, validated_data):
-        todo_last_added = [task.pop("todo_last_added", None) for task in validated_data]
+        task_result = self.update_changed(instance, validated_data)
+
+        tasks = {task.id: task for task in task_result}
+        last_added = {}
+        for obj in validated_data:
+            task = tasks.get(int(obj["id"]))
+            if task is not None and obj.get("todo_last_added"):
+                last_added[
+                    task.todo_id
+                ] = serializers.DateTimeField().to_internal_value(
+                    obj["todo_last_added"]
+                )
 
-        task_result, fields = self.update_obj_instance(instance, validated_data)
-        todo_list = []
-        for i, task in enumerate(task_result):
-            if todo_last_added[i]:
-                task.todo.last_added = todo_last_added[i]
-                todo_list.append(task.todo)
-        try:
-            self.child.Meta.model.objects.bulk_update(task_result, fields)
-        except IntegrityError as e:
-            raise serializers.ValidationError(detail=e)
-        if todo_list:
-            try:
-                Todo.objects.bulk_update(todo_list, ["last_added"])
-            except IntegrityError as e:
-                raise serializers.ValidationError(detail=e)
+        rows = [{"id": id, "last_added": value} for id, value in last_added.items()]
+        todos = values_update(
+            Todo,
+            rows,
+            ["last_added"],
+            scope=Todo.objects.filter(user=self.context["request"].user),
+        )
+        todos = {todo.id: todo for todo in todos}
+        for task in task_result:
+            if task.todo_id in todos:
+                task.todo.last_added = todos[task.todo_id].last_added
+                task.todo.updated_at = todos[task.todo_id].updated_at
         return task_result
 
     def update(self, instance, validated_data):
         """
-        Update Model Orderings
+        Update the changed properties of the models
         """
         view_name = self.context["view"].view_name()
-        [obj.pop("id", None) for obj in validated_data]
 
-        if view_name == "todo":
-            return self.todo_view_update(instance, validated_data)
+        result = None
+        try:
+            with transaction.atomic():
+                if view_name == "todo":
+                    result = self.todo_view_update(instance, validated_data)
 
-        if view_name == "task":
-            return self.task_view_update(instance, validated_data)
+                if view_name == "task":
+                    result = self.task_view_update(instance, validated_data)
+        except (IntegrityError, DataError) as e:
+            raise serializers.ValidationError(detail=e)
+        self.invalidate_responses()
+        return result
 
     class Meta:
         fields = ["id", "ordering"]
@@ -120,34 +161,30 @@ class BatchCreateSerializer(BatchCreateSerializerMixin, serializers.ListSerializ
 
     def increment_obj_ordering_todo(self, obj):
         user = self.context["request"].user
+        first_ordering = get_user_model().objects.reserve_orderings(user.id, len(obj))
         for i, object in enumerate(obj):
-            user_todos = Todo.objects.filter(user=user)
-            user_todos_count = user_todos.count()
-            object.ordering = user_todos_count + (i + 1)
+            object.ordering = first_ordering + i
 
     def increment_obj_ordering_task(self, obj):
-        obj_count = defaultdict(int)
+        obj_count = Counter(object.todo_id for object in obj)
+        next_ordering = Todo.objects.reserve_orderings_in_bulk(obj_count)
 
         for object in obj:
-            todo_tasks = Task.objects.filter(todo__id=object.todo_id)
-            obj_count[object.todo_id] += 1
-            todo_tasks_count = todo_tasks.count()
-            object.ordering = todo_tasks_count + obj_count[object.todo_id]
+            # unknown todos are left without an ordering and fail on insert
+            if object.todo_id in next_ordering:
+                object.ordering = next_ordering[object.todo_id]
+                next_ordering[object.todo_id] += 1
 
     def assign_bulk_tasks_todo_id(self, tasks, todo_list):
         bulk_task = []
         for i, task in enumerate(tasks):
-            if len(task) > 1:
-                for task_obj in task:
-                    task_obj["todo_id"] = todo_list[i].id
-                    bulk_task.append(task_obj)
-            else:
-                if len(task) > 0:
-                    task[0]["todo_id"] = todo_list[i].id
-                    bulk_task.append(task[0])
+            # the todos are new so their tasks are numbered from the start
+            for ordering, task_obj in enumerate(task or [], start=1):
+                task_obj["todo_id"] = todo_list[i].id
+                task_obj["ordering"] = ordering
+                bulk_task.append(task_obj)
 
         task_result = [Task(**attrs) for attrs in bulk_task]
-        self.increment_obj_ordering_task(task_result)
 
         try:
             Task.objects.bulk_create(task_result)
@@ -160,6 +197,8 @@ class BatchCreateSerializer(BatchCreateSerializerMixin, serializers.ListSerializ
 
         todo_result = [self.child.Meta.model(**attrs) for attrs in validated_data]
         self.increment_obj_ordering_todo(todo_result)
+        for todo, todo_tasks in zip(todo_result, tasks):
+            todo.next_ordering = len(todo_tasks or []) + 1
 
         try:
             self.child.Meta.model.objects.bulk_create(todo_result)
@@ -169,7 +208,7 @@ class BatchCreateSerializer(BatchCreateSerializerMixin, serializers.ListSerializ
 
         self.assign_bulk_tasks_todo_id(tasks, todo_result)
 
-        return todo_result
+        return self.context["view"].apply_query_plan_to_objects(todo_result)
 
     def task_view_create(self, validated_data):
         todo_last_added = [task.pop("todo_last_added", None) for task in validated_data]
@@ -177,13 +216,16 @@ class BatchCreateSerializer(BatchCreateSerializerMixin, serializers.ListSerializ
         task_result = [self.child.Meta.model(**task) for task in validated_data]
 
         self.increment_obj_ordering_task(task_result)
+        # load the todos of all the tasks at once, tasks of a todo share it
+        self.context["view"].apply_query_plan_to_objects(task_result)
 
-        todo_list = []
+        todo_list = {}
 
         for i, task in enumerate(task_result):
             if todo_last_added[i]:
                 task.todo.last_added = todo_last_added[i]
-                todo_list.append(task.todo)
+                task.todo.updated_at = timezone.now()
+                todo_list[task.todo.id] = task.todo
 
         try:
             self.child.Meta.model.objects.bulk_create(task_result)
@@ -192,7 +234,14 @@ class BatchCreateSerializer(BatchCreateSerializerMixin, serializers.ListSerializ
 
         if todo_list:
             try:
-                Todo.objects.bulk_update(todo_list, ["last_added"])
+                values_update(
+                    Todo,
+                    [
+                        {"id": todo.id, "last_added": todo.last_added}
+                        for todo in todo_list.values()
+                    ],
+                    ["last_added"],
+                )
             except IntegrityError as e:
                 raise serializers.ValidationError(detail=e)
 
@@ -201,11 +250,14 @@ class BatchCreateSerializer(BatchCreateSerializerMixin, serializers.ListSerializ
     def create(self, validated_data):
         view_name = self.context["view"].view_name()
 
+        result = None
         if view_name == "todo":
-            return self.todo_view_create(validated_data)
+            result = self.todo_view_create(validated_data)
 
         if view_name == "task":
-            return self.task_view_create(validated_data)
+            result = self.task_view_create(validated_data)
+        self.invalidate_responses()
+        return result
 
     class Meta:
         fields = ["id", "title", "tasks", "last_added", "completed", "ordering"]
@@ -220,7 +272,10 @@ class BatchDeleteSerializer(BatchDeleteSerializerMixin, serializers.ListSerializ
 
 class SerializerGetListSerializerClassInitMixin:
     """
-    Mixin to allow setting the list_serializer_class for a serializer
+    Mixin to allow setting the list_serializer_class for a serializer. The
+    list serializer and read only fields are picked for each instance from
+    the `type` and `view_name` it is given, the class is never changed so
+    serializers can be built by concurrent requests
     """
 
     list_serializer_type_classes = {
@@ -230,34 +285,75 @@ class SerializerGetListSerializerClassInitMixin:
         "batch_create": BatchCreateSerializer,
     }
 
-    def __init__(self, *args, **kwargs):
-        list_serializer_type = kwargs.pop("type", None)
+    # read only fields of each view by list serializer type, the None entry
+    # is used for the other types. Without a view the Meta ones are used
+    view_read_only_fields = {
+        "todo": {
+            "batch_create": ["id", "ordering"],
+            "batch_update_ordering": ["id", "last_added"],
+            None: ["id", "last_added", "ordering"],
+        },
+        "task": {
+            "batch_create": ["ordering"],
+            "batch_update_ordering": [],
+            None: ["todo_last_added", "ordering"],
+        },
+    }
 
-        view_name = kwargs.pop("view_name", None)
+    # fields built for each serializer class, view and type, copied by every
+    # instance. Concurrent builds of the same entry store equal fields
+    prepared_fields = {}
 
-        if view_name == "todo":
-            if list_serializer_type == "batch_create":
-                self.Meta.read_only_fields = ["id", "ordering"]
-            elif list_serializer_type == "batch_update_ordering":
-                self.Meta.read_only_fields = ["id", "last_added"]
-            else:
-                self.Meta.read_only_fields = ["id", "last_added", "ordering"]
-        if view_name == "task":
-            if list_serializer_type == "batch_create":
-                self.Meta.read_only_fields = ["ordering"]
-            elif list_serializer_type == "batch_update_ordering":
-                self.Meta.read_only_fields = []
-            else:
-                self.Meta.read_only_fields = ["todo_last_added", "ordering"]
+    def __init__(self, *args, **kwargs):
+        self.list_serializer_type = kwargs.pop("type", None)
+        self.view_name = kwargs.pop("view_name", None)
 
         # Instantiate the superclass normally
         super().__init__(*args, **kwargs)
 
-        # set the list serializer based on the list_serializer_type
-        if list_serializer_type is not None:
-            self.Meta.list_serializer_class = self.list_serializer_type_classes[
-                list_serializer_type
-            ]
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        """
+        Use the list serializer of the `type` given, the Meta one without it
+        """
+        list_serializer_type = kwargs.get("type")
+        if list_serializer_type is None:
+            return super().many_init(*args, **kwargs)
+
+        list_kwargs = {
+            key: kwargs.pop(key)
+            for key in ["allow_empty", "max_length", "min_length"]
+            if key in kwargs
+        }
+        list_kwargs["child"] = cls(*args, **kwargs)
+        list_kwargs.update(
+            {
+                key: value
+                for key, value in kwargs.items()
+                if key in serializers.LIST_SERIALIZER_KWARGS
+            }
+        )
+        list_serializer_class = cls.list_serializer_type_classes[list_serializer_type]
+        return list_serializer_class(*args, **list_kwargs)
+
+    def get_read_only_fields(self):
+        read_only_fields = self.view_read_only_fields.get(self.view_name)
+        if read_only_fields is None:
+            return getattr(self.Meta, "read_only_fields", None) or []
+        return read_only_fields.get(self.list_serializer_type, read_only_fields[None])
+
+    def get_extra_kwargs(self):
+        extra_kwargs = copy.deepcopy(getattr(self.Meta, "extra_kwargs", {}))
+        for field_name in self.get_read_only_fields():
+            extra_kwargs.setdefault(field_name, {})["read_only"] = True
+        return extra_kwargs
+
+    def get_fields(self):
+        key = (type(self), self.view_name, self.list_serializer_type)
+        fields = self.prepared_fields.get(key)
+        if fields is None:
+            fields = self.prepared_fields[key] = super().get_fields()
+        return copy.deepcopy(fields)
 
 
 class TaskSerializer(
@@ -271,6 +367,7 @@ class TaskSerializer(
     todo_last_added = serializers.DateTimeField(
         source="todo.last_added", required=False
     )
+    rank = serializers.CharField(read_only=True)
 
     class Meta:
         list_serializer_class = BatchOrderingUpdateSerializer
@@ -282,6 +379,7 @@ class TaskSerializer(
             "todo_id",
             "todo_last_added",
             "ordering",
+            "rank",
         ]  #
         read_only = ["todo_last_added", "ordering"]
 
@@ -315,8 +413,8 @@ class TaskTodoSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Task
-        fields = ["id", "task", "completed", "ordering"]
-        read_only_fields = ["ordering"]
+        fields = ["id", "task", "completed", "ordering", "rank"]
+        read_only_fields = ["ordering", "rank"]
 
 
 class TodoSerializer(
@@ -329,16 +427,74 @@ class TodoSerializer(
     tasks = TaskTodoSerializer(
         many=True, required=False
     )  # serializers.StringRelatedField(many=True)
+    rank = serializers.CharField(read_only=True)
+
+    # fields of the tasks written when syncing the tasks of a todo
+    task_fields_to_sync = ["task", "completed"]
 
     def _get_or_create_tasks(self, tasks, todo):
         """
         Handle getting or creating a tasks as needed
         """
         for task in tasks:
+            task.pop("id", None)
             task_obj, created = Task.objects.get_or_create(todo=todo, **task)
             # task_obj.increment_ordering
             todo.tasks.add(task_obj)
 
+    def _tasks_with_ids(self, tasks):
+        """
+        Give the validated tasks the ids they were sent with. The ids are read
+        only so that no other route creates tasks with the ids of the client
+        """
+        sent = self.initial_data.get("tasks") or []
+        for task, data in zip(tasks, sent):
+            if isinstance(data, dict) and data.get("id") is not None:
+                task["id"] = serializers.IntegerField().to_internal_value(data["id"])
+        return tasks
+
+    def _sync_tasks(self, tasks, todo):
+        """
+        Make the tasks of the todo match the given tasks. Tasks are matched on
+        their id, the matched tasks that changed are updated, the tasks
+        without a known id created and the tasks left out deleted, with a
+        single statement each
+        """
+        existing = {
+            task["id"]: task
+            for task in todo.tasks.values("id", *self.task_fields_to_sync)
+        }
+        ids = [task["id"] for task in tasks if task.get("id") in existing]
+        if len(ids) != len(set(ids)):
+            raise ValueError("A task can only be given once")
+
+        changed, created = [], []
+        for task in tasks:
+            current = existing.get(task.get("id"))
+            if current is None:
+                task.pop("id", None)
+                created.append(task)
+                continue
+            row = {**current, **task}
+            if row != current:
+                changed.append(row)
+
+        deleted_ids = list(set(existing) - set(ids))
+        if deleted_ids:
+            Tombstone.objects.record(todo.user, "task", deleted_ids)
+            Task.objects.filter(todo=todo, id__in=deleted_ids).delete()
+
+        values_update(Task, changed, self.task_fields_to_sync, scope=todo.tasks.all())
+
+        if created:
+            first_ordering = Todo.objects.reserve_orderings(todo.id, len(created))
+            Task.objects.bulk_create(
+                [
+                    Task(todo=todo, ordering=first_ordering + i, **task)
+                    for i, task in enumerate(created)
+                ]
+            )
+
     def create(self, validated_data):
         """
         Create a Todo
@@ -359,17 +515,15 @@ class TodoSerializer(
         Update a Todo
         """
         try:
-            tasks = validated_data.pop("tasks", None)
-            if tasks is not None:
-                for task in instance.tasks.all():
-                    task.delete()
-
-                self._get_or_create_tasks(tasks, instance)
+            with transaction.atomic():
+                tasks = validated_data.pop("tasks", None)
+                if tasks is not None:
+                    self._sync_tasks(self._tasks_with_ids(tasks), instance)
 
-            for attr, value in validated_data.items():
-                setattr(instance, attr, value)
+                for attr, value in validated_data.items():
+                    setattr(instance, attr, value)
 
-            instance.save()
+                instance.save()
             return instance
         except Exception as e:
             raise exceptions.ValidationError(
@@ -379,5 +533,145 @@ class TodoSerializer(
     class Meta:
         list_serializer_class = BatchOrderingUpdateSerializer
         model = Todo
-        fields = ["id", "title", "tasks", "last_added", "completed", "ordering"]
+        fields = ["id", "title", "tasks", "last_added", "completed", "ordering", "rank"]
         read_only_fields = ["id", "last_added", "ordering"]
+
+
+class SyncTodoSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the todos returned by the sync endpoint, their tasks
+    are synced separately
+    """
+
+    class Meta:
+        model = Todo
+        fields = [
+            "id",
+            "title",
+            "last_added",
+            "completed",
+            "ordering",
+            "rank",
+            "updated_at",
+        ]
+        read_only_fields = fields
+
+
+class SyncTaskSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the tasks returned by the sync endpoint
+    """
+
+    todo_id = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Task
+        fields = [
+            "id",
+            "task",
+            "completed",
+            "todo_id",
+            "ordering",
+            "rank",
+            "updated_at",
+        ]
+        read_only_fields = fields
+
+
+class ValuesSerializer:
+    """
+    Read only serializer of rows read with values(), giving the same data as
+    the model serializer it stands for without building model instances or
+    going through the serializer fields
+    """
+
+    fields = []
+    datetime_fields = []
+    # values read under another name, by the name given to them
+    expressions = {}
+
+    datetime_field = serializers.DateTimeField()
+
+    def __init__(self, instance=None, many=False, **kwargs):
+        self.instance = instance
+        self.many = many
+
+    @classmethod
+    def get_values_queryset(cls, queryset):
+        """
+        Read the rows of the queryset as dicts holding the serialized fields
+        """
+        names = [field for field in cls.fields if field not in cls.expressions]
+        return queryset.prefetch_related(None).values(*names, **cls.expressions)
+
+    def to_representation(self, row):
+        data = {field: row[field] for field in self.fields}
+        for field in self.datetime_fields:
+            if data[field] is not None:
+                data[field] = self.datetime_field.to_representation(data[field])
+        return data
+
+    def rows_representation(self, rows):
+        return [self.to_representation(row) for row in rows]
+
+    @property
+    def data(self):
+        if self.many:
+            return self.rows_representation(list(self.instance))
+        return self.rows_representation([self.instance])[0]
+
+
+class TaskValuesSerializer(ValuesSerializer):
+    """
+    Values serializer of TaskSerializer
+    """
+
+    fields = TaskSerializer.Meta.fields
+    datetime_fields = ["todo_last_added"]
+    expressions = {"todo_last_added": F("todo__last_added")}
+
+
+class TaskTodoValuesSerializer(ValuesSerializer):
+    """
+    Values serializer of TaskTodoSerializer, the tasks are read with the id of
+    their todo
+    """
+
+    fields = TaskTodoSerializer.Meta.fields
+
+    @classmethod
+    def get_values_queryset(cls, queryset):
+        return queryset.values("todo_id", *cls.fields)
+
+
+class TodoValuesSerializer(ValuesSerializer):
+    """
+    Values serializer of TodoSerializer, the tasks of the todos are read with
+    a single query and grouped onto their todo
+    """
+
+    fields = TodoSerializer.Meta.fields
+    datetime_fields = ["last_added"]
+
+    @classmethod
+    def get_values_queryset(cls, queryset):
+        names = [field for field in cls.fields if field != "tasks"]
+        return queryset.prefetch_related(None).values(*names)
+
+    def get_tasks(self, todo_ids):
+        """
+        Return the serialized tasks of the todos by todo id
+        """
+        queryset = Task.objects.filter(todo_id__in=todo_ids).order_by("ordering", "id")
+        serializer = TaskTodoValuesSerializer()
+
+        tasks = defaultdict(list)
+        for row in TaskTodoValuesSerializer.get_values_queryset(queryset):
+            tasks[row["todo_id"]].append(serializer.to_representation(row))
+        return tasks
+
+    def rows_representation(self, rows):
+        tasks = self.get_tasks([row["id"] for row in rows]) if rows else {}
+        for row in rows:
+            row["tasks"] = tasks.get(row["id"], [])
+        return [self.to_representation(row) for row in rows]
@@ -0,0 +1,26 @@
+"""
+Signals for the Todo app
+"""
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from core.models import Todo, Task
+from core.response_cache import invalidate_responses
+
+
+# deletions are invalidated where their tombstones are recorded, a post_delete
+# receiver would make django load every row before deleting it
+@receiver(post_save, sender=Todo)
+def drop_cached_todo_responses(sender, instance, **kwargs):
+    """
+    Drop the cached responses of the owner of a saved todo
+    """
+    invalidate_responses(instance.user_id)
+
+
+@receiver(post_save, sender=Task)
+def drop_cached_task_responses(sender, instance, **kwargs):
+    """
+    Drop the cached responses of the owner of a saved task
+    """
+    invalidate_responses(instance.todo.user_id)
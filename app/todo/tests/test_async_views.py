@@ -0,0 +1,188 @@
+"""
+Tests for the async read views of the ASGI entry point
+"""
+import gzip
+import json
+
+from asgiref.sync import sync_to_async
+from django.test import TestCase, AsyncClient, override_settings
+from django.contrib.auth import get_user_model
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from core.models import Todo, Task
+from user.authentication import token_cache
+
+TODO_URL = "/api/todo/todos/"
+TASK_URL = "/api/todo/tasks/"
+ME_URL = "/api/user/me/"
+
+
+def create_user(email="user@example.com", password="Awesomeuser123"):
+    """
+    Create and return a user
+    """
+    return get_user_model().objects.create_user(
+        email=email, password=password, first_name="Test", last_name="User"
+    )
+
+
+@override_settings(ROOT_URLCONF="app.asgi_urls")
+class AsyncReadViewTests(TestCase):
+    """
+    Test the async views return what the regular views return
+    """
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = create_user()
+        self.token = Token.objects.create(user=self.user)
+        self.headers = {"Authorization": f"Token {self.token.key}"}
+        self.todo = Todo.objects.create(user=self.user, title="Todo 1")
+        self.task = Task.objects.create(todo=self.todo, task="Task 1")
+        Todo.objects.create(user=self.user, title="Todo 2")
+
+        self.client = AsyncClient()
+
+        sync_client = APIClient()
+        sync_client.force_authenticate(self.user)
+        self.todo_detail_url = f"{TODO_URL}{self.todo.id}/"
+        self.task_detail_url = f"{TASK_URL}{self.task.id}/"
+        self.sync_client = sync_client
+        with override_settings(ROOT_URLCONF="app.urls"):
+            responses = {
+                url: sync_client.get(url)
+                for url in [
+                    TODO_URL,
+                    TASK_URL,
+                    self.todo_detail_url,
+                    self.task_detail_url,
+                ]
+            }
+        self.expected = {url: json.loads(res.content) for url, res in responses.items()}
+        self.expected_etags = {url: res["ETag"] for url, res in responses.items()}
+
+    async def test_lists_match_regular_views(self):
+        """
+        Test the async todo and task lists match the regular lists
+        """
+        for url in [TODO_URL, TASK_URL]:
+            res = await self.client.get(url, headers=self.headers)
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(json.loads(res.content), self.expected[url])
+
+    async def test_retrieve_matches_regular_views(self):
+        """
+        Test retrieving a todo and a task matches the regular views
+        """
+        for url in [self.todo_detail_url, self.task_detail_url]:
+            res = await self.client.get(url, headers=self.headers)
+
+            self.assertEqual(json.loads(res.content), self.expected[url])
+
+    async def test_retrieve_other_users_todo_not_found(self):
+        """
+        Test the todos of other users are not returned
+        """
+        other_user = await get_user_model().objects.acreate(email="other@example.com")
+        todo = await Todo.objects.acreate(user=other_user, title="Other")
+
+        res = await self.client.get(f"{TODO_URL}{todo.id}/", headers=self.headers)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_me(self):
+        """
+        Test retrieving the authenticated user
+        """
+        res = await self.client.get(ME_URL, headers=self.headers)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(res.content)["email"], self.user.email)
+
+    async def test_auth_required(self):
+        """
+        Test requests without a valid token are rejected
+        """
+        res = await self.client.get(TODO_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        res = await self.client.get(TODO_URL, headers={"Authorization": "Token bad"})
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_writes_handed_to_regular_view(self):
+        """
+        Test requests the async views do not serve reach the regular views
+        """
+        res = await self.client.post(
+            TODO_URL,
+            {"title": "Todo 3", "completed": False},
+            content_type="application/json",
+            headers=self.headers,
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res = await self.client.get(TODO_URL, {"page_size": 1}, headers=self.headers)
+        self.assertEqual(len(json.loads(res.content)["results"]), 1)
+
+    async def test_etag_matches_regular_views(self):
+        """
+        Test the async views tag their responses with the ETag of the regular
+        views, which answer it with a 304
+        """
+        for url, etag in self.expected_etags.items():
+            res = await self.client.get(url, headers=self.headers)
+            self.assertEqual(res["ETag"], etag)
+
+            res = await self.client.get(
+                url, headers={**self.headers, "If-None-Match": etag}
+            )
+            self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @override_settings(TODO_PAGE_SIZE=1)
+    async def test_configured_page_size_handed_to_regular_view(self):
+        """
+        Test the lists are paginated as the regular views paginate them when a
+        page size is configured
+        """
+        for url in [TODO_URL, TASK_URL]:
+            with override_settings(ROOT_URLCONF="app.urls"):
+                expected = await sync_to_async(self.sync_client.get)(url)
+
+            res = await self.client.get(url, headers=self.headers)
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(json.loads(res.content), json.loads(expected.content))
+            self.assertEqual(len(json.loads(res.content)["results"]), 1)
+
+    @override_settings(TODO_STREAM_THRESHOLD=1, TODO_STREAM_CHUNK_SIZE=1)
+    async def test_lists_over_stream_threshold_handed_to_regular_view(self):
+        """
+        Test the lists the regular views stream are streamed a chunk at a time
+        """
+        res = await self.client.get(TODO_URL, headers=self.headers)
+
+        self.assertTrue(res.streaming)
+        self.assertTrue(res.is_async)
+        chunks = [chunk async for chunk in res.streaming_content]
+        self.assertGreater(len(chunks), 2)
+        self.assertEqual(json.loads(b"".join(chunks)), self.expected[TODO_URL])
+
+        res = await self.client.get(TASK_URL, headers=self.headers)
+        self.assertFalse(res.streaming)
+        self.assertEqual(json.loads(res.content), self.expected[TASK_URL])
+
+    async def test_export_streamed(self):
+        """
+        Test the export is sent through an async iterator
+        """
+        res = await self.client.get("/api/todo/export/", headers=self.headers)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.is_async)
+        content = b"".join([chunk async for chunk in res.streaming_content])
+        self.assertEqual(
+            {todo["title"] for todo in json.loads(gzip.decompress(content))},
+            {"Todo 1", "Todo 2"},
+        )
@@ -0,0 +1,138 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from core.models import Todo, Task
+
+TODO_URL = reverse("todo:todo-list")
+TASK_URL = reverse("todo:task-list")
+TODO_BATCH_UPDATE_URL = reverse("todo:todo-batch_update")
+TASK_BATCH_DELETE_URL = reverse("todo:task-batch_delete")
+CHANGE_PASSWORD_URL = reverse("user:change_password")
+USER_UPDATE_INFO = reverse("user:update_info")
+
+
+def create_user(email="user@example.com", password="Awesomeuser123"):
+    """
+    Create and return a user
+    """
+    return get_user_model().objects.create_user(
+        email=email, password=password, first_name="Test", last_name="User"
+    )
+
+
+class ETagTests(TestCase):
+    """
+    Test conditional requests on the todo and task endpoints
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.todo = Todo.objects.create(user=self.user, title="Test Todo")
+        self.task = Task.objects.create(todo=self.todo, task="Test Task")
+
+    def test_unchanged_list_returns_not_modified(self):
+        """
+        Test polling an unchanged list returns a 304 after a single lookup
+        """
+        res = self.client.get(TODO_URL)
+        etag = res["ETag"]
+
+        with self.assertNumQueries(1):
+            res = self.client.get(TODO_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+
+    def test_unchanged_task_returns_not_modified(self):
+        """
+        Test polling an unchanged task returns a 304
+        """
+        url = reverse("todo:task-detail", args=[self.task.id])
+        etag = self.client.get(url)["ETag"]
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_etag_differs_between_urls(self):
+        """
+        Test the list and detail endpoints do not share tags
+        """
+        url = reverse("todo:todo-detail", args=[self.todo.id])
+
+        self.assertNotEqual(
+            self.client.get(TODO_URL)["ETag"], self.client.get(url)["ETag"]
+        )
+
+    def test_create_changes_etag(self):
+        """
+        Test creating a todo invalidates the tag of the list
+        """
+        etag = self.client.get(TODO_URL)["ETag"]
+
+        self.client.post(TODO_URL, {"title": "New Todo"})
+        res = self.client.get(TODO_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+    def test_batch_routes_change_etag(self):
+        """
+        Test the batch routes invalidate the tags of both lists
+        """
+        todo_etag = self.client.get(TODO_URL)["ETag"]
+        payload = {"update_list": [{"id": self.todo.id, "title": "Updated"}]}
+        self.client.patch(TODO_BATCH_UPDATE_URL, payload, format="json")
+        res = self.client.get(TODO_URL, HTTP_IF_NONE_MATCH=todo_etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        task_etag = self.client.get(TASK_URL)["ETag"]
+        payload = {"delete_list": [self.task.id]}
+        self.client.delete(TASK_BATCH_DELETE_URL, payload, format="json")
+        res = self.client.get(TASK_URL, HTTP_IF_NONE_MATCH=task_etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_other_user_writes_keep_etag(self):
+        """
+        Test writes of another user do not invalidate the user's tags
+        """
+        etag = self.client.get(TODO_URL)["ETag"]
+        other_client = APIClient()
+        other_client.force_authenticate(create_user("other@example.com"))
+
+        other_client.post(TODO_URL, {"title": "Other Todo"})
+        res = self.client.get(TODO_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_user_updates_keep_data_version(self):
+        """
+        Test changing the password or profile with the user loaded before
+        todo writes does not bring back tags handed out before the writes
+        """
+        etag = self.client.get(TODO_URL)["ETag"]
+        self.client.post(TODO_URL, {"title": "New Todo"})
+
+        res = self.client.put(
+            CHANGE_PASSWORD_URL,
+            {
+                "old_password": "Awesomeuser123",
+                "password": "Newpassword123",
+                "password2": "Newpassword123",
+            },
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.get(TODO_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.put(
+            USER_UPDATE_INFO,
+            {"email": "new@example.com", "first_name": "New", "last_name": "Name"},
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.get(TODO_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
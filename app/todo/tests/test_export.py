@@ -0,0 +1,95 @@
+"""
+Tests for the export endpoint
+"""
+import csv
+import gzip
+import io
+import json
+
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from core.models import Todo, Task
+
+EXPORT_URL = reverse("todo:export")
+
+
+def create_user(email="user@example.com", password="Awesomeuser123"):
+    """
+    Create and return a user
+    """
+    return get_user_model().objects.create_user(
+        email=email, password=password, first_name="Test", last_name="User"
+    )
+
+
+@override_settings(TODO_STREAM_CHUNK_SIZE=2)
+class ExportApiTests(TestCase):
+    """
+    Test exporting the todos and tasks of a user
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.todos = [
+            Todo.objects.create(user=self.user, title=f"Todo {i}") for i in range(3)
+        ]
+        Task.objects.create(todo=self.todos[0], task="Task 1")
+        Task.objects.create(todo=self.todos[0], task="Task 2")
+        Todo.objects.create(user=create_user("other@example.com"), title="Other")
+
+    def download(self, params=None):
+        res = self.client.get(EXPORT_URL, params or {})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "application/gzip")
+        return gzip.decompress(b"".join(res.streaming_content)).decode("utf-8")
+
+    def test_json_export(self):
+        """
+        Test the JSON archive holds every todo of the user with its tasks
+        """
+        data = json.loads(self.download())
+
+        self.assertEqual([todo["id"] for todo in data], [t.id for t in self.todos])
+        self.assertEqual(
+            [task["task"] for task in data[0]["tasks"]], ["Task 1", "Task 2"]
+        )
+
+    def test_csv_export(self):
+        """
+        Test the CSV archive holds a row per task and per todo without tasks
+        """
+        rows = list(csv.DictReader(io.StringIO(self.download({"type": "csv"}))))
+
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[1]["task"], "Task 2")
+        self.assertEqual(rows[3]["todo_id"], str(self.todos[2].id))
+        self.assertEqual(rows[3]["task_id"], "")
+
+    def test_resume_after_id(self):
+        """
+        Test passing `after` exports only the todos following that id
+        """
+        data = json.loads(self.download({"after": self.todos[0].id}))
+
+        self.assertEqual([todo["id"] for todo in data], [t.id for t in self.todos[1:]])
+
+    def test_invalid_type_rejected(self):
+        """
+        Test an unknown export type returns a bad request
+        """
+        res = self.client.get(EXPORT_URL, {"type": "xml"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_auth_required(self):
+        """
+        Test exporting requires authentication
+        """
+        res = APIClient().get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,171 @@
+"""
+Tests for the todo import endpoint
+"""
+import json
+from unittest import mock
+
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from core.models import Todo, Task
+
+TODO_IMPORT_URL = reverse("todo:todo-import")
+
+
+def create_user(email="user@example.com", password="Awesomeuser123"):
+    """
+    Create and return a user
+    """
+    return get_user_model().objects.create_user(
+        email=email, password=password, first_name="Test", last_name="User"
+    )
+
+
+def ndjson(*lines):
+    return "\n".join(
+        line if isinstance(line, str) else json.dumps(line) for line in lines
+    )
+
+
+@override_settings(TODO_IMPORT_CHUNK_SIZE=2)
+class ImportApiTests(TestCase):
+    """
+    Test importing todos from newline delimited JSON
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+
+    def post(self, body):
+        return self.client.post(
+            TODO_IMPORT_URL, body, content_type="application/x-ndjson"
+        )
+
+    def test_import_todos_with_tasks(self):
+        """
+        Test every line is created with its tasks and ordered after the last
+        """
+        Todo.objects.create(user=self.user, title="Existing")
+        body = ndjson(
+            {"title": "Todo 1", "completed": False},
+            {"title": "Todo 2", "completed": True, "tasks": [{"task": "Task 1"}]},
+            "",
+            {"title": "Todo 3", "tasks": [{"task": "Task 2"}, {"task": "Task 3"}]},
+        )
+
+        res = self.post(body)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["created"], 3)
+        self.assertEqual(len(res.data["chunks"]), 2)
+        todos = Todo.objects.filter(user=self.user).order_by("ordering")
+        self.assertEqual(
+            [todo.title for todo in todos], ["Existing", "Todo 1", "Todo 2", "Todo 3"]
+        )
+        self.assertEqual([todo.ordering for todo in todos], [1, 2, 3, 4])
+        tasks = Task.objects.filter(todo__title="Todo 3").order_by("ordering")
+        self.assertEqual([task.ordering for task in tasks], [1, 2])
+
+    def test_import_ignores_task_ids(self):
+        """
+        Test tasks are created with new ids whatever ids the lines hold, so
+        an export can be imported again
+        """
+        todo = Todo.objects.create(user=self.user, title="Existing")
+        task = Task.objects.create(todo=todo, task="Existing task")
+        body = ndjson(
+            {
+                "id": todo.id,
+                "title": "Existing",
+                "tasks": [
+                    {"id": task.id, "task": "Existing task"},
+                    {"id": task.id + 1000, "task": "Other task"},
+                ],
+            },
+        )
+
+        res = self.post(body)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["created"], 1)
+        self.assertEqual(Task.objects.count(), 3)
+        self.assertFalse(Task.objects.filter(id=task.id + 1000).exists())
+        self.assertEqual(Task.objects.get(id=task.id).todo, todo)
+
+    def test_invalid_line_skips_its_chunk(self):
+        """
+        Test a chunk holding an invalid todo is not created and reported
+        """
+        body = ndjson(
+            {"title": "Todo 1"},
+            {"title": "Todo 2"},
+            {"title": "Todo 3"},
+            {"completed": "not a bool"},
+        )
+
+        res = self.post(body)
+
+        self.assertEqual(res.data["created"], 2)
+        chunk = res.data["chunks"][1]
+        self.assertEqual(chunk["created"], 0)
+        self.assertEqual(chunk["errors"][0]["line"], 4)
+        self.assertEqual(
+            list(Todo.objects.order_by("id").values_list("title", flat=True)),
+            ["Todo 1", "Todo 2"],
+        )
+
+    def test_failed_create_skips_its_chunk(self):
+        """
+        Test a chunk failing to be created is rolled back and reported
+        """
+        body = ndjson(
+            {"title": "Todo 1"},
+            {"title": "Todo 2"},
+            {"title": "Todo 3", "tasks": [{"task": "Task 1"}]},
+        )
+
+        bulk_create = Task.objects.bulk_create
+
+        def fail_on_tasks(tasks, *args, **kwargs):
+            if tasks:
+                raise IntegrityError("failed")
+            return bulk_create(tasks, *args, **kwargs)
+
+        with mock.patch.object(Task.objects, "bulk_create", fail_on_tasks):
+            res = self.post(body)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["created"], 2)
+        chunk = res.data["chunks"][1]
+        self.assertEqual(chunk["created"], 0)
+        self.assertIn("failed", str(chunk["errors"]))
+        self.assertEqual(
+            list(Todo.objects.order_by("id").values_list("title", flat=True)),
+            ["Todo 1", "Todo 2"],
+        )
+
+    def test_malformed_json_stops_import(self):
+        """
+        Test the import stops at a line that is not JSON, keeping the
+        chunks created before it
+        """
+        body = ndjson({"title": "Todo 1"}, {"title": "Todo 2"}, "{not json")
+
+        res = self.post(body)
+
+        self.assertEqual(res.data["created"], 2)
+        self.assertIn("line 3", str(res.data["chunks"][-1]["errors"][0]))
+        self.assertEqual(Todo.objects.count(), 2)
+
+    def test_import_requires_ndjson(self):
+        """
+        Test a JSON body is rejected as unsupported
+        """
+        res = self.client.post(TODO_IMPORT_URL, [{"title": "Todo"}], format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
@@ -0,0 +1,223 @@
+import json
+from base64 import urlsafe_b64encode
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from core.models import Todo, Task
+
+TODO_URL = reverse("todo:todo-list")
+TASK_URL = reverse("todo:task-list")
+
+
+def create_user(email="user@example.com", password="Awesomeuser123"):
+    """
+    Create and return a user
+    """
+    return get_user_model().objects.create_user(
+        email=email, password=password, first_name="Test", last_name="User"
+    )
+
+
+def create_todo(user, title="Test Todo"):
+    """
+    Create and return a todo
+    """
+    return Todo.objects.create(title=title, user=user)
+
+
+def create_task(todo, task_text):
+    """
+    Create and return a task
+    """
+    return Task.objects.create(todo=todo, task=task_text)
+
+
+class KeysetPaginationTests(TestCase):
+    """
+    Test the cursor pagination of the todo and task list endpoints
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+
+    def collect_pages(self, url, params):
+        """
+        Follow the next links from the first page and return the ids of all
+        pages along with the number of pages
+        """
+        ids, pages = [], 0
+        res = self.client.get(url, params)
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            ids.extend(item["id"] for item in res.data["results"])
+            pages += 1
+            if res.data["next"] is None:
+                return ids, pages
+            res = self.client.get(res.data["next"])
+
+    def test_list_is_unpaginated_without_page_size(self):
+        """
+        Test the todo list is returned as a plain list when no page size is set
+        """
+        create_todo(self.user)
+        create_todo(self.user)
+
+        res = self.client.get(TODO_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 2)
+
+    def test_todo_pages_follow_default_ordering(self):
+        """
+        Test paging through todos returns every todo once ordered by -id
+        """
+        todos = [create_todo(self.user) for _ in range(7)]
+        create_todo(create_user("other@example.com"))
+
+        ids, pages = self.collect_pages(TODO_URL, {"page_size": 3})
+
+        self.assertEqual(ids, sorted([todo.id for todo in todos], reverse=True))
+        self.assertEqual(pages, 3)
+
+    def test_todo_pages_by_ordering_field(self):
+        """
+        Test paging through todos by the ordering field uses the id as tie breaker
+        """
+        todos = [create_todo(self.user) for _ in range(5)]
+        Todo.objects.filter(id__in=[todos[0].id, todos[1].id]).update(ordering=10)
+
+        ids, _ = self.collect_pages(TODO_URL, {"page_size": 2, "ordering": "ordering"})
+
+        expected = Todo.objects.filter(user=self.user).order_by("ordering", "id")
+        self.assertEqual(ids, [todo.id for todo in expected])
+
+    def test_previous_link_returns_previous_page(self):
+        """
+        Test following the previous link returns the page before the current one
+        """
+        for _ in range(6):
+            create_todo(self.user)
+
+        first = self.client.get(TODO_URL, {"page_size": 2})
+        second = self.client.get(first.data["next"])
+        previous = self.client.get(second.data["previous"])
+
+        self.assertEqual(previous.data["results"], first.data["results"])
+        self.assertIsNotNone(previous.data["next"])
+        self.assertIsNone(previous.data["previous"])
+
+    def test_task_pages_follow_default_ordering(self):
+        """
+        Test paging through tasks returns every task of the user ordered by id
+        """
+        todo = create_todo(self.user)
+        other_todo = create_todo(self.user)
+        tasks = [create_task(todo, "Task") for _ in range(3)]
+        tasks += [create_task(other_todo, "Other Task") for _ in range(2)]
+
+        ids, pages = self.collect_pages(TASK_URL, {"page_size": 2})
+
+        self.assertEqual(ids, sorted(task.id for task in tasks))
+        self.assertEqual(pages, 3)
+
+    def test_invalid_cursor_returns_not_found(self):
+        """
+        Test a tampered cursor is rejected
+        """
+        res = self.client.get(TODO_URL, {"page_size": 2, "cursor": "not-a-cursor"})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_with_invalid_position_returns_not_found(self):
+        """
+        Test a cursor holding positions that are not ids or orderings is
+        rejected
+        """
+        for ordering, position in [
+            ("-id", ["x"]),
+            ("-id", [None]),
+            ("-id", [True]),
+            ("ordering", [1.5, 1]),
+            ("ordering", "ab"),
+        ]:
+            with self.subTest(ordering=ordering, position=position):
+                cursor = urlsafe_b64encode(
+                    json.dumps({"o": ordering, "p": position, "r": 0}).encode()
+                ).decode()
+
+                res = self.client.get(
+                    TODO_URL, {"page_size": 2, "ordering": ordering, "cursor": cursor}
+                )
+
+                self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_pages_with_null_orderings(self):
+        """
+        Test paging forwards and back by the ordering field returns every todo
+        once when some have no ordering, which sorts after every ordering
+        """
+        todos = [create_todo(self.user) for _ in range(7)]
+        Todo.objects.filter(user=self.user).update(ordering=None)
+        for ordering, todo in enumerate(todos[:3]):
+            Todo.objects.filter(id=todo.id).update(ordering=ordering)
+        with_ordering = [todo.id for todo in todos[:3]]
+        without_ordering = [todo.id for todo in todos[3:]]
+
+        for ordering, expected in [
+            ("ordering", with_ordering + without_ordering),
+            ("-ordering", without_ordering[::-1] + with_ordering[::-1]),
+        ]:
+            with self.subTest(ordering=ordering):
+                ids, _ = self.collect_pages(
+                    TODO_URL, {"page_size": 2, "ordering": ordering}
+                )
+                self.assertEqual(ids, expected)
+
+                pages = [
+                    self.client.get(TODO_URL, {"page_size": 2, "ordering": ordering})
+                ]
+                while pages[-1].data["next"]:
+                    pages.append(self.client.get(pages[-1].data["next"]))
+                res = pages[-1]
+                for page in reversed(pages[:-1]):
+                    res = self.client.get(res.data["previous"])
+                    self.assertEqual(res.data["results"], page.data["results"])
+
+    @override_settings(TODO_PAGE_SIZE=2)
+    def test_configured_page_size_paginates_by_default(self):
+        """
+        Test the configured page size applies when the client sends none
+        """
+        for _ in range(3):
+            create_todo(self.user)
+
+        res = self.client.get(TODO_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 2)
+        self.assertIsNotNone(res.data["next"])
+
+    def test_page_query_count_is_constant_when_paging_deep(self):
+        """
+        Test a page deep in the list costs as many queries as the first page
+        """
+        for _ in range(9):
+            create_todo(self.user)
+
+        url = self.client.get(TODO_URL, {"page_size": 3}).data["next"]
+        url = self.client.get(url).data["next"]
+
+        with CaptureQueriesContext(connection) as first_page:
+            self.client.get(TODO_URL, {"page_size": 3})
+        with CaptureQueriesContext(connection) as last_page:
+            res = self.client.get(url)
+
+        self.assertEqual(len(res.data["results"]), 3)
+        self.assertEqual(len(first_page), len(last_page))
@@ -0,0 +1,245 @@
+"""
+Tests for the cache of rendered list responses
+"""
+from unittest import mock
+
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from core.models import Todo, Task
+
+TODO_URL = reverse("todo:todo-list")
+TASK_URL = reverse("todo:task-list")
+TODO_BATCH_UPDATE_URL = reverse("todo:todo-batch_update")
+TODO_BATCH_UPDATE_ORDERING_URL = reverse("todo:todo-batch_update_ordering")
+TODO_BATCH_DELETE_URL = reverse("todo:todo-batch_delete")
+TASK_BATCH_CREATE_URL = reverse("todo:task-batch_create")
+
+
+def detail_url(todo_id):
+    """
+    Returns the url of a todo
+    """
+    return reverse("todo:todo-detail", args=[todo_id])
+
+
+def move_url(todo_id):
+    """
+    Returns the url to move a todo
+    """
+    return reverse("todo:todo-move", args=[todo_id])
+
+
+def create_user(email="user@example.com", password="Awesomeuser123"):
+    """
+    Create and return a user
+    """
+    return get_user_model().objects.create_user(
+        email=email, password=password, first_name="Test", last_name="User"
+    )
+
+
+@override_settings(
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "responses": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "test-responses",
+        },
+    }
+)
+class ResponseCacheTests(TestCase):
+    """
+    Test caching the todo and task list responses
+    """
+
+    def setUp(self):
+        caches["responses"].clear()
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.todo = Todo.objects.create(user=self.user, title="Todo")
+        self.task = Task.objects.create(todo=self.todo, task="Task")
+
+    def get(self, url, params=None):
+        """
+        Read the url, returning the response and the number of queries made
+        """
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res, len(queries)
+
+    def assertServedFromCache(self, url, params=None):
+        self.assertEqual(self.get(url, params)[1], 0)
+
+    def assertNotServedFromCache(self, url, params=None):
+        self.assertGreater(self.get(url, params)[1], 0)
+
+    def test_repeated_list_skips_database(self):
+        """
+        Test a repeated read is answered from the cache without any query
+        """
+        first, queries = self.get(TODO_URL)
+        self.assertGreater(queries, 0)
+
+        second, queries = self.get(TODO_URL)
+
+        self.assertEqual(queries, 0)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["Content-Type"], first["Content-Type"])
+        self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_cached_list_answers_if_none_match(self):
+        """
+        Test a cached list answers a matching If-None-Match with a 304
+        """
+        etag = self.get(TODO_URL)[0]["ETag"]
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(TODO_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(len(queries), 0)
+
+    def test_entries_are_keyed_by_query_params(self):
+        """
+        Test lists read with other query params are cached separately
+        """
+        self.get(TASK_URL)
+
+        res, queries = self.get(TASK_URL, {"todo": self.todo.id})
+
+        self.assertGreater(queries, 0)
+        self.assertServedFromCache(TASK_URL, {"todo": self.todo.id})
+
+    def test_entries_are_keyed_by_user(self):
+        """
+        Test users never read each other's cached lists
+        """
+        self.get(TODO_URL)
+        other = create_user("other@example.com")
+        Todo.objects.create(user=other, title="Other Todo")
+        self.client.force_authenticate(other)
+
+        res, queries = self.get(TODO_URL)
+
+        self.assertGreater(queries, 0)
+        self.assertEqual([todo["title"] for todo in res.json()], ["Other Todo"])
+
+    def test_write_drops_cached_lists(self):
+        """
+        Test saving a todo drops the cached lists of its owner
+        """
+        self.get(TODO_URL)
+        self.get(TASK_URL)
+
+        self.client.patch(detail_url(self.todo.id), {"title": "Renamed"})
+
+        res, queries = self.get(TODO_URL)
+        self.assertEqual(res.json()[0]["title"], "Renamed")
+        self.assertNotServedFromCache(TASK_URL)
+
+    def test_write_keeps_other_users_entries(self):
+        """
+        Test a write only drops the cached lists of the writing user
+        """
+        other = create_user("other@example.com")
+        other_client = APIClient()
+        other_client.force_authenticate(other)
+        self.get(TODO_URL)
+
+        other_client.post(TODO_URL, {"title": "Other Todo"})
+
+        self.assertServedFromCache(TODO_URL)
+
+    def test_batch_routes_drop_cached_lists(self):
+        """
+        Test the batch serializers drop the cached lists
+        """
+        self.get(TODO_URL)
+        payload = {"update_list": [{"id": self.todo.id, "title": "Updated"}]}
+        self.client.patch(TODO_BATCH_UPDATE_URL, payload, format="json")
+        self.assertNotServedFromCache(TODO_URL)
+
+        payload = {"ordering_list": [{"id": self.todo.id, "ordering": 5}]}
+        self.client.patch(TODO_BATCH_UPDATE_ORDERING_URL, payload, format="json")
+        res, queries = self.get(TODO_URL)
+        self.assertGreater(queries, 0)
+        self.assertEqual(res.json()[0]["ordering"], 5)
+
+        self.get(TASK_URL)
+        payload = {"create_list": [{"task": "New Task", "todo_id": self.todo.id}]}
+        self.client.post(TASK_BATCH_CREATE_URL, payload, format="json")
+        res, queries = self.get(TASK_URL)
+        self.assertGreater(queries, 0)
+        self.assertEqual(len(res.json()), 2)
+
+    def test_deletes_drop_cached_lists(self):
+        """
+        Test single and batch deletes drop the cached lists
+        """
+        other = Todo.objects.create(user=self.user, title="Other Todo")
+        self.get(TODO_URL)
+
+        self.client.delete(detail_url(other.id))
+        res, queries = self.get(TODO_URL)
+        self.assertEqual(len(res.json()), 1)
+
+        payload = {"delete_list": [self.todo.id]}
+        self.client.delete(TODO_BATCH_DELETE_URL, payload, format="json")
+        res, queries = self.get(TODO_URL)
+        self.assertEqual(res.json(), [])
+
+    def test_move_drops_cached_lists(self):
+        """
+        Test moving a todo drops the cached lists
+        """
+        other = Todo.objects.create(user=self.user, title="Other Todo")
+        self.get(TODO_URL)
+
+        self.client.patch(move_url(other.id), {"before": self.todo.id}, format="json")
+
+        res, queries = self.get(TODO_URL)
+        self.assertEqual(res.json()[0]["id"], other.id)
+
+    def test_streamed_lists_are_not_cached(self):
+        """
+        Test streamed lists are always read from the database
+        """
+        self.client.get(TODO_URL, {"stream": "true"})
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(TODO_URL, {"stream": "true"})
+            b"".join(res.streaming_content)
+
+        self.assertGreater(len(queries), 0)
+
+    def test_read_before_version_bump_not_served_to_stale_clients(self):
+        """
+        Test a list read between a write and the bump of the data version is
+        not answered from the cache with a 304 for the ETag before the write
+        """
+        stale_etag = self.client.get(TODO_URL)["ETag"]
+        manager = get_user_model().objects
+        bump_data_version = manager.bump_data_version
+
+        def read_then_bump(**filters):
+            # a request of another device made before the bump
+            self.client.get(TODO_URL)
+            return bump_data_version(**filters)
+
+        with mock.patch.object(manager, "bump_data_version", read_then_bump):
+            res = self.client.patch(detail_url(self.todo.id), {"title": "Renamed"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.get(TODO_URL, HTTP_IF_NONE_MATCH=stale_etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()[0]["title"], "Renamed")
+        self.assertNotEqual(res["ETag"], stale_etag)
@@ -0,0 +1,159 @@
+"""
+Tests for picking the list serializer and read only fields of the todo and
+task serializers
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.test import SimpleTestCase
+from todo.serializers import (
+    BatchCreateSerializer,
+    BatchDeleteSerializer,
+    BatchOrderingUpdateSerializer,
+    BatchUpdateSerializer,
+    TodoSerializer,
+    TaskSerializer,
+)
+
+# serializer, view name, type, expected list serializer and read only fields
+CASES = [
+    (
+        TodoSerializer,
+        "todo",
+        "batch_create",
+        BatchCreateSerializer,
+        {"id", "ordering"},
+    ),
+    (
+        TodoSerializer,
+        "todo",
+        "batch_update_ordering",
+        BatchOrderingUpdateSerializer,
+        {"id", "last_added"},
+    ),
+    (
+        TodoSerializer,
+        "todo",
+        "batch_update",
+        BatchUpdateSerializer,
+        {"id", "last_added", "ordering"},
+    ),
+    (
+        TodoSerializer,
+        "todo",
+        "batch_delete",
+        BatchDeleteSerializer,
+        {"id", "last_added", "ordering"},
+    ),
+    (
+        TaskSerializer,
+        "task",
+        "batch_create",
+        BatchCreateSerializer,
+        {"id", "ordering"},
+    ),
+    (
+        TaskSerializer,
+        "task",
+        "batch_update_ordering",
+        BatchOrderingUpdateSerializer,
+        {"id"},
+    ),
+    (
+        TaskSerializer,
+        "task",
+        "batch_update",
+        BatchUpdateSerializer,
+        {"id", "ordering"},
+    ),
+]
+
+
+def read_only_fields(serializer):
+    """
+    The names of the read only model fields of a serializer, the declared
+    fields are left out as the read only fields do not apply to them
+    """
+    return {
+        name
+        for name, field in serializer.fields.items()
+        if field.read_only and name not in serializer._declared_fields
+    }
+
+
+class SerializerConfigurationTests(SimpleTestCase):
+    """
+    Test serializers are configured per instance
+    """
+
+    def test_batch_types_pick_list_serializer_and_read_only_fields(self):
+        """
+        Test every type gets its list serializer and read only fields
+        """
+        for serializer_class, view_name, type, list_class, read_only in CASES:
+            with self.subTest(view_name=view_name, type=type):
+                serializer = serializer_class(many=True, type=type, view_name=view_name)
+
+                self.assertIs(serializer.__class__, list_class)
+                self.assertEqual(read_only_fields(serializer.child), read_only)
+
+    def test_class_configuration_unchanged(self):
+        """
+        Test building batch serializers leaves the Meta and the serializers
+        built without a type alone
+        """
+        TodoSerializer(many=True, type="batch_create", view_name="todo").child.fields
+
+        self.assertEqual(
+            TodoSerializer.Meta.read_only_fields, ["id", "last_added", "ordering"]
+        )
+        self.assertIs(
+            TodoSerializer.Meta.list_serializer_class, BatchOrderingUpdateSerializer
+        )
+        self.assertIs(
+            TodoSerializer(many=True).__class__, BatchOrderingUpdateSerializer
+        )
+        self.assertEqual(
+            read_only_fields(TodoSerializer()), {"id", "last_added", "ordering"}
+        )
+        self.assertEqual(read_only_fields(TaskSerializer()), {"id"})
+
+    def test_prepared_fields_copied(self):
+        """
+        Test serializers of the same view and type get their own fields
+        """
+        first = TodoSerializer(many=True, type="batch_create", view_name="todo")
+        second = TodoSerializer(many=True, type="batch_create", view_name="todo")
+
+        self.assertIn(
+            (TodoSerializer, "todo", "batch_create"),
+            TodoSerializer.prepared_fields,
+        )
+        self.assertIsNot(first.child.fields["title"], second.child.fields["title"])
+        self.assertIs(first.child.fields["title"].parent, first.child)
+
+    def test_concurrent_serializers(self):
+        """
+        Test serializers built at the same time by many threads all get the
+        configuration of their own type
+        """
+        threads = 16
+        barrier = threading.Barrier(threads)
+
+        def build(worker):
+            barrier.wait()
+            failures = []
+            for i in range(200):
+                case = CASES[(worker + i) % len(CASES)]
+                serializer_class, view_name, type, list_class, read_only = case
+                serializer = serializer_class(many=True, type=type, view_name=view_name)
+                if serializer.__class__ is not list_class:
+                    failures.append((type, serializer.__class__))
+                if read_only_fields(serializer.child) != read_only:
+                    failures.append((type, read_only_fields(serializer.child)))
+            return failures
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            results = list(executor.map(build, range(threads)))
+
+        self.assertEqual([failure for result in results for failure in result], [])
@@ -0,0 +1,92 @@
+"""
+Tests for streamed list responses
+"""
+import json
+
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from core.models import Todo, Task
+
+TODO_URL = reverse("todo:todo-list")
+TASK_URL = reverse("todo:task-list")
+
+
+def create_user(email="user@example.com", password="Awesomeuser123"):
+    """
+    Create and return a user
+    """
+    return get_user_model().objects.create_user(
+        email=email, password=password, first_name="Test", last_name="User"
+    )
+
+
+@override_settings(TODO_STREAM_CHUNK_SIZE=2)
+class StreamingListTests(TestCase):
+    """
+    Test streaming the todo and task lists
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        for i in range(5):
+            todo = Todo.objects.create(user=self.user, title=f"Todo {i}")
+            Task.objects.create(todo=todo, task=f"Task {i}")
+
+    def read(self, res):
+        return json.loads(b"".join(res.streaming_content))
+
+    def test_streamed_list_matches_list(self):
+        """
+        Test the streamed todo list holds the same data as the regular list
+        """
+        expected = json.loads(self.client.get(TODO_URL).content)
+
+        res = self.client.get(TODO_URL, {"stream": "true"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(self.read(res), expected)
+
+    def test_streamed_task_list_matches_list(self):
+        """
+        Test the streamed task list holds the same data as the regular list
+        """
+        expected = json.loads(self.client.get(TASK_URL).content)
+
+        res = self.client.get(TASK_URL, {"stream": "1"})
+
+        self.assertEqual(self.read(res), expected)
+
+    def test_empty_list_streamed(self):
+        """
+        Test streaming an empty list returns an empty json list
+        """
+        Todo.objects.all().delete()
+
+        res = self.client.get(TODO_URL, {"stream": "true"})
+
+        self.assertEqual(self.read(res), [])
+
+    @override_settings(TODO_STREAM_THRESHOLD=3)
+    def test_list_over_threshold_streamed(self):
+        """
+        Test lists longer than the threshold are streamed without asking
+        """
+        res = self.client.get(TODO_URL)
+
+        self.assertTrue(res.streaming)
+        self.assertEqual(len(self.read(res)), 5)
+
+    def test_paginated_list_not_streamed(self):
+        """
+        Test a page is returned when the client asks for one
+        """
+        res = self.client.get(TODO_URL, {"stream": "true", "page_size": 2})
+
+        self.assertFalse(res.streaming)
+        self.assertEqual(len(res.data["results"]), 2)
@@ -0,0 +1,140 @@
+"""
+Tests for the sync endpoint
+"""
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from core.models import Todo, Task, Tombstone
+
+SYNC_URL = reverse("todo:sync")
+TODO_BATCH_DELETE_URL = reverse("todo:todo-batch_delete")
+TASK_BATCH_UPDATE_URL = reverse("todo:task-batch_update")
+
+
+def create_user(email="user@example.com", password="Awesomeuser123"):
+    """
+    Create and return a user
+    """
+    return get_user_model().objects.create_user(
+        email=email, password=password, first_name="Test", last_name="User"
+    )
+
+
+def todo_url(todo_id):
+    return reverse("todo:todo-detail", args=[todo_id])
+
+
+def task_url(task_id):
+    return reverse("todo:task-detail", args=[task_id])
+
+
+@override_settings(SYNC_CURSOR_LAG=0)
+class SyncApiTests(TestCase):
+    """
+    Test syncing the changes of a user
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.todo = Todo.objects.create(user=self.user, title="Todo 1")
+        self.task = Task.objects.create(todo=self.todo, task="Task 1")
+
+    def sync(self, since=None):
+        res = self.client.get(SYNC_URL, {"since": since} if since else {})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_first_sync_returns_everything(self):
+        """
+        Test syncing without a cursor returns every todo and task of the user
+        """
+        other_user = create_user("other@example.com")
+        Todo.objects.create(user=other_user, title="Other Todo")
+
+        data = self.sync()
+
+        self.assertEqual([todo["id"] for todo in data["todos"]], [self.todo.id])
+        self.assertEqual([task["id"] for task in data["tasks"]], [self.task.id])
+        self.assertEqual(data["deleted"], {"todos": [], "tasks": []})
+        self.assertIn("cursor", data)
+
+    def test_sync_returns_only_changes(self):
+        """
+        Test syncing with a cursor returns only the items changed since
+        """
+        todo2 = Todo.objects.create(user=self.user, title="Todo 2")
+        cursor = self.sync()["cursor"]
+
+        self.client.patch(task_url(self.task.id), {"completed": True})
+        data = self.sync(cursor)
+
+        self.assertEqual([task["id"] for task in data["tasks"]], [self.task.id])
+        self.assertTrue(data["tasks"][0]["completed"])
+        self.assertNotIn(todo2.id, [todo["id"] for todo in data["todos"]])
+
+    def test_sync_returns_deletions(self):
+        """
+        Test deleted todos and tasks are listed by id
+        """
+        todo2 = Todo.objects.create(user=self.user, title="Todo 2")
+        cursor = self.sync()["cursor"]
+
+        self.client.delete(task_url(self.task.id))
+        self.client.delete(
+            TODO_BATCH_DELETE_URL, {"delete_list": [todo2.id]}, format="json"
+        )
+        data = self.sync(cursor)
+
+        self.assertEqual(
+            data["deleted"], {"todos": [todo2.id], "tasks": [self.task.id]}
+        )
+        self.assertEqual(data["todos"], [])
+
+    def test_batch_updates_are_synced(self):
+        """
+        Test rows written without save are picked up by the next sync
+        """
+        cursor = self.sync()["cursor"]
+
+        self.client.patch(
+            TASK_BATCH_UPDATE_URL,
+            {"update_list": [{"id": self.task.id, "task": "Updated"}]},
+            format="json",
+        )
+        data = self.sync(cursor)
+
+        self.assertEqual([task["id"] for task in data["tasks"]], [self.task.id])
+
+    def test_old_tombstones_not_returned(self):
+        """
+        Test deletions made before the cursor are not returned again
+        """
+        Tombstone.objects.record(self.user, "todo", [1000])
+        Tombstone.objects.update(deleted_at=timezone.now() - timedelta(days=1))
+
+        data = self.sync(self.sync()["cursor"])
+
+        self.assertEqual(data["deleted"]["todos"], [])
+
+    def test_invalid_cursor_rejected(self):
+        """
+        Test an invalid cursor returns a bad request
+        """
+        res = self.client.get(SYNC_URL, {"since": "invalid"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_auth_required(self):
+        """
+        Test syncing requires authentication
+        """
+        res = APIClient().get(SYNC_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
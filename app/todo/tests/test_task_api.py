@@ -1,4 +1,6 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APIClient
 from django.db.models import Max
@@ -26,6 +28,13 @@ def detail_url(task_id):
     return reverse("todo:task-detail", args=[task_id])
 
 
+def move_url(task_id):
+    """
+    Create and return url to move a task
+    """
+    return reverse("todo:task-move", args=[task_id])
+
+
 def create_user(email="user@example.com", password="Awesomeuser123"):
     """
     Create and return a user
@@ -349,6 +358,67 @@ class PrivateTaskApiTest(TestCase):
 
         self.assertQuerysetEqual(serializer.data, res.data)
 
+    def test_batch_task_update_writes_changed_values(self):
+        """
+        Test the batch update writes the values sent with every task id and
+        touches the todo once
+        """
+        tasks = [create_task(self.todo, f"Task {i}") for i in range(3)]
+        before = Task.objects.get(id=tasks[0].id).updated_at
+        last_added = timezone.now().replace(microsecond=0) - timedelta(days=2)
+
+        payload = {
+            "update_list": [
+                {"id": tasks[2].id, "completed": True},
+                {
+                    "id": tasks[1].id,
+                    "task": "Changed",
+                    "todo_last_added": DateTimeField().to_representation(last_added),
+                },
+                {"id": tasks[0].id, "task": "Task 0", "completed": False},
+            ]
+        }
+        res = self.client.patch(TASK_BATCH_UPDATE, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [task["id"] for task in res.data], [task.id for task in tasks][::-1]
+        )
+        self.assertEqual(
+            list(Task.objects.order_by("id").values_list("task", "completed")),
+            [("Task 0", False), ("Changed", False), ("Task 2", True)],
+        )
+        self.assertEqual(Task.objects.get(id=tasks[0].id).updated_at, before)
+        self.todo.refresh_from_db()
+        self.assertEqual(self.todo.last_added, last_added)
+
+    def test_batch_task_update_ignores_todos_of_other_users(self):
+        """
+        Test the last added time of todos of other users is not changed
+        """
+        other_todo = create_todo(create_user(email="other@example.com"))
+        other_task = create_task(other_todo, "Other task")
+        last_added = other_todo.last_added
+
+        payload = {
+            "update_list": [
+                {
+                    "id": other_task.id,
+                    "task": "Changed",
+                    "todo_last_added": DateTimeField().to_representation(
+                        timezone.now() - timedelta(days=2)
+                    ),
+                },
+            ]
+        }
+        res = self.client.patch(TASK_BATCH_UPDATE, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [])
+        other_todo.refresh_from_db()
+        self.assertEqual(other_todo.last_added, last_added)
+        self.assertEqual(Task.objects.get(id=other_task.id).task, "Other task")
+
     def test_delete_task_without_other_task(self):
         """
         Test deleting a task when no other users task exist
@@ -429,3 +499,94 @@ class PrivateTaskApiTest(TestCase):
 
         tasks = Task.objects.filter(todo=self.todo)
         self.assertEqual(tasks.count(), 0)
+
+    def test_list_tasks_runs_fixed_number_of_queries(self):
+        """
+        Test listing tasks runs the same number of queries however many todos the tasks belong to
+        """
+        for i in range(3):
+            create_task(create_todo(self.user), f"Task {i}")
+        with self.assertNumQueries(2):
+            res = self.client.get(TASK_URL)
+        self.assertEqual(len(res.data), 3)
+
+        for i in range(10):
+            create_task(create_todo(self.user), f"Other Task {i}")
+        with self.assertNumQueries(2):
+            res = self.client.get(TASK_URL)
+        self.assertEqual(len(res.data), 13)
+
+    def test_retrieve_task_runs_fixed_number_of_queries(self):
+        """
+        Test retrieving a task loads its todo in the same query
+        """
+        task = create_task(self.todo, "Test Task")
+
+        with self.assertNumQueries(2):
+            res = self.client.get(detail_url(task.id))
+        self.assertEqual(
+            res.data["todo_last_added"], TaskSerializer(task).data["todo_last_added"]
+        )
+
+    def test_move_task_to_start_of_todo(self):
+        """
+        Test moving a task before the first task of its todo
+        """
+        task1 = create_task(self.todo, "Test Task 1")
+        task2 = create_task(self.todo, "Test Task 2")
+
+        res = self.client.patch(move_url(task2.id), {"before": task1.id}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ordered = Task.objects.filter(todo=self.todo).order_by("rank")
+        self.assertEqual([task.id for task in ordered], [task2.id, task1.id])
+
+    def test_move_task_to_other_todo_fails(self):
+        """
+        Test a task cannot be moved next to a task of another todo
+        """
+        task = create_task(self.todo, "Test Task")
+        other_task = create_task(create_todo(self.user), "Other Task")
+
+        res = self.client.patch(
+            move_url(task.id), {"after": other_task.id}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_batch_create_runs_fixed_number_of_queries(self):
+        """
+        Test the queries of a batch create do not grow with the number of tasks
+        or todos, and every todo gets consecutive orderings after its highest
+        """
+        todos = [create_todo(self.user) for _ in range(30)]
+        for todo in todos:
+            create_task(todo, "Existing task")
+
+        # the first request loads the site, which is cached afterwards
+        for count in [1, 3, 30]:
+            payload = {
+                "create_list": [
+                    {
+                        "task": f"Task {i}",
+                        "todo_id": todos[i % count].id,
+                        "completed": False,
+                        "todo_last_added": DateTimeField().to_representation(
+                            timezone.now()
+                        ),
+                    }
+                    for i in range(count * 2)
+                ]
+            }
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.post(TASK_BATCH_CREATE_URL, payload, format="json")
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(len(res.data), count * 2)
+            if count == 3:
+                expected = len(queries)
+        self.assertEqual(len(queries), expected)
+
+        orderings = Task.objects.filter(todo=todos[0]).order_by("ordering")
+        self.assertEqual(
+            list(orderings.values_list("ordering", flat=True)), [1, 2, 3, 4, 5, 6, 7]
+        )
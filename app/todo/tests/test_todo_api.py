@@ -1,5 +1,7 @@
 from core import models
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.db.models import Max
@@ -24,6 +26,13 @@ def detail_url(todo_id):
     return reverse("todo:todo-detail", args=[todo_id])
 
 
+def move_url(todo_id):
+    """
+    Returns the url to move a todo
+    """
+    return reverse("todo:todo-move", args=[todo_id])
+
+
 def create_user(email="user@example.com", password="Awesomeuser123"):
     """
     Create and return a user
@@ -482,7 +491,7 @@ class PrivateTodoApiTest(TestCase):
         res = self.client.patch(TODO_BATCH_UPDATE_ORDERING_URL, payload, format="json")
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
-        todos = models.Todo.objects.filter(user=user)
+        todos = models.Todo.objects.filter(user=user).order_by("id")
         todo1.refresh_from_db()
         serializer = TodoSerializer(todos, many=True)
         self.assertEqual(todo1.ordering, payload["ordering_list"][0]["ordering"])
@@ -643,3 +652,364 @@ class PrivateTodoApiTest(TestCase):
 
         self.assertEqual(diff_todo1.tasks.count(), 1)
         self.assertEqual(diff_todo2.tasks.count(), 1)
+
+    def test_list_todos_runs_fixed_number_of_queries(self):
+        """
+        Test listing todos runs the same number of queries however many todos and tasks exist
+        """
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+
+        for i in range(2):
+            create_task(create_todo(self.user), f"Task {i}")
+        with self.assertNumQueries(3):
+            res = self.client.get(TODO_URL)
+        self.assertEqual(len(res.data), 2)
+
+        for i in range(10):
+            todo = create_todo(self.user)
+            create_task(todo, f"Task {i}")
+            create_task(todo, f"Other Task {i}")
+        with self.assertNumQueries(3):
+            res = self.client.get(TODO_URL)
+        self.assertEqual(len(res.data), 12)
+
+    def test_retrieve_todo_runs_fixed_number_of_queries(self):
+        """
+        Test retrieving a todo runs the same number of queries however many tasks it has
+        """
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        todo = create_todo(self.user)
+        for i in range(10):
+            create_task(todo, f"Task {i}")
+
+        with self.assertNumQueries(3):
+            res = self.client.get(detail_url(todo.id))
+        self.assertEqual(len(res.data["tasks"]), 10)
+
+    def test_move_todo_between_todos(self):
+        """
+        Test moving a todo between two others only rewrites the moved todo
+        """
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        todo1, todo2, todo3 = [create_todo(self.user) for _ in range(3)]
+        self.client.patch(move_url(todo3.id), {"before": todo1.id}, format="json")
+        ranks = dict(models.Todo.objects.values_list("id", "rank"))
+
+        res = self.client.patch(
+            move_url(todo2.id), {"after": todo3.id, "before": todo1.id}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ordered = models.Todo.objects.filter(user=self.user).order_by("rank")
+        self.assertEqual([todo.id for todo in ordered], [todo3.id, todo2.id, todo1.id])
+        self.assertEqual(res.data["rank"], ordered[1].rank)
+        self.assertEqual(ordered[0].rank, ranks[todo3.id])
+        self.assertEqual(ordered[2].rank, ranks[todo1.id])
+
+    def test_move_todo_between_other_user_todos_fails(self):
+        """
+        Test a todo cannot be moved next to todos of another user
+        """
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        todo = create_todo(self.user)
+        other_todo = create_todo(create_user("other@example.com"))
+
+        res = self.client.patch(
+            move_url(todo.id), {"after": other_todo.id}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_move_todo_schedules_rebalance_for_long_ranks(self):
+        """
+        Test a move producing a long rank schedules a rebalance
+        """
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        todo1, todo2, todo3 = [create_todo(self.user) for _ in range(3)]
+        models.Todo.objects.filter(id=todo1.id).update(rank="i")
+        models.Todo.objects.filter(id=todo2.id).update(rank="i" + "0" * 30 + "1")
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            res = self.client.patch(
+                move_url(todo3.id),
+                {"after": todo1.id, "before": todo2.id},
+                format="json",
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(callbacks), 1)
+
+    def test_batch_update_ordering_matches_todos_by_id(self):
+        """
+        Test the batch ordering update gives every todo the ordering sent with its id whatever the order of the list
+        """
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        todos = [create_todo(self.user) for _ in range(4)]
+        new_orderings = {todo.id: 10 + i for i, todo in enumerate(todos)}
+
+        payload = {
+            "ordering_list": [
+                {"id": todo_id, "ordering": ordering}
+                for todo_id, ordering in sorted(new_orderings.items(), reverse=True)
+            ]
+        }
+        res = self.client.patch(TODO_BATCH_UPDATE_ORDERING_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            dict(models.Todo.objects.values_list("id", "ordering")), new_orderings
+        )
+        self.assertEqual(
+            {todo["id"]: todo["ordering"] for todo in res.data}, new_orderings
+        )
+
+    def test_batch_update_ordering_runs_fixed_number_of_queries(self):
+        """
+        Test the batch ordering update runs the same number of queries however many todos are reordered
+        """
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+
+        for count in [3, 30]:
+            todos = [create_todo(self.user) for _ in range(count)]
+            for todo in todos:
+                create_task(todo, "Test task")
+            payload = {
+                "ordering_list": [
+                    {"id": todo.id, "ordering": 1000 - i}
+                    for i, todo in enumerate(todos)
+                ]
+            }
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.patch(
+                    TODO_BATCH_UPDATE_ORDERING_URL, payload, format="json"
+                )
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(res.data), count)
+            if count == 3:
+                expected = len(queries)
+        self.assertEqual(len(queries), expected)
+
+    def test_batch_update_matches_todos_by_id(self):
+        """
+        Test the batch update gives every todo the values sent with its id and only writes the todos that change
+        """
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        todos = [create_todo(self.user) for _ in range(3)]
+        before = models.Todo.objects.get(id=todos[1].id).updated_at
+
+        payload = {
+            "update_list": [
+                {"id": todos[2].id, "title": "Third", "ordering": 50},
+                {"id": todos[1].id, "title": todos[1].title, "completed": False},
+                {"id": todos[0].id, "completed": True},
+            ]
+        }
+        res = self.client.patch(TODO_BATCH_UPDATE_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [todo["id"] for todo in res.data], [todo.id for todo in todos][::-1]
+        )
+        values = models.Todo.objects.order_by("id").values_list(
+            "title", "completed", "ordering"
+        )
+        self.assertEqual(
+            list(values),
+            [
+                (todos[0].title, True, todos[0].ordering),
+                (todos[1].title, False, todos[1].ordering),
+                ("Third", False, todos[2].ordering),
+            ],
+        )
+        self.assertEqual(models.Todo.objects.get(id=todos[1].id).updated_at, before)
+
+    def test_batch_update_rejects_too_long_title(self):
+        """
+        Test a title longer than the column is rejected instead of being cut,
+        for batches written with VALUES and with COPY
+        """
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        todos = [create_todo(self.user) for _ in range(2)]
+        payload = {
+            "update_list": [
+                {"id": todos[0].id, "title": "Renamed"},
+                {"id": todos[1].id, "title": "a" * 256},
+            ]
+        }
+
+        for threshold in [2000, 0]:
+            with self.subTest(threshold=threshold), self.settings(
+                BULK_UPDATE_COPY_THRESHOLD=threshold
+            ):
+                res = self.client.patch(TODO_BATCH_UPDATE_URL, payload, format="json")
+
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertEqual(
+                    list(
+                        models.Todo.objects.order_by("id").values_list(
+                            "title", flat=True
+                        )
+                    ),
+                    [todos[0].title, todos[1].title],
+                )
+
+    def test_batch_update_runs_fixed_number_of_queries(self):
+        """
+        Test the queries of a batch update do not grow with the number of todos
+        """
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+
+        # the first request loads the site, which is cached afterwards
+        for count in [1, 3, 30]:
+            todos = [create_todo(self.user) for _ in range(count)]
+            for todo in todos:
+                create_task(todo, "Test task")
+            payload = {
+                "update_list": [
+                    {"id": todo.id, "title": f"Todo {i}", "completed": i % 2 == 0}
+                    for i, todo in enumerate(todos)
+                ]
+            }
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.patch(TODO_BATCH_UPDATE_URL, payload, format="json")
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(res.data), count)
+            if count == 3:
+                expected = len(queries)
+        self.assertEqual(len(queries), expected)
+
+    def test_batch_create_runs_fixed_number_of_queries(self):
+        """
+        Test the queries of a batch create do not grow with the number of todos
+        """
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+
+        # the first request loads the site, which is cached afterwards
+        for count in [1, 3, 30]:
+            payload = {
+                "create_list": [
+                    {"title": f"Todo {i}", "tasks": [{"task": "Task"}]}
+                    for i in range(count)
+                ]
+            }
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.post(TODO_BATCH_CREATE_URL, payload, format="json")
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(len(res.data), count)
+            self.assertEqual([len(todo["tasks"]) for todo in res.data], [1] * count)
+            if count == 3:
+                expected = len(queries)
+        self.assertEqual(len(queries), expected)
+
+    def test_updating_tasks_from_todo_matches_tasks_by_id(self):
+        """
+        Test updating the tasks keeps the tasks sent with their id, creates
+        the new ones and deletes the ones left out
+        """
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        todo = create_todo(self.user)
+        kept = create_task(todo, "Kept task")
+        changed = create_task(todo, "Changed task")
+        removed = create_task(todo, "Removed task")
+
+        payload = {
+            "tasks": [
+                {"id": kept.id, "task": "Kept task"},
+                {"id": changed.id, "task": "Renamed task", "completed": True},
+                {"task": "New task"},
+            ]
+        }
+        res = self.client.patch(detail_url(todo.id), payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        tasks = {task.id: task for task in todo.tasks.all()}
+        self.assertEqual(len(tasks), 3)
+        self.assertEqual(tasks[kept.id].updated_at, kept.updated_at)
+        self.assertEqual(tasks[changed.id].task, "Renamed task")
+        self.assertTrue(tasks[changed.id].completed)
+        self.assertNotIn(removed.id, tasks)
+        new_task = [task for task in tasks.values() if task.task == "New task"][0]
+        self.assertEqual(new_task.ordering, 4)
+        self.assertEqual(
+            list(
+                models.Tombstone.objects.filter(model_name="task").values_list(
+                    "object_id", flat=True
+                )
+            ),
+            [removed.id],
+        )
+
+    def test_updating_tasks_from_todo_ignores_tasks_of_other_todos(self):
+        """
+        Test a task id of another todo creates a new task and leaves the
+        other todo's task alone
+        """
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        todo = create_todo(self.user)
+        other_task = create_task(create_todo(self.user), "Other task")
+
+        payload = {"tasks": [{"id": other_task.id, "task": "Taken task"}]}
+        res = self.client.patch(detail_url(todo.id), payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        other_task.refresh_from_db()
+        self.assertEqual(other_task.task, "Other task")
+        self.assertEqual(
+            list(todo.tasks.values_list("task", flat=True)), ["Taken task"]
+        )
+        self.assertNotEqual(todo.tasks.get().id, other_task.id)
+
+    def test_updating_tasks_from_todo_with_repeated_id_fails(self):
+        """
+        Test sending the same task twice is rejected without changing the tasks
+        """
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        todo = create_todo(self.user)
+        task = create_task(todo, "Task")
+        create_task(todo, "Other task")
+
+        payload = {"tasks": [{"id": task.id, "task": "One"}, {"id": task.id}]}
+        res = self.client.patch(detail_url(todo.id), payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(todo.tasks.count(), 2)
+
+    def test_updating_tasks_from_todo_runs_fixed_number_of_queries(self):
+        """
+        Test the queries of updating the tasks of a todo do not grow with the
+        number of tasks
+        """
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+
+        for count in [1, 20, 200]:
+            todo = create_todo(self.user)
+            models.Task.objects.bulk_create(
+                [models.Task(todo=todo, task=f"Task {i}") for i in range(count)]
+            )
+            tasks = list(todo.tasks.order_by("id"))
+            payload = {
+                "tasks": [{"id": task.id, "task": "Changed"} for task in tasks[1:]]
+                + [{"task": f"New task {i}"} for i in range(count)]
+            }
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.patch(detail_url(todo.id), payload, format="json")
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(res.data["tasks"]), count * 2 - 1)
+            if count == 20:
+                expected = len(queries)
+        self.assertEqual(len(queries), expected)
@@ -0,0 +1,174 @@
+"""
+Tests for the values serializers serving the list and retrieve routes
+"""
+import json
+from datetime import datetime, timezone as dt_timezone
+
+from django.db.models import Prefetch
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from core.models import Todo, Task
+from todo.serializers import (
+    TodoSerializer,
+    TaskSerializer,
+    TodoValuesSerializer,
+    TaskValuesSerializer,
+)
+
+TODO_URL = reverse("todo:todo-list")
+TASK_URL = reverse("todo:task-list")
+
+
+def todo_detail_url(todo_id):
+    return reverse("todo:todo-detail", args=[todo_id])
+
+
+def task_detail_url(task_id):
+    return reverse("todo:task-detail", args=[task_id])
+
+
+def create_user(email="user@example.com", password="Awesomeuser123"):
+    """
+    Create and return a user
+    """
+    return get_user_model().objects.create_user(
+        email=email, password=password, first_name="Test", last_name="User"
+    )
+
+
+class ValuesSerializerParityTests(TestCase):
+    """
+    Test the values serializers give the same data as the model serializers
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+
+        self.todo = Todo.objects.create(
+            user=self.user,
+            title="Todo with tasks ✓",
+            completed=True,
+            last_added=datetime(2023, 5, 1, 8, 30, 15, 123456, tzinfo=dt_timezone.utc),
+            rank="i",
+        )
+        Task.objects.create(todo=self.todo, task="Second", ordering=2, rank="8")
+        Task.objects.create(todo=self.todo, task="First", ordering=1, completed=True)
+        Task.objects.create(todo=self.todo, task=None, ordering=None)
+        Todo.objects.create(user=self.user, title=None)
+        Todo.objects.create(user=self.user, title="Empty", ordering=None)
+
+    def model_todos(self):
+        todos = (
+            Todo.objects.filter(user=self.user)
+            .prefetch_related(
+                Prefetch("tasks", queryset=Task.objects.order_by("ordering", "id"))
+            )
+            .order_by("-id")
+        )
+        return json.loads(json.dumps(TodoSerializer(todos, many=True).data))
+
+    def model_tasks(self):
+        tasks = (
+            Task.objects.filter(todo__user=self.user)
+            .select_related("todo")
+            .order_by("id")
+        )
+        return json.loads(json.dumps(TaskSerializer(tasks, many=True).data))
+
+    def test_todo_values_serializer_matches_model_serializer(self):
+        """
+        Test the todos and their tasks serialize to the same data
+        """
+        todos = Todo.objects.filter(user=self.user).order_by("-id")
+        serializer = TodoValuesSerializer(
+            TodoValuesSerializer.get_values_queryset(todos), many=True
+        )
+
+        self.assertEqual(serializer.data, self.model_todos())
+
+    def test_task_values_serializer_matches_model_serializer(self):
+        """
+        Test the tasks serialize to the same data
+        """
+        tasks = Task.objects.filter(todo__user=self.user).order_by("id")
+        serializer = TaskValuesSerializer(
+            TaskValuesSerializer.get_values_queryset(tasks), many=True
+        )
+
+        self.assertEqual(serializer.data, self.model_tasks())
+
+    def test_values_serializers_keep_key_order(self):
+        """
+        Test the rendered keys come in the order of the model serializers
+        """
+        res = self.client.get(TODO_URL)
+
+        self.assertEqual(list(res.json()[0]), TodoSerializer.Meta.fields)
+        self.assertEqual(
+            list(res.json()[-1]["tasks"][0]),
+            ["id", "task", "completed", "ordering", "rank"],
+        )
+        self.assertEqual(
+            list(self.client.get(TASK_URL).json()[0]), TaskSerializer.Meta.fields
+        )
+
+    def test_list_and_retrieve_routes_match_model_serializers(self):
+        """
+        Test the list and retrieve routes give the model serializers' data
+        """
+        todos = self.model_todos()
+        tasks = self.model_tasks()
+
+        self.assertEqual(self.client.get(TODO_URL).json(), todos)
+        self.assertEqual(self.client.get(TASK_URL).json(), tasks)
+        self.assertEqual(
+            self.client.get(todo_detail_url(self.todo.id)).json(), todos[-1]
+        )
+        self.assertEqual(
+            self.client.get(task_detail_url(tasks[0]["id"])).json(), tasks[0]
+        )
+
+    def test_paginated_and_streamed_lists_match_model_serializers(self):
+        """
+        Test pages and streamed lists give the model serializers' data
+        """
+        todos = self.model_todos()
+
+        first = self.client.get(TODO_URL, {"page_size": 2}).json()
+        second = self.client.get(first["next"]).json()
+        self.assertEqual(first["results"] + second["results"], todos)
+
+        res = self.client.get(TODO_URL, {"stream": "true"})
+        self.assertEqual(json.loads(b"".join(res.streaming_content)), todos)
+
+    def test_retrieve_other_users_todo_not_found(self):
+        """
+        Test the values read is still limited to the user's todos
+        """
+        other = Todo.objects.create(user=create_user("other@example.com"))
+
+        res = self.client.get(todo_detail_url(other.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_reads_todos_and_tasks_in_two_queries(self):
+        """
+        Test listing reads the todos and then all of their tasks at once
+        """
+        for i in range(5):
+            Task.objects.create(
+                todo=Todo.objects.create(user=self.user, title=f"Todo {i}"), task="Task"
+            )
+
+        with self.assertNumQueries(2):
+            TodoValuesSerializer(
+                TodoValuesSerializer.get_values_queryset(
+                    Todo.objects.filter(user=self.user)
+                ),
+                many=True,
+            ).data
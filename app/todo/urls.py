@@ -13,4 +13,8 @@ router.register("tasks", views.TaskViewSet)
 
 app_name = "todo"
 
-urlpatterns = [re_path("", include(router.urls))]
+urlpatterns = [
+    re_path("^sync/$", views.SyncView.as_view(), name="sync"),
+    re_path("^export/$", views.ExportView.as_view(), name="export"),
+    re_path("", include(router.urls)),
+]
@@ -8,21 +8,50 @@ from drf_spectacular.utils import (
     OpenApiExample,
     OpenApiResponse,
 )
-from rest_framework import viewsets
-from rest_framework.authentication import TokenAuthentication
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime, timedelta
+
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import viewsets, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from django.conf import settings
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from todo.serializers import TodoSerializer, TaskSerializer
-from core.models import Todo, Task
+from core.models import Todo, Task, Tombstone
+from user.authentication import ExpiringTokenAuthentication
 from .mixins import (
     BatchRouteMixin,
     BatchUpdateOrderingRouteMixin,
     BatchUpdateRouteMixin,
     BatchCreateRouteMixin,
     BatchDeleteRouteMixin,
+    QueryPlanMixin,
+    MoveRouteMixin,
+    DataVersionMixin,
+    ResponseCacheMixin,
+    ValuesReadMixin,
+    TombstoneMixin,
+    StreamingListMixin,
+    ImportRouteMixin,
+)
+from .serializers import (
+    TodoSerializer,
+    TaskSerializer,
+    SyncTodoSerializer,
+    SyncTaskSerializer,
+    TodoValuesSerializer,
+    TaskValuesSerializer,
 )
-from .serializers import TodoSerializer, TaskSerializer
+from .pagination import KeysetPagination
+from .exports import iter_todo_chunks, encode_json, encode_csv, gzip_stream
 
 
 @extend_schema_view(
@@ -36,7 +65,9 @@ from .serializers import TodoSerializer, TaskSerializer
     update=extend_schema(
         description="Updates the Todo, all fields are required to perform the update"
     ),
-    list=extend_schema(description="Lists all Todos"),
+    list=extend_schema(
+        description="Lists all Todos. Pass `page_size` to receive a page of results with `next` and `previous` cursor links, or `stream=true` to receive the full list as a streamed response"
+    ),
     retrieve=extend_schema(
         description="Retrieves a specified todo based on the todo ID"
     ),
@@ -170,6 +201,38 @@ from .serializers import TodoSerializer, TaskSerializer
             ),
         ],
     ),
+    move=extend_schema(
+        description="Moves the todo between two other todos of the user by giving it a rank between theirs. Pass `after` and `before` with the ids of the todos around the new position, only `before` to move it to the start or only `after` to move it to the end. Sort by `rank` to display the order set through this endpoint",
+        examples=[
+            OpenApiExample(
+                "Request Body",
+                value={"after": 1, "before": 2},
+            ),
+        ],
+    ),
+    batch_import=extend_schema(
+        description="Imports todos with their tasks from newline delimited JSON sent with the `application/x-ndjson` content type, one todo per line. The lines are created in chunks, a chunk holding an invalid todo is skipped and its errors returned by line number",
+        request={"application/x-ndjson": OpenApiTypes.OBJECT},
+        examples=[
+            OpenApiExample(
+                "Request Line",
+                value={
+                    "title": "string",
+                    "completed": False,
+                    "tasks": [{"task": "string", "completed": True}],
+                },
+                request_only=True,
+            ),
+            OpenApiExample(
+                "Response Body",
+                value={
+                    "created": 1,
+                    "chunks": [{"first_line": 1, "last_line": 1, "created": 1}],
+                },
+                response_only=True,
+            ),
+        ],
+    ),
     batch_delete=extend_schema(
         description="""
         Delete a list of items. The request body is in the following format:
@@ -185,7 +248,15 @@ from .serializers import TodoSerializer, TaskSerializer
     ),
 )
 class TodoViewSet(
+    ResponseCacheMixin,
+    DataVersionMixin,
+    StreamingListMixin,
+    ValuesReadMixin,
+    TombstoneMixin,
+    QueryPlanMixin,
     BatchRouteMixin,
+    MoveRouteMixin,
+    ImportRouteMixin,
     BatchCreateRouteMixin,
     BatchUpdateRouteMixin,
     BatchUpdateOrderingRouteMixin,
@@ -197,9 +268,26 @@ class TodoViewSet(
     """
 
     serializer_class = TodoSerializer
+    values_serializer_class = TodoValuesSerializer
     queryset = Todo.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [ExpiringTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    pagination_ordering = "-id"
+    rank_parent_field = "user_id"
+
+    tasks_plan = {
+        "prefetch_related": [
+            Prefetch("tasks", queryset=Task.objects.order_by("ordering", "id"))
+        ]
+    }
+    query_plans = {
+        "list": tasks_plan,
+        "retrieve": tasks_plan,
+        "batch_create": tasks_plan,
+        "batch_update": tasks_plan,
+        "batch_update_ordering": tasks_plan,
+    }
 
     def perform_create(self, serializer):
         """
@@ -210,10 +298,11 @@ class TodoViewSet(
 
     def get_queryset(self, ids=None):  #
         if self.request.user.is_authenticated:
+            queryset = self.apply_query_plan(self.queryset)
             if ids:
-                return self.queryset.filter(user=self.request.user, id__in=ids)
+                return queryset.filter(user=self.request.user, id__in=ids)
 
-            return self.queryset.filter(user=self.request.user).order_by("-id")
+            return queryset.filter(user=self.request.user).order_by("-id")
 
     def perform_destory(self, serializer):
         """
@@ -434,6 +523,15 @@ class TodoViewSet(
             ),
         ],
     ),
+    move=extend_schema(
+        description="Moves the task between two other tasks of its todo by giving it a rank between theirs. Pass `after` and `before` with the ids of the tasks around the new position, only `before` to move it to the start or only `after` to move it to the end. Sort by `rank` to display the order set through this endpoint",
+        examples=[
+            OpenApiExample(
+                "Request Body",
+                value={"after": 1, "before": 2},
+            ),
+        ],
+    ),
     batch_delete=extend_schema(
         description="""
         Delete a list of items. The request body is in the following format:
@@ -446,7 +544,14 @@ class TodoViewSet(
     ),
 )
 class TaskViewSet(
+    ResponseCacheMixin,
+    DataVersionMixin,
+    StreamingListMixin,
+    ValuesReadMixin,
+    TombstoneMixin,
+    QueryPlanMixin,
     BatchRouteMixin,
+    MoveRouteMixin,
     BatchCreateRouteMixin,
     BatchUpdateRouteMixin,
     BatchUpdateOrderingRouteMixin,
@@ -458,10 +563,23 @@ class TaskViewSet(
     """
 
     serializer_class = TaskSerializer
+    values_serializer_class = TaskValuesSerializer
     queryset = Task.objects.all()
     permission_classes = [IsAuthenticated]
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [ExpiringTokenAuthentication]
     http_method_names = ["get", "post", "patch", "delete"]
+    pagination_class = KeysetPagination
+    pagination_ordering = "id"
+    rank_parent_field = "todo_id"
+
+    todo_plan = {"select_related": ["todo"]}
+    query_plans = {
+        "list": todo_plan,
+        "retrieve": todo_plan,
+        "batch_create": todo_plan,
+        "batch_update": todo_plan,
+        "batch_update_ordering": todo_plan,
+    }
 
     def perform_create(self, serializer):
         action_type = self.action
@@ -477,12 +595,127 @@ class TaskViewSet(
         Filter queryset to authenticated user
         """
         if self.request.user.is_authenticated:
+            queryset = self.apply_query_plan(self.queryset)
             if ids:
-                return self.queryset.filter(
+                return queryset.filter(
                     todo__user=self.request.user, id__in=ids
                 ).order_by("id")
 
-            return self.queryset.filter(todo__user=self.request.user).order_by("id")
+            return queryset.filter(todo__user=self.request.user).order_by("id")
 
     def view_name(self):
         return "task"
+
+
+class SyncView(APIView):
+    """
+    View returning the todos and tasks of the user changed or deleted since
+    the `since` cursor of a previous sync. Tasks of a deleted todo are deleted
+    along with it and not listed separately
+    """
+
+    authentication_classes = [ExpiringTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def encode_cursor(self, timestamp):
+        data = json.dumps({"t": timestamp.isoformat()})
+        return urlsafe_b64encode(data.encode("ascii")).decode("ascii")
+
+    def decode_cursor(self, cursor):
+        try:
+            data = json.loads(urlsafe_b64decode(cursor.encode("ascii")))
+            return datetime.fromisoformat(data["t"])
+        except (TypeError, ValueError, KeyError):
+            raise ValidationError({"since": ["Invalid cursor"]})
+
+    @extend_schema(
+        description="Returns the todos and tasks changed since the `since` cursor and the ids of those deleted. Without `since` every todo and task is returned. Pass the returned `cursor` as `since` on the next sync, items changed close to the previous sync can be returned again",
+        parameters=[
+            OpenApiParameter(
+                "since",
+                OpenApiTypes.STR,
+                description="The cursor returned by the previous sync",
+            )
+        ],
+    )
+    def get(self, request):
+        # read the cursor before the changes so that nothing saved while
+        # they are read is skipped by the next sync
+        cursor = timezone.now() - timedelta(seconds=settings.SYNC_CURSOR_LAG)
+
+        todos = Todo.objects.filter(user=request.user)
+        tasks = Task.objects.filter(todo__user=request.user)
+        deleted = {"todos": [], "tasks": []}
+
+        if since := request.query_params.get("since"):
+            since = self.decode_cursor(since)
+            todos = todos.filter(updated_at__gt=since)
+            tasks = tasks.filter(updated_at__gt=since)
+            tombstones = Tombstone.objects.filter(
+                user=request.user, deleted_at__gt=since
+            ).values_list("model_name", "object_id")
+            for model_name, object_id in tombstones:
+                deleted[f"{model_name}s"].append(object_id)
+
+        return Response(
+            {
+                "todos": SyncTodoSerializer(todos.order_by("id"), many=True).data,
+                "tasks": SyncTaskSerializer(tasks.order_by("id"), many=True).data,
+                "deleted": deleted,
+                "cursor": self.encode_cursor(cursor),
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class ExportView(APIView):
+    """
+    View streaming all todos and tasks of the user as a gzip compressed JSON or
+    CSV archive. The todos are exported in id order so an interrupted export
+    can be resumed after the last todo received
+    """
+
+    authentication_classes = [ExpiringTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    export_types = ["json", "csv"]
+
+    @extend_schema(
+        description="Downloads all todos and their tasks as a gzip compressed archive in id order. The JSON archive holds a list of todos with nested tasks, the CSV archive a row per task. Pass the id of the last todo received as `after` to resume an interrupted export",
+        parameters=[
+            OpenApiParameter(
+                "type", OpenApiTypes.STR, enum=export_types, description="json or csv"
+            ),
+            OpenApiParameter(
+                "after",
+                OpenApiTypes.INT,
+                description="Export only the todos with a greater id",
+            ),
+        ],
+        responses={(200, "application/gzip"): OpenApiTypes.BINARY},
+    )
+    def get(self, request):
+        export_type = request.query_params.get("type", "json")
+        if export_type not in self.export_types:
+            raise ValidationError({"type": ["Export type must be json or csv"]})
+
+        try:
+            after = request.query_params.get("after")
+            after = int(after) if after is not None else None
+        except ValueError:
+            raise ValidationError({"after": ["Int is required as field value"]})
+
+        chunks = iter_todo_chunks(
+            request.user, after, chunk_size=settings.TODO_STREAM_CHUNK_SIZE
+        )
+        if export_type == "csv":
+            encoded = encode_csv(chunks)
+        else:
+            encoded = encode_json(chunks, TodoSerializer)
+
+        response = StreamingHttpResponse(
+            gzip_stream(encoded), content_type="application/gzip"
+        )
+        response[
+            "Content-Disposition"
+        ] = f'attachment; filename="todos.{export_type}.gz"'
+        return response
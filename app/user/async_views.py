@@ -0,0 +1,14 @@
+"""
+Async views for the User
+"""
+from core.async_views import AsyncReadView
+from user.serializers import UserSerializer
+
+
+class ManageUserAsyncView(AsyncReadView):
+    """
+    Retrieves the authenticated user
+    """
+
+    async def get_data(self, request):
+        return UserSerializer(request.user).data
@@ -1,21 +1,188 @@
+import copy
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 from datetime import datetime, timedelta
 from rest_framework import authentication, exceptions
 from rest_framework.authtoken.models import Token
 
+from core.metrics import AUTH_CACHE
+from core.response_cache import get_cache
+
+TOKEN_LIFETIME = timedelta(hours=72)
+
+
+def revocation_key(user_id):
+    return f"tokens:{user_id}:revoked"
+
+
+def get_revocation(user_id):
+    """
+    The mark of the last revocation of the user's cached tokens in the cache
+    shared by the processes, None if there was none
+    """
+    return get_cache().get(revocation_key(user_id))
+
+
+def revoke_cached_tokens(user_id):
+    """
+    Stop every process authenticating the user's tokens from its cache, again
+    once the current transaction commits so that no token read before the
+    commit is cached past it
+    """
+
+    def revoke():
+        get_cache().set(revocation_key(user_id), uuid.uuid4().hex, timeout=None)
+
+    revoke()
+    transaction.on_commit(revoke)
+
+
+class TokenCache:
+    """
+    Bounded least recently used cache of authenticated tokens for this
+    process. Entries live until their ttl or the token expiry, whichever
+    comes first, or until the user's tokens are revoked by any process
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is not None and (
+            entry[2] <= time.monotonic() or entry[3] != get_revocation(entry[0].pk)
+        ):
+            entry = None
+
+        with self.lock:
+            if entry is None:
+                self.entries.pop(key, None)
+                self.misses += 1
+                AUTH_CACHE.labels("miss").inc()
+                return None
+            if key in self.entries:
+                self.entries.move_to_end(key)
+            self.hits += 1
+            AUTH_CACHE.labels("hit").inc()
+            return entry[0], entry[1]
+
+    def set(self, key, user, token, expires_in):
+        if self.max_size <= 0:
+            return
+        expires_at = time.monotonic() + min(self.ttl, expires_in)
+        revocation = get_revocation(user.pk)
+        with self.lock:
+            self.entries[key] = (user, token, expires_at, revocation)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def delete_user(self, user_id):
+        with self.lock:
+            for key in [
+                key for key, entry in self.entries.items() if entry[0].pk == user_id
+            ]:
+                del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
+
+
+def cacheable_user(user):
+    """
+    Return a copy of the user without the counters moved in the database, a
+    user served from the cache loads them when they are read
+    """
+    user = copy.copy(user)
+    for name in getattr(user, "database_counters", []):
+        user.__dict__.pop(user._meta.get_field(name).attname, None)
+    return user
+
+
+token_cache = TokenCache(
+    max_size=settings.AUTH_TOKEN_CACHE_SIZE, ttl=settings.AUTH_TOKEN_CACHE_TTL
+)
+
 
 class ExpiringTokenAuthentication(authentication.TokenAuthentication):
-    def authenticate_credentials(self, key):
-        try:
-            token = self.get_model().objects.get(key=key)
-        except self.get_model().DoesNotExist:
-            raise exceptions.AuthenticationFailed("Invalid Or Expired Token Provided")
+    def get_cached_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is not None:
+            user, token = cached
+            # hand every request its own user so that changes made while
+            # handling it do not leak into the cache
+            return copy.copy(user), token
+        return None
 
+    def check_token(self, key, token):
+        """
+        Reject inactive users and expired tokens, caching the valid ones
+        """
         if not token.user.is_active:
             raise exceptions.AuthenticationFailed("Inactive User")
 
         current_time = timezone.now()
 
-        if token.created < current_time - timedelta(hours=72):
+        if token.created < current_time - TOKEN_LIFETIME:
             raise exceptions.AuthenticationFailed("Token has Expired")
+
+        expires_in = (token.created + TOKEN_LIFETIME - current_time).total_seconds()
+        token_cache.set(key, cacheable_user(token.user), token, expires_in)
         return token.user, token
+
+    def authenticate_credentials(self, key):
+        cached = self.get_cached_credentials(key)
+        if cached is not None:
+            return cached
+
+        try:
+            token = self.get_model().objects.select_related("user").get(key=key)
+        except self.get_model().DoesNotExist:
+            raise exceptions.AuthenticationFailed("Invalid Or Expired Token Provided")
+
+        return self.check_token(key, token)
+
+    async def aauthenticate(self, request):
+        """
+        Async counterpart of authenticate used by the async views, the token
+        is loaded with the async ORM
+        """
+        auth = authentication.get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed("Invalid token header")
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed("Invalid token header")
+
+        cached = self.get_cached_credentials(key)
+        if cached is not None:
+            return cached
+
+        try:
+            token = await self.get_model().objects.select_related("user").aget(key=key)
+        except self.get_model().DoesNotExist:
+            raise exceptions.AuthenticationFailed("Invalid Or Expired Token Provided")
+
+        return self.check_token(key, token)
@@ -132,7 +132,7 @@ class ChangePasswordSerializer(serializers.ModelSerializer):
                 _("Unable to authenticate request"), code="authorization"
             )
         instance.set_password(validated_data["password"])
-        instance.save()
+        instance.save(update_fields=["password"])
 
         return instance
 
@@ -166,7 +166,7 @@ class UpdateUserSerializer(serializers.ModelSerializer):
         instance.last_name = validated_data["last_name"]
         instance.email = validated_data["email"]
 
-        instance.save()
+        instance.save(update_fields=["first_name", "last_name", "email"])
 
         return instance
 
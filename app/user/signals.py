@@ -0,0 +1,27 @@
+"""
+Signals for the User app
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import revoke_cached_tokens, token_cache
+
+
+@receiver([post_save, post_delete], sender=Token)
+def drop_cached_token(sender, instance, **kwargs):
+    """
+    Stop authenticating with a token from the cache once it changes or is deleted
+    """
+    token_cache.delete(instance.key)
+    revoke_cached_tokens(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=get_user_model())
+def drop_cached_user_tokens(sender, instance, **kwargs):
+    """
+    Drop the cached tokens of a user whose password or status may have changed
+    """
+    token_cache.delete_user(instance.pk)
+    revoke_cached_tokens(instance.pk)
@@ -0,0 +1,190 @@
+"""
+Tests for the token authentication
+"""
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Todo
+from user.authentication import (
+    ExpiringTokenAuthentication,
+    TokenCache,
+    revoke_cached_tokens,
+    token_cache,
+)
+
+ME_URL = reverse("user:me")
+TODO_URL = reverse("todo:todo-list")
+
+
+def create_user(email="user@example.com", password="Awesomeuser123"):
+    """
+    Create and return a user
+    """
+    return get_user_model().objects.create_user(
+        email=email, password=password, first_name="Test", last_name="User"
+    )
+
+
+class ExpiringTokenAuthenticationTests(TestCase):
+    """
+    Test authenticating requests with tokens
+    """
+
+    def setUp(self):
+        token_cache.clear()
+        self.client = APIClient()
+        self.user = create_user()
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def tearDown(self):
+        token_cache.clear()
+
+    def test_token_and_user_loaded_in_one_query(self):
+        """
+        Test the token and its user are loaded with a single query
+        """
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["email"], self.user.email)
+
+    def test_cached_token_skips_database(self):
+        """
+        Test a token authenticated before is not looked up again
+        """
+        self.client.get(ME_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(token_cache.hits, 1)
+
+    def test_todo_endpoints_reject_expired_tokens(self):
+        """
+        Test the todo endpoints check the token expiry
+        """
+        Token.objects.filter(key=self.token.key).update(
+            created=timezone.now() - timedelta(hours=73)
+        )
+
+        res = self.client.get(TODO_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_token_dropped_from_cache(self):
+        """
+        Test a deleted token stops authenticating even when cached
+        """
+        self.client.get(ME_URL)
+
+        self.token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_user_change_drops_cached_tokens(self):
+        """
+        Test saving the user drops the user's tokens from the cache
+        """
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(token_cache.get(self.token.key))
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(
+        CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+            "responses": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "test-revocations",
+            },
+        }
+    )
+    def test_token_revoked_by_other_process_dropped_from_cache(self):
+        """
+        Test a token deleted by another process stops authenticating here,
+        the other process only reaching this one through the shared cache
+        """
+        self.client.get(ME_URL)
+        with self.assertNumQueries(0):
+            self.client.get(ME_URL)
+
+        Token.objects.filter(key=self.token.key)._raw_delete("default")
+        revoke_cached_tokens(self.user.pk)
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cached_user_not_shared_between_requests(self):
+        """
+        Test every request authenticated from the cache gets its own user
+        """
+        authentication = ExpiringTokenAuthentication()
+        authentication.authenticate_credentials(self.token.key)
+
+        user1, _ = authentication.authenticate_credentials(self.token.key)
+        user1.first_name = "Changed"
+        user2, _ = authentication.authenticate_credentials(self.token.key)
+
+        self.assertEqual(user2.first_name, "Test")
+
+    def test_cached_user_reads_current_counters(self):
+        """
+        Test a user served from the cache holds the counters as they are now,
+        not as they were when the token was cached
+        """
+        authentication = ExpiringTokenAuthentication()
+        authentication.authenticate_credentials(self.token.key)
+        Todo.objects.create(user=self.user, title="Todo")
+        get_user_model().objects.bump_data_version(pk=self.user.pk)
+
+        user, _ = authentication.authenticate_credentials(self.token.key)
+
+        self.assertEqual(user.next_ordering, 2)
+        self.assertEqual(user.data_version, 1)
+
+
+class TokenCacheTests(TestCase):
+    """
+    Test the in process token cache
+    """
+
+    def test_least_recently_used_entry_evicted(self):
+        """
+        Test the cache drops the least recently used token when full
+        """
+        cache = TokenCache(max_size=2, ttl=60)
+        user = get_user_model()(pk=1)
+        cache.set("a", user, None, 60)
+        cache.set("b", user, None, 60)
+        cache.get("a")
+        cache.set("c", user, None, 60)
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+
+    def test_entry_expires_with_token(self):
+        """
+        Test an entry does not outlive the token expiry even if the ttl is longer
+        """
+        cache = TokenCache(max_size=2, ttl=60)
+        with mock.patch("user.authentication.time.monotonic", return_value=100):
+            cache.set("a", get_user_model()(pk=1), None, 5)
+        with mock.patch("user.authentication.time.monotonic", return_value=106):
+            self.assertIsNone(cache.get("a"))
@@ -6,6 +6,22 @@ if [ $DEV != "true" ]; then
     python manage.py wait_for_db
     python manage.py collectstatic --noinput
     python manage.py migrate
+    # cached responses may predate the migrations
+    python manage.py shell -c "from core.response_cache import get_cache; get_cache().clear()"
 
-    uwsgi --socket :9090 --workers 4 --master --enable-threads --module app.wsgi
+    # the workers share their metrics through files in this directory
+    export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/metrics}
+    rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
+    if [ "$SERVER" = "asgi" ]; then
+        # requests run their queries on short lived threads, share the
+        # connections through the pool instead of keeping one per thread
+        export DB_POOL_SIZE=${DB_POOL_SIZE:-10}
+        gunicorn app.asgi:application --bind :9090 --workers 4 \
+            --worker-class uvicorn.workers.UvicornWorker \
+            --config python:app.gunicorn
+    else
+        uwsgi --socket :9090 --workers 4 --master --enable-threads --module app.wsgi
+    fi
 fi
\ No newline at end of file